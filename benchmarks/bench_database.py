@@ -0,0 +1,101 @@
+"""
+Micro-benchmark des accès base de données: ancien schéma SELECT/INSERT/SELECT
+(une connexion par appel) contre les UPSERT ... RETURNING du DatabaseManager.
+
+Usage: python benchmarks/bench_database.py [iterations]
+"""
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiosqlite
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import DatabaseManager, UserManager, EconomyManager  # noqa: E402
+
+# --- Ancienne implémentation (référence "avant") ---
+
+async def legacy_get_or_create_user(db_path, user_id, username):
+    async with aiosqlite.connect(db_path) as db:
+        db.row_factory = aiosqlite.Row
+        async with db.execute("SELECT * FROM users WHERE id = ?", (user_id,)) as cursor:
+            user = await cursor.fetchone()
+        if not user:
+            await db.execute("INSERT INTO users (id, username) VALUES (?, ?)", (user_id, username))
+            await db.commit()
+            async with db.execute("SELECT * FROM users WHERE id = ?", (user_id,)) as cursor:
+                user = await cursor.fetchone()
+    return dict(user) if user else {}
+
+async def legacy_get_member_data(db_path, user_id, guild_id):
+    async with aiosqlite.connect(db_path) as db:
+        db.row_factory = aiosqlite.Row
+        async with db.execute("SELECT * FROM members WHERE user_id = ? AND guild_id = ?",
+                              (user_id, guild_id)) as cursor:
+            member = await cursor.fetchone()
+        if not member:
+            await db.execute("INSERT INTO members (user_id, guild_id) VALUES (?, ?)", (user_id, guild_id))
+            await db.commit()
+            async with db.execute("SELECT * FROM members WHERE user_id = ? AND guild_id = ?",
+                                  (user_id, guild_id)) as cursor:
+                member = await cursor.fetchone()
+    return dict(member) if member else {}
+
+async def legacy_add_coins(db_path, user_id, guild_id, amount):
+    await legacy_get_member_data(db_path, user_id, guild_id)
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute("UPDATE members SET coins = coins + ? WHERE user_id = ? AND guild_id = ?",
+                         (amount, user_id, guild_id))
+        await db.execute("""
+            INSERT INTO economy_transactions (guild_id, user_id, amount, transaction_type, description)
+            VALUES (?, ?, ?, ?, ?)
+        """, (guild_id, user_id, amount, "add", "bench"))
+        await db.commit()
+    async with aiosqlite.connect(db_path) as db:
+        async with db.execute("SELECT coins FROM members WHERE user_id = ? AND guild_id = ?",
+                              (user_id, guild_id)) as cursor:
+            return (await cursor.fetchone())[0]
+
+# --- Mesure ---
+
+async def measure(label, coro_factory, iterations):
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter_ns()
+        await coro_factory(i)
+        samples.append((time.perf_counter_ns() - start) / 1000)
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"  {label:<32} moyenne {statistics.mean(samples):8.1f} µs   "
+          f"p50 {samples[len(samples) // 2]:8.1f} µs   p99 {p99:8.1f} µs")
+
+async def main(iterations: int):
+    tmp = Path(tempfile.mkdtemp())
+    db = DatabaseManager(tmp / "bench.db", pool_size=4)
+    await db.init_database()
+    # Le cache est désactivé pour mesurer les accès SQL eux-mêmes
+    db.user_cache.max_size = db.member_cache.max_size = 1
+    db.user_cache.ttl = db.member_cache.ttl = 0
+    users = UserManager(db)
+    economy = EconomyManager(db)
+    path = db.db_path
+
+    print(f"{iterations} appels séquentiels par opération\n")
+    print("Avant (SELECT puis INSERT puis SELECT, une connexion par appel):")
+    await measure("get_or_create_user", lambda i: legacy_get_or_create_user(path, i, "u"), iterations)
+    await measure("get_member_data", lambda i: legacy_get_member_data(path, i, 1), iterations)
+    await measure("add_coins", lambda i: legacy_add_coins(path, i, 1, 5), iterations)
+
+    print("\nAprès (UPSERT ... RETURNING, pool et file d'écriture):")
+    await measure("get_or_create_user", lambda i: users.get_or_create_user(iterations + i, "u"), iterations)
+    await measure("get_member_data", lambda i: users.get_member_data(iterations + i, 1), iterations)
+    await measure("add_coins", lambda i: economy.add_coins(iterations + i, 1, 5, "bench"), iterations)
+
+    await db.close()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,99 @@
+"""
+Micro-benchmark du logging: handlers appelés directement dans la boucle asyncio
+contre LoopQueueHandler + QueueListener (formatage et écritures dans un thread).
+
+Mesure le débit (enregistrements/s jusqu'à l'écriture complète) et le temps que
+chaque appel de log ajoute à une coroutine (moyenne, p50, p99).
+
+Usage: python benchmarks/bench_logging.py [enregistrements]
+"""
+import asyncio
+import contextlib
+import io
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import Config  # noqa: E402
+from utils import logger as log_module  # noqa: E402
+
+async def log_from_coroutine(logger: logging.Logger, records: int):
+    samples = []
+    for i in range(records):
+        start = time.perf_counter_ns()
+        logger.info("Commande '%s' utilisée par %s", "balance", i, extra={'guild_id': 1, 'user_id': i})
+        samples.append((time.perf_counter_ns() - start) / 1000)
+        if i % 100 == 0:
+            await asyncio.sleep(0)
+    return samples
+
+def run(label: str, queued: bool, records: int):
+    log_module.setup_logging(queued=queued, force=True)
+    logger = logging.getLogger("bench")
+
+    start = time.perf_counter()
+    samples = asyncio.run(log_from_coroutine(logger, records))
+    in_loop = time.perf_counter() - start
+    # Le débit compte jusqu'à ce que tout soit écrit (file vidée)
+    log_module.stop_logging()
+    total = time.perf_counter() - start
+
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"  {label:<10} {records / total:10,.0f} enr/s   "
+          f"boucle bloquée {in_loop * 1000:8.1f} ms   "
+          f"par appel: moyenne {statistics.mean(samples):6.1f} µs   "
+          f"p50 {samples[len(samples) // 2]:6.1f} µs   p99 {p99:6.1f} µs")
+
+def main(records: int):
+    Config.LOGS_DIR = Path(tempfile.mkdtemp())
+    Config.DISCORD_WEBHOOK_URL = ""
+
+    print(f"{records} enregistrements INFO (console + bot.log + bot.json)\n")
+    # La sortie console est jetée pour ne pas mesurer le terminal
+    with contextlib.redirect_stderr(io.StringIO()):
+        log_module.stop_logging()
+        run("direct", False, records)
+        run("file", True, records)
+        log_module.setup_logging(queued=False, force=True)
+
+    print(f"\nFormateur JSON ({records} appels):")
+    record = logging.LogRecord("bench", logging.INFO, __file__, 1, "message %s", (1,), None)
+    record.guild_id = 1
+    legacy = LegacyJSONFormatter()
+    for label, formatter in (("avant", legacy), ("après", log_module.JSONFormatter())):
+        start = time.perf_counter()
+        for _ in range(records):
+            formatter.format(record)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<10} {elapsed / records * 1e6:6.2f} µs/enregistrement")
+
+class LegacyJSONFormatter(logging.Formatter):
+    """Ancienne implémentation de JSONFormatter (référence "avant")"""
+
+    def format(self, record):
+        import json
+        from datetime import datetime
+        log_data = {
+            'timestamp': datetime.fromtimestamp(record.created).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'function': record.funcName,
+            'line': record.lineno
+        }
+        for field in ('guild_id', 'user_id', 'channel_id'):
+            if record.__dict__.get(field) is not None:
+                log_data[field] = record.__dict__.get(field)
+        if record.exc_info:
+            log_data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(log_data, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
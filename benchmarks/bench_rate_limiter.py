@@ -0,0 +1,101 @@
+"""
+Micro-benchmark de la limitation de taux: ancienne liste de datetime par
+utilisateur contre le RateLimiter GCRA (un float par clé).
+
+Mesure le temps par appel selon le nombre de requêtes déjà comptées dans la
+fenêtre (la liste grossit, le GCRA reste constant) et la mémoire par clé.
+
+Usage: python benchmarks/bench_rate_limiter.py [clés]
+"""
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.security import RateLimiter  # noqa: E402
+
+class LegacyRateLimiter:
+    """Ancienne implémentation (référence "avant")"""
+
+    def __init__(self):
+        self.user_buckets = {}
+
+    def is_rate_limited(self, user_id, max_requests=5, window_seconds=60):
+        now = datetime.now()
+        cutoff = now - timedelta(seconds=window_seconds)
+        if user_id in self.user_buckets:
+            self.user_buckets[user_id] = [t for t in self.user_buckets[user_id] if t > cutoff]
+        else:
+            self.user_buckets[user_id] = []
+        if len(self.user_buckets[user_id]) >= max_requests:
+            return True
+        self.user_buckets[user_id].append(now)
+        return False
+
+def time_per_call(func, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e6
+
+def bench_window(window_requests: int, calls: int = 200):
+    """Temps par appel quand `window_requests` requêtes sont déjà dans la fenêtre"""
+    legacy = LegacyRateLimiter()
+    for _ in range(window_requests):
+        legacy.is_rate_limited(1, window_requests + calls, 3600)
+    legacy_us = time_per_call(lambda: legacy.is_rate_limited(1, window_requests + calls, 3600), calls)
+
+    limiter = RateLimiter()
+    key = limiter.make_key('user', 'bench', 1)
+    for _ in range(window_requests):
+        limiter.hit(key, window_requests + calls, 3600)
+    gcra_us = time_per_call(lambda: limiter.hit(key, window_requests + calls, 3600), calls)
+
+    print(f"  {window_requests:>6} req. dans la fenêtre   avant {legacy_us:8.2f} µs   après {gcra_us:6.2f} µs")
+
+def measure_memory(build) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del obj
+    return after - before
+
+def main(keys: int):
+    print("Temps par appel (limite large, une seule clé):")
+    for window_requests in (1, 10, 100, 1000, 5000):
+        bench_window(window_requests)
+
+    print(f"\nMémoire pour {keys} utilisateurs (5 requêtes chacun sur 300s):")
+
+    def build_legacy():
+        limiter = LegacyRateLimiter()
+        for user_id in range(keys):
+            for _ in range(5):
+                limiter.is_rate_limited(user_id, 5, 300)
+        return limiter
+
+    def build_gcra():
+        limiter = RateLimiter()
+        for user_id in range(keys):
+            key = limiter.make_key('user', 'bench', user_id)
+            for _ in range(5):
+                limiter.hit(key, 5, 300)
+        return limiter
+
+    for label, build in (("avant", build_legacy), ("après", build_gcra)):
+        size = measure_memory(build)
+        print(f"  {label:<6} {size / 1024:9.1f} Kio   {size / keys:6.1f} octets/clé")
+
+    limiter = build_gcra()
+    start = time.perf_counter()
+    evicted = limiter.evict(now=time.monotonic() + 301)
+    print(f"\nÉviction: {evicted} clés inactives retirées en {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"({len(limiter._tat)} restantes)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -2,19 +2,26 @@
 Bot Discord principal - Version restructurée et améliorée
 """
 import os
+import time
 import asyncio
 import logging
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
 import discord
 from discord.ext import commands
-import aiosqlite
 
 from config import Config
-from database import db_manager
-from utils.logger import setup_logging, bot_logger
-from utils.security import SecurityError
+from database import db_manager, xp_accumulator
+from utils.logger import setup_logging, bot_logger, discord_log_stats
+from utils.security import SecurityError, require_permissions, rate_limiter
+from utils.pipeline import MessagePipeline, MessageContext
+from utils.scheduler import scheduler
+from utils.metrics import metrics, instrument_app_commands
+from utils.watchdog import loop_watchdog
+from utils.spam import spam_tracker
+from utils.events import event_bus
 
 # Configuration du logging
 logger = setup_logging()
@@ -42,24 +49,46 @@ class DiscordBot(commands.Bot):
         self.startup_time = None
         self.database_ready = False
         
-    async def _get_prefix(self, bot, message):
-        """Récupère le préfixe pour un serveur"""
-        if not message.guild:
-            return Config.COMMAND_PREFIX
+        # Pipeline unique des messages: les cogs y enregistrent leurs étapes
+        self.message_pipeline = MessagePipeline()
+        self.message_pipeline.register("xp", self._xp_stage, MessagePipeline.PRIORITY_XP)
+        
+        # Chronométrage des commandes préfixées (les commandes slash sont enveloppées au démarrage)
+        self.before_invoke(self._metrics_before_invoke)
+        self.after_invoke(self._metrics_after_invoke)
+        self._metrics_task: Optional[asyncio.Task] = None
+        
+        # Interface web servie par le bot (INTERFACE_EMBEDDED)
+        self.web_admin = None
         
-        # TODO: Récupérer le préfixe personnalisé depuis la base de données
-        return Config.COMMAND_PREFIX
+    async def _get_prefix(self, bot, message):
+        """Récupère les préfixes d'un serveur (cache mémoire, aucune E/S)"""
+        return db_manager.prefixes.get(message.guild.id if message.guild else None)
     
     async def setup_hook(self):
         """Configuration initiale du bot"""
         logger.info("🚀 Démarrage du bot...")
         
+        # Mesurer le retard de la boucle dès le démarrage (chargements compris)
+        loop_watchdog.start()
+        
         # Initialiser la base de données
         await self._setup_database()
         
         # Charger les cogs
         await self._load_cogs()
         
+        # Charger les échéances enregistrées par les cogs (rappels, giveaways...)
+        await scheduler.start(self.wait_until_ready)
+        rate_limiter.start()
+        
+        # Métriques: chronométrer les commandes slash et exporter pour /metrics
+        self._setup_metrics()
+        
+        # Interface web sur la boucle du bot
+        if Config.INTERFACE_EMBEDDED:
+            await self._start_web_admin()
+        
         # Synchroniser les commandes slash
         await self._sync_commands()
         
@@ -69,6 +98,7 @@ class DiscordBot(commands.Bot):
         """Configure la base de données"""
         try:
             await db_manager.init_database()
+            xp_accumulator.start()
             
             # Migrer les anciennes données JSON si elles existent
             old_data_file = Path("data.json")
@@ -76,11 +106,20 @@ class DiscordBot(commands.Bot):
                 logger.info("📦 Migration des anciennes données...")
                 await db_manager.migrate_from_json(old_data_file)
                 
-                # Faire une sauvegarde de l'ancien fichier
+                # Mettre l'ancien fichier de côté: l'import ne doit se faire qu'une fois
                 backup_file = Path("data.json.backup")
-                if not backup_file.exists():
-                    old_data_file.rename(backup_file)
-                    logger.info(f"💾 Sauvegarde créée: {backup_file}")
+                if backup_file.exists():
+                    backup_file = Path(f"data.json.{datetime.now():%Y%m%d%H%M%S}.backup")
+                old_data_file.rename(backup_file)
+                logger.info(f"💾 Sauvegarde créée: {backup_file}")
+            
+            await db_manager.load_leaderboards()
+            await db_manager.load_prefixes()
+            await db_manager.settings.load()
+            await db_manager.community.load()
+            # setup_hook s'exécute après la connexion: l'identifiant du bot est connu
+            if self.user:
+                db_manager.prefixes.set_bot_user(self.user.id)
             
             self.database_ready = True
             logger.info("✅ Base de données initialisée")
@@ -147,6 +186,101 @@ class DiscordBot(commands.Bot):
         
         logger.info(f"📦 {loaded_count}/{len(cogs)} cogs chargés")
     
+    async def _start_web_admin(self):
+        """Démarre l'interface d'administration intégrée (aiohttp)"""
+        from web_admin import AdminInterface
+        try:
+            self.web_admin = AdminInterface(self)
+            await self.web_admin.start()
+        except Exception as e:
+            self.web_admin = None
+            logger.error(f"❌ Erreur démarrage interface web intégrée: {e}")
+    
+    def _setup_metrics(self):
+        """Enveloppe les commandes slash et démarre l'export des métriques"""
+        wrapped = instrument_app_commands(self.tree, metrics)
+        logger.info(f"⏱️ {wrapped} commandes slash chronométrées")
+        
+        metrics.register_gauge(
+            "db_cache_hit_ratio", "Taux de succès des caches de lecture",
+            lambda: [({'cache': name}, stats['hit_rate']) for name, stats in db_manager.cache_stats().items()]
+        )
+        metrics.register_gauge("db_writer_batches_total", "Lots validés par la file d'écriture",
+                               lambda: db_manager.writer.batches_committed)
+        metrics.register_gauge("db_writer_ops_total", "Écritures validées par la file d'écriture",
+                               lambda: db_manager.writer.ops_committed)
+        metrics.register_gauge("discord_log_sent_total", "Messages envoyés au webhook de logs",
+                               lambda: discord_log_stats()['sent_messages'])
+        metrics.register_gauge("discord_log_dropped_total", "Erreurs perdues (file du webhook pleine)",
+                               lambda: discord_log_stats()['dropped'])
+        metrics.register_gauge("scheduler_pending", "Échéances en attente", lambda: len(scheduler))
+        metrics.register_gauge("guilds", "Serveurs rejoints", lambda: len(self.guilds))
+        metrics.register_gauge("rate_limit_keys", "Clés de limitation de taux actives",
+                               lambda: rate_limiter.stats()['keys'])
+        metrics.register_gauge("spam_tracked_members", "Membres suivis par l'anti-spam",
+                               lambda: spam_tracker.stats()['tracked'])
+        metrics.register_gauge("spam_evicted_total", "Membres inactifs retirés du suivi anti-spam",
+                               lambda: spam_tracker.stats()['evicted'])
+        metrics.register_gauge(
+            "guild_settings_entries", "Entrées de configuration des serveurs en mémoire",
+            lambda: [({'section': name}, count) for name, count in db_manager.settings.stats().items()]
+        )
+        metrics.register_gauge(
+            "community_entries", "Données communautaires en mémoire",
+            lambda: [({'kind': name}, count) for name, count in db_manager.community.stats().items()]
+        )
+        metrics.register_gauge("event_bus_subscribers", "Abonnés au flux en direct",
+                               lambda: event_bus.stats()['subscribers'])
+        metrics.register_gauge("event_bus_published_total", "Événements publiés sur le bus",
+                               lambda: event_bus.stats()['published'])
+        metrics.register_gauge("event_bus_dropped", "Événements perdus par les abonnés trop lents",
+                               lambda: event_bus.stats()['dropped'])
+        metrics.register_gauge("loop_late_ticks", "Battements de la boucle en retard au-delà du seuil",
+                               lambda: loop_watchdog.late_ticks)
+        metrics.register_gauge("loop_lag_max_seconds", "Plus grand retard observé de la boucle",
+                               lambda: loop_watchdog.max_lag)
+        
+        if Config.METRICS_EXPORT_INTERVAL > 0 and self._metrics_task is None:
+            self._metrics_task = asyncio.create_task(self._export_metrics(), name="metrics-export")
+    
+    async def _export_metrics(self):
+        """Écrit périodiquement les métriques dans Config.METRICS_FILE (lu par l'interface web)"""
+        while True:
+            try:
+                await asyncio.to_thread(metrics.write_textfile, Config.METRICS_FILE)
+            except Exception as e:
+                logger.warning(f"Erreur export des métriques: {e}")
+            await asyncio.sleep(Config.METRICS_EXPORT_INTERVAL)
+    
+    async def _metrics_before_invoke(self, ctx):
+        ctx.metrics_start = time.perf_counter_ns()
+    
+    async def _metrics_after_invoke(self, ctx):
+        start = getattr(ctx, 'metrics_start', None)
+        if start is None or ctx.command is None:
+            return
+        cog = type(ctx.cog).__name__ if ctx.cog else "-"
+        metrics.observe('prefix', ctx.command.qualified_name, cog,
+                        time.perf_counter_ns() - start, ctx.command_failed)
+    
+    async def _run_event(self, coro, event_name, *args, **kwargs):
+        """Exécute un listener (comme discord.Client) en le chronométrant"""
+        owner = getattr(coro, '__self__', None)
+        cog = type(owner).__name__ if owner is not None else "-"
+        start = time.perf_counter_ns()
+        try:
+            await coro(*args, **kwargs)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            metrics.observe('listener', event_name, cog, time.perf_counter_ns() - start, True)
+            try:
+                await self.on_error(event_name, *args, **kwargs)
+            except asyncio.CancelledError:
+                pass
+            return
+        metrics.observe('listener', event_name, cog, time.perf_counter_ns() - start)
+    
     async def _sync_commands(self):
         """Synchronise les commandes slash"""
         try:
@@ -169,6 +303,14 @@ class DiscordBot(commands.Bot):
         )
         await self.change_presence(activity=activity)
         
+        # Départs survenus pendant l'arrêt: `members` les conserve, pas les classements
+        pruned = sum(
+            db_manager.leaderboard.prune(guild.id, {m.id for m in guild.members})
+            for guild in self.guilds if guild.chunked
+        )
+        if pruned:
+            logger.info(f"🏆 {pruned} entrée(s) de membres partis retirée(s) des classements")
+        
         bot_logger.logger.info("Bot démarré avec succès")
     
     async def on_guild_join(self, guild):
@@ -177,12 +319,13 @@ class DiscordBot(commands.Bot):
         
         # Initialiser les données du serveur en base
         try:
-            async with aiosqlite.connect(db_manager.db_path) as db:
-                await db.execute("""
-                    INSERT OR IGNORE INTO guilds (id, name, owner_id)
-                    VALUES (?, ?, ?)
-                """, (guild.id, guild.name, guild.owner_id))
-                await db.commit()
+            inserted, _ = await db_manager.writer.execute("""
+                INSERT OR IGNORE INTO guilds (id, name, owner_id)
+                VALUES (?, ?, ?)
+            """, (guild.id, guild.name, guild.owner_id))
+            # Même règle que le déclencheur de stats_counters: seul un nouveau serveur compte
+            if inserted:
+                event_bus.publish(event_bus.STATS_DELTA, {'guilds': 1})
         except Exception as e:
             logger.error(f"Erreur initialisation serveur {guild.id}: {e}")
         
@@ -200,14 +343,15 @@ class DiscordBot(commands.Bot):
         
         logger.debug(f"👋 {member} a rejoint {member.guild.name}")
         
+        # Un membre qui revient retrouve sa place dans les classements
+        try:
+            await db_manager.restore_leaderboard_member(member.guild.id, member.id)
+        except Exception as e:
+            logger.error(f"Erreur classement member_join: {e}")
+        
         # Log en base
         try:
-            async with aiosqlite.connect(db_manager.db_path) as db:
-                await db.execute("""
-                    INSERT INTO activity_logs (guild_id, user_id, action_type, action_data)
-                    VALUES (?, ?, ?, ?)
-                """, (member.guild.id, member.id, "MEMBER_JOIN", f"Rejoint {member.guild.name}"))
-                await db.commit()
+            await db_manager.log_activity(member.guild.id, member.id, "MEMBER_JOIN", f"Rejoint {member.guild.name}")
         except Exception as e:
             logger.error(f"Erreur log member_join: {e}")
     
@@ -218,17 +362,25 @@ class DiscordBot(commands.Bot):
         
         logger.debug(f"👋 {member} a quitté {member.guild.name}")
         
+        # Les classements ne listent que les membres présents
+        db_manager.leaderboard.remove_member(member.guild.id, member.id)
+        
         # Log en base
         try:
-            async with aiosqlite.connect(db_manager.db_path) as db:
-                await db.execute("""
-                    INSERT INTO activity_logs (guild_id, user_id, action_type, action_data)
-                    VALUES (?, ?, ?, ?)
-                """, (member.guild.id, member.id, "MEMBER_LEAVE", f"Quitté {member.guild.name}"))
-                await db.commit()
+            await db_manager.log_activity(member.guild.id, member.id, "MEMBER_LEAVE", f"Quitté {member.guild.name}")
         except Exception as e:
             logger.error(f"Erreur log member_leave: {e}")
     
+    async def on_command_completion(self, ctx):
+        """Commande préfixée réussie: compteur du tableau de bord"""
+        if self.database_ready:
+            await db_manager.record_command()
+    
+    async def on_app_command_completion(self, interaction, command):
+        """Commande slash réussie: compteur du tableau de bord"""
+        if self.database_ready:
+            await db_manager.record_command()
+    
     async def on_message(self, message):
         """Événement de message"""
         # Ignorer les bots
@@ -238,37 +390,35 @@ class DiscordBot(commands.Bot):
         # Traiter les commandes
         await self.process_commands(message)
         
-        # Pas d'XP/économie en DM
-        if not message.guild:
+        # Automod, AFK, auto-réactions, XP... : un seul passage par message de serveur
+        if message.guild:
+            await self.message_pipeline.process(message)
+    
+    async def _xp_stage(self, ctx: MessageContext):
+        """Étape du pipeline: gain d'XP pour l'activité"""
+        if not (Config.ENABLE_ECONOMY and self.database_ready):
             return
         
-        # Gain d'XP pour l'activité (si le module économie est chargé)
-        if Config.ENABLE_ECONOMY and self.database_ready:
-            try:
-                # Importer dynamiquement pour éviter les imports circulaires
-                from database import user_manager
-                
-                # S'assurer que l'utilisateur existe
-                await user_manager.get_or_create_user(message.author.id, message.author.display_name)
-                
-                # Ajouter de l'XP (1-5 points par message, max 1 fois par minute)
-                xp_gain = min(len(message.content) // 10, Config.MAX_XP_PER_MESSAGE)
-                if xp_gain > 0:
-                    result = await user_manager.add_xp(message.author.id, message.guild.id, xp_gain)
-                    
-                    # Notifier si montée de niveau
-                    if result['level_up']:
-                        embed = discord.Embed(
-                            title="🎉 Montée de niveau !",
-                            description=f"{message.author.mention} est maintenant niveau **{result['new_level']}** !",
-                            color=discord.Color.gold()
-                        )
-                        await message.channel.send(embed=embed, delete_after=10)
-                        
-                        bot_logger.logger.info(f"Level up: {message.author.id} reached level {result['new_level']}")
+        # Ajouter de l'XP (1-5 points par message, max 1 fois par minute)
+        # L'accumulateur travaille en mémoire et écrit en base par lots
+        xp_gain = min(len(ctx.content) // 10, Config.MAX_XP_PER_MESSAGE)
+        if xp_gain <= 0:
+            return
+        
+        result = await xp_accumulator.add_xp(
+            ctx.author_id, ctx.guild_id, xp_gain, ctx.author.display_name
+        )
+        
+        # Notifier si montée de niveau
+        if result and result['level_up']:
+            embed = discord.Embed(
+                title="🎉 Montée de niveau !",
+                description=f"{ctx.author.mention} est maintenant niveau **{result['new_level']}** !",
+                color=discord.Color.gold()
+            )
+            await ctx.channel.send(embed=embed, delete_after=10)
             
-            except Exception as e:
-                logger.error(f"Erreur traitement XP: {e}")
+            bot_logger.logger.info(f"Level up: {ctx.author_id} reached level {result['new_level']}")
     
     async def on_command_error(self, ctx, error):
         """Gestionnaire d'erreurs des commandes"""
@@ -323,7 +473,18 @@ class DiscordBot(commands.Bot):
     async def close(self):
         """Nettoyage à la fermeture"""
         logger.info("🛑 Arrêt du bot...")
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+            self._metrics_task = None
+        if self.web_admin is not None:
+            await self.web_admin.stop()
+            self.web_admin = None
         await super().close()
+        await loop_watchdog.stop()
+        await rate_limiter.stop()
+        await scheduler.stop()
+        await xp_accumulator.stop()
+        await db_manager.close()
 
 # Commandes globales (non dans un cog)
 class GlobalCommands(commands.Cog):
@@ -428,6 +589,77 @@ class GlobalCommands(commands.Cog):
         
         await interaction.response.send_message(embed=embed)
 
+    @discord.app_commands.command(name="perf", description="Latences des commandes, listeners et accès base")
+    @require_permissions("admin")
+    async def perf(self, interaction: discord.Interaction, categorie: Optional[str] = None, limite: int = 10):
+        """Métriques de performance
+        
+        Args:
+            categorie: 'slash', 'prefix', 'listener', 'db', 'task' ou 'loop' (toutes par défaut)
+            limite: Nombre d'entrées affichées (par p99 décroissant)
+        """
+        categorie = categorie.lower() if categorie else None
+        limite = max(1, min(limite, 25))
+        
+        rows = [row for row in metrics.summaries(categorie) if row['count']]
+        rows.sort(key=lambda row: row['p99_ms'], reverse=True)
+        
+        embed = discord.Embed(
+            title="⏱️ Performances",
+            description=f"{len(rows)} métrique(s){f' de type `{categorie}`' if categorie else ''} - tri par p99",
+            color=discord.Color.blurple()
+        )
+        
+        if rows:
+            lines = [
+                f"`{row['kind']}` **{row['name']}** ({row['cog']}) - {row['count']} appels, "
+                f"p50 {row['p50_ms']:.1f} / p95 {row['p95_ms']:.1f} / p99 {row['p99_ms']:.1f} ms"
+                + (f", ❌ {row['errors']}" if row['errors'] else "")
+                for row in rows[:limite]
+            ]
+            embed.add_field(name="🐢 Plus lents", value="\n".join(lines)[:1024], inline=False)
+            
+            errors = sorted((row for row in rows if row['errors']), key=lambda row: row['errors'], reverse=True)
+            if errors:
+                embed.add_field(
+                    name="❌ Erreurs",
+                    value="\n".join(f"**{row['name']}**: {row['errors']}/{row['count']}" for row in errors[:5]),
+                    inline=False
+                )
+        else:
+            embed.add_field(name="📭 Aucune mesure", value="Aucune exécution enregistrée pour l'instant.", inline=False)
+        
+        caches = db_manager.cache_stats()
+        embed.add_field(
+            name="💾 Caches",
+            value="\n".join(f"{name}: {stats['hit_rate']:.0%} ({stats['size']}/{stats['max_size']})" for name, stats in caches.items()),
+            inline=True
+        )
+        
+        pipeline = self.bot.message_pipeline.stats()
+        embed.add_field(
+            name="📨 Pipeline",
+            value=f"{pipeline['messages']} messages\n{pipeline['avg_ms']:.2f} ms en moyenne",
+            inline=True
+        )
+        
+        sched = scheduler.stats()
+        embed.add_field(
+            name="⏰ Planificateur",
+            value=f"{sched['pending']} en attente\nretard max {sched['max_lateness']:.1f}s",
+            inline=True
+        )
+        
+        loop = loop_watchdog.stats()
+        loop_value = (f"p50 {loop['p50_ms']:.1f} / p99 {loop['p99_ms']:.1f} ms, max {loop['max_lag_ms']:.0f} ms\n"
+                      f"{loop['late_ticks']} blocage(s) > {loop['threshold_ms']:.0f} ms")
+        if loop_watchdog.samples:
+            last = loop_watchdog.samples[-1]
+            loop_value += f"\nDernier: `{last.location[:150]}` ({last.task[:60]})"
+        embed.add_field(name="🩺 Boucle asyncio", value=loop_value[:1024], inline=False)
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
 async def main():
     """Fonction principale"""
     try:
@@ -1,13 +1,17 @@
 """
 Module de configuration avancée du bot
 """
+import json
 import discord
 from discord.ext import commands
 from discord import app_commands
 from typing import Optional
 
+from config import Config
+from database import db_manager
 from utils.logger import bot_logger
 from utils.security import require_permissions
+from utils.spam import spam_tracker, SpamThresholds
 
 class ConfigurationCog(commands.Cog):
     """Configuration du bot"""
@@ -26,7 +30,34 @@ class ConfigurationCog(commands.Cog):
     @app_commands.command(name="prefix", description="Change le préfixe")
     @require_permissions("admin")
     async def prefix(self, interaction: discord.Interaction, nouveau: str):
-        await interaction.response.send_message(f"✅ Préfixe changé: {nouveau}")
+        """Change les préfixes du serveur
+
+        Args:
+            nouveau: Un ou plusieurs préfixes séparés par des espaces ('reset' pour revenir au défaut)
+        """
+        if not interaction.guild:
+            await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
+            return
+
+        prefixes = [Config.COMMAND_PREFIX] if nouveau.strip().lower() == "reset" else nouveau.split()
+        try:
+            prefixes = await db_manager.set_guild_prefixes(
+                interaction.guild.id, prefixes, interaction.guild.name, interaction.guild.owner_id
+            )
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+            return
+
+        description = " ".join(f"`{p}`" for p in prefixes)
+        if Config.MENTION_PREFIX and self.bot.user:
+            description += f" ou {self.bot.user.mention}"
+        embed = discord.Embed(
+            title="✅ Préfixe changé",
+            description=description,
+            color=discord.Color.green()
+        )
+        await interaction.response.send_message(embed=embed)
+        bot_logger.logger.info(f"Préfixes de {interaction.guild.id} changés: {prefixes}")
 
     @app_commands.command(name="language", description="Change la langue")
     @require_permissions("admin")
@@ -145,8 +176,63 @@ class ConfigurationCog(commands.Cog):
 
     @app_commands.command(name="antispam", description="Configure l'anti-spam")
     @require_permissions("admin")
-    async def antispam(self, interaction: discord.Interaction, activer: bool):
-        await interaction.response.send_message(f"🛡️ Anti-spam: {'activé' if activer else 'désactivé'}")
+    async def antispam(self, interaction: discord.Interaction, activer: bool,
+                       messages: Optional[int] = None,
+                       secondes: Optional[int] = None,
+                       timeout_minutes: Optional[int] = None):
+        """Configure l'anti-spam du serveur
+
+        Args:
+            activer: Active ou désactive la détection du spam
+            messages: Nombre de messages déclenchant la sanction (2-50)
+            secondes: Fenêtre de temps en secondes (1-300)
+            timeout_minutes: Durée du timeout appliqué (1-1440)
+        """
+        if not interaction.guild:
+            await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
+            return
+
+        current = spam_tracker.thresholds(interaction.guild.id)
+        thresholds = SpamThresholds(
+            enabled=activer,
+            max_messages=messages if messages is not None else current.max_messages,
+            window=float(secondes) if secondes is not None else current.window,
+            timeout_minutes=timeout_minutes if timeout_minutes is not None else current.timeout_minutes
+        )
+        if not (2 <= thresholds.max_messages <= 50 and 1 <= thresholds.window <= 300
+                and 1 <= thresholds.timeout_minutes <= 1440):
+            await interaction.response.send_message(
+                "❌ Valeurs invalides: messages 2-50, secondes 1-300, timeout 1-1440 minutes.",
+                ephemeral=True
+            )
+            return
+
+        await db_manager.writer.execute("""
+            INSERT INTO guilds (id, name, owner_id, settings)
+            VALUES (?, ?, ?, json_object('antispam', json(?)))
+            ON CONFLICT(id) DO UPDATE SET
+                settings = json_set(COALESCE(guilds.settings, '{}'), '$.antispam', json(?))
+        """, (interaction.guild.id, interaction.guild.name, interaction.guild.owner_id,
+              json.dumps(thresholds.to_dict()), json.dumps(thresholds.to_dict())))
+        spam_tracker.set_thresholds(interaction.guild.id, thresholds)
+
+        embed = discord.Embed(
+            title="🛡️ Anti-spam",
+            description=f"Anti-spam {'activé' if activer else 'désactivé'}",
+            color=discord.Color.green() if activer else discord.Color.red()
+        )
+        if activer:
+            embed.add_field(
+                name="Seuil",
+                value=f"{thresholds.max_messages} messages en {thresholds.window:g}s",
+                inline=True
+            )
+            embed.add_field(name="Sanction", value=f"Timeout {thresholds.timeout_minutes} min", inline=True)
+        await interaction.response.send_message(embed=embed)
+        bot_logger.moderation_action(
+            interaction.guild.id, interaction.user.id, 0, "ANTISPAM",
+            f"{'activé' if activer else 'désactivé'} ({thresholds.max_messages} msg/{thresholds.window:g}s)"
+        )
 
     @app_commands.command(name="antilink", description="Configure l'anti-lien")
     @require_permissions("admin")
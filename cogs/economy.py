@@ -11,8 +11,9 @@ from discord.ext import commands, tasks
 from discord import app_commands
 
 from config import Config
-from database import user_manager, economy_manager
+from database import db_manager, user_manager, economy_manager
 from utils.logger import bot_logger
+from utils.leaderboard import leaderboard_embed
 from utils.security import require_permissions, rate_limit, input_validator
 
 class EconomyCog(commands.Cog):
@@ -306,8 +307,16 @@ class EconomyCog(commands.Cog):
         
         if success:
             stolen = min(random.randint(10, 100), target_balance // 2)
-            await economy_manager.add_coins(target_id, interaction.guild.id, -stolen, f"Volé par {interaction.user}")
-            await economy_manager.add_coins(user_id, interaction.guild.id, stolen, f"Vol de {cible}")
+            # Débit et crédit dans la même transaction (aucun découvert possible)
+            result = await economy_manager.transfer(
+                target_id, user_id, interaction.guild.id, stolen, f"Vol de {cible} par {interaction.user}"
+            )
+            if result is None:
+                await interaction.response.send_message(
+                    f"❌ {cible.mention} n'a plus assez de pièces à voler !",
+                    ephemeral=True
+                )
+                return
             
             embed = discord.Embed(
                 title="💰 Vol réussi !",
@@ -320,7 +329,9 @@ class EconomyCog(commands.Cog):
             )
         else:
             fine = min(random.randint(50, 150), robber_balance // 3)
-            await economy_manager.add_coins(user_id, interaction.guild.id, -fine, f"Échec vol de {cible}")
+            await economy_manager.apply_ledger(interaction.guild.id, [
+                (user_id, -fine, f"Échec vol de {cible}")
+            ])
             
             embed = discord.Embed(
                 title="🚨 Vol échoué !",
@@ -355,18 +366,20 @@ class EconomyCog(commands.Cog):
             await interaction.response.send_message(f"❌ {e}", ephemeral=True)
             return
         
-        sender_balance = await economy_manager.get_balance(interaction.user.id, interaction.guild.id)
+        # Vérification du solde, débit et crédit dans une seule transaction
+        result = await economy_manager.transfer(
+            interaction.user.id, destinataire.id, interaction.guild.id, montant,
+            f"Don de {interaction.user} à {destinataire}"
+        )
         
-        if sender_balance < montant:
+        if result is None:
+            sender_balance = await economy_manager.get_balance(interaction.user.id, interaction.guild.id)
             await interaction.response.send_message(
                 f"❌ Tu n'as que {sender_balance} pièces ! Tu ne peux pas donner {montant} pièces.",
                 ephemeral=True
             )
             return
         
-        await economy_manager.add_coins(interaction.user.id, interaction.guild.id, -montant, f"Don à {destinataire}")
-        await economy_manager.add_coins(destinataire.id, interaction.guild.id, montant, f"Don de {interaction.user}")
-        
         embed = discord.Embed(
             title="💝 Don effectué",
             description=f"{interaction.user.mention} a donné **{montant}** pièces à {destinataire.mention} !",
@@ -382,11 +395,22 @@ class EconomyCog(commands.Cog):
         )
     
     @app_commands.command(name="leaderboard", description="Affiche le classement des plus riches")
-    async def leaderboard(self, interaction: discord.Interaction):
+    async def leaderboard(self, interaction: discord.Interaction, page: int = 1):
         """Classement économique du serveur"""
-        # Cette fonction nécessiterait une requête à la base de données
-        # pour récupérer le top des utilisateurs par pièces
-        await interaction.response.send_message("🚧 Fonctionnalité en développement...")
+        if not interaction.guild:
+            await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
+            return
+        
+        embed = leaderboard_embed(
+            interaction.guild, db_manager.leaderboard, 'coins', "💰 Classement des plus riches",
+            page=page, formatter=lambda coins: f"{coins:,} pièces"
+        )
+        
+        ranked = db_manager.leaderboard.rank(interaction.guild.id, 'coins', interaction.user.id)
+        if ranked:
+            embed.add_field(name="📍 Ta position", value=f"#{ranked[0]} avec {ranked[1]:,} pièces", inline=False)
+        
+        await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="shop", description="Affiche la boutique du serveur")
     async def shop(self, interaction: discord.Interaction):
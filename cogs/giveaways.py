@@ -2,7 +2,7 @@
 Système de giveaways (concours) pour le bot Discord
 """
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
 from typing import Optional
 import aiosqlite
@@ -13,6 +13,7 @@ from config import Config
 from database import db_manager
 from utils.logger import bot_logger
 from utils.security import require_permissions, input_validator
+from utils.scheduler import scheduler, ScheduledJob
 
 class GiveawaysCog(commands.Cog):
     """Système de giveaways/concours"""
@@ -20,39 +21,38 @@ class GiveawaysCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.giveaway_emoji = "🎉"
-        self.check_giveaways.start()
 
     async def cog_load(self):
         """Chargement du cog"""
+        await scheduler.register("giveaway", self._on_giveaway_due, self._load_pending_giveaways)
         bot_logger.logger.info("Module giveaways chargé")
 
     def cog_unload(self):
         """Déchargement du cog"""
-        self.check_giveaways.cancel()
+        scheduler.unregister("giveaway")
 
-    @tasks.loop(seconds=30)
-    async def check_giveaways(self):
-        """Vérifie et termine les giveaways expirés"""
-        try:
-            async with aiosqlite.connect(db_manager.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                now = datetime.now().isoformat()
-
-                async with db.execute("""
-                    SELECT * FROM giveaways
-                    WHERE end_time <= ? AND ended = 0
-                """, (now,)) as cursor:
-                    giveaways = await cursor.fetchall()
-
-                for giveaway in giveaways:
-                    await self.end_giveaway(giveaway)
-
-        except Exception as e:
-            bot_logger.logger.error(f"Erreur vérification giveaways: {e}")
+    async def _load_pending_giveaways(self):
+        """Échéances des giveaways en cours (index idx_giveaways_pending)"""
+        async with db_manager.acquire() as db:
+            async with db.execute("""
+                SELECT id, end_time FROM giveaways
+                WHERE ended = 0 AND end_time IS NOT NULL
+                ORDER BY end_time
+            """) as cursor:
+                return [(row[0], row[1], None) for row in await cursor.fetchall()]
+
+    async def _on_giveaway_due(self, job: ScheduledJob):
+        """Termine un giveaway arrivé à échéance"""
+        async with db_manager.acquire() as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute("""
+                SELECT * FROM giveaways WHERE id = ? AND ended = 0
+            """, (job.key,)) as cursor:
+                giveaway = await cursor.fetchone()
 
-    @check_giveaways.before_loop
-    async def before_check_giveaways(self):
-        await self.bot.wait_until_ready()
+        # end_giveaway emprunte sa propre connexion au pool
+        if giveaway:
+            await self.end_giveaway(giveaway)
 
     async def end_giveaway(self, giveaway):
         """Termine un giveaway et choisit les gagnants"""
@@ -117,14 +117,12 @@ class GiveawaysCog(commands.Cog):
                 await channel.send(congrats_msg)
 
             # Marquer comme terminé dans la base de données
-            async with aiosqlite.connect(db_manager.db_path) as db:
-                winner_ids = "|".join([str(w.id) for w in winners])
-                await db.execute("""
-                    UPDATE giveaways
-                    SET ended = 1, winner_ids = ?
-                    WHERE id = ?
-                """, (winner_ids, giveaway['id']))
-                await db.commit()
+            winner_ids = "|".join([str(w.id) for w in winners])
+            await db_manager.writer.execute("""
+                UPDATE giveaways
+                SET ended = 1, winner_ids = ?
+                WHERE id = ?
+            """, (winner_ids, giveaway['id']))
 
             bot_logger.logger.info(f"Giveaway terminé: {giveaway['prize']} - {len(winners)} gagnant(s)")
 
@@ -198,14 +196,13 @@ class GiveawaysCog(commands.Cog):
         message = await interaction.channel.send(embed=embed)
         await message.add_reaction(self.giveaway_emoji)
 
-        # Sauvegarder dans la base de données
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            await db.execute("""
-                INSERT INTO giveaways (guild_id, channel_id, message_id, prize, winners_count, end_time, host_id, ended)
-                VALUES (?, ?, ?, ?, ?, ?, ?, 0)
-            """, (interaction.guild.id, message.channel.id, message.id, prix, gagnants,
-                  end_time.isoformat(), interaction.user.id))
-            await db.commit()
+        # Sauvegarder dans la base de données puis planifier la fin
+        _, giveaway_id = await db_manager.writer.execute("""
+            INSERT INTO giveaways (guild_id, channel_id, message_id, prize, winners_count, end_time, host_id, ended)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+        """, (interaction.guild.id, message.channel.id, message.id, prix, gagnants,
+              end_time.isoformat(), interaction.user.id))
+        scheduler.schedule("giveaway", giveaway_id, end_time)
 
         bot_logger.logger.info(f"Giveaway créé par {interaction.user.id}: {prix}")
 
@@ -224,7 +221,7 @@ class GiveawaysCog(commands.Cog):
             return
 
         # Récupérer le giveaway
-        async with aiosqlite.connect(db_manager.db_path) as db:
+        async with db_manager.acquire() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT * FROM giveaways
@@ -237,6 +234,7 @@ class GiveawaysCog(commands.Cog):
             return
 
         await interaction.response.send_message("✅ Terminaison du giveaway en cours...", ephemeral=True)
+        scheduler.cancel("giveaway", giveaway['id'])
         await self.end_giveaway(giveaway)
 
     @app_commands.command(name="giveaway_reroll", description="Retire de nouveaux gagnants")
@@ -254,7 +252,7 @@ class GiveawaysCog(commands.Cog):
             return
 
         # Récupérer le giveaway
-        async with aiosqlite.connect(db_manager.db_path) as db:
+        async with db_manager.acquire() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT * FROM giveaways
@@ -2,11 +2,8 @@
 Cog contenant toutes les commandes de l'ancien système pour préserver les 51 commandes slash
 """
 import os
-import json
 import random
 import asyncio
-import datetime
-from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 
 import discord
@@ -17,6 +14,8 @@ from config import Config
 from database import db_manager
 from utils.logger import bot_logger
 from utils.security import require_permissions, rate_limit, input_validator
+from utils.pipeline import MessageContext
+from utils.matcher import content_matcher
 
 try:
     import feedparser
@@ -28,46 +27,27 @@ class LegacyCommandsCog(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
-        self.quotes_store = {}
-        self.suggestions_store = {}
-        self.tags_store = {}
-        self.auto_react_store = {}
-        self.afk_store = {}
+        # Citations, suggestions, tags, auto-réactions et AFK (data.json importé au démarrage)
+        self.store = db_manager.community
         
     async def cog_load(self):
         """Chargement du cog"""
         bot_logger.logger.info("Module commandes legacy chargé")
-        await self._load_legacy_data()
-        
-    async def _load_legacy_data(self):
-        """Charge les données legacy depuis data.json si présent"""
-        try:
-            data_path = Path("data.json")
-            if data_path.exists():
-                with open(data_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                self.quotes_store = data.get("quotes_store", {})
-                self.suggestions_store = data.get("suggestions_store", {})
-                self.tags_store = data.get("tags_store", {})
-                self.auto_react_store = data.get("auto_react_store", {})
-                self.afk_store = data.get("afk_store", {})
-        except Exception as e:
-            bot_logger.logger.warning(f"Erreur chargement données legacy: {e}")
+        if not self.store.loaded:
+            await self.store.load()
+        for guild_id in self.store.auto_reaction_guilds():
+            self._sync_auto_reacts(guild_id)
+        self.bot.message_pipeline.register("afk_autoreact", self._afk_autoreact_stage)
     
-    async def _save_legacy_data(self):
-        """Sauvegarde les données legacy"""
-        try:
-            data = {
-                "quotes_store": self.quotes_store,
-                "suggestions_store": self.suggestions_store,
-                "tags_store": self.tags_store,
-                "auto_react_store": self.auto_react_store,
-                "afk_store": self.afk_store,
-            }
-            with open("data.json", 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            bot_logger.logger.error(f"Erreur sauvegarde données legacy: {e}")
+    async def cog_unload(self):
+        """Déchargement du cog"""
+        self.bot.message_pipeline.unregister("afk_autoreact")
+    
+    def _sync_auto_reacts(self, guild_id: int):
+        """Recompile les déclencheurs d'auto-réaction d'un serveur (après modification)"""
+        content_matcher.set_patterns(
+            guild_id, content_matcher.AUTOREACT, self.store.auto_reactions(guild_id)
+        )
 
     # === COMMANDES D'INFORMATION ===
     
@@ -215,14 +195,11 @@ class LegacyCommandsCog(commands.Cog):
         if not interaction.guild:
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.")
             return
-        guild_id = str(interaction.guild.id)
-        quotes = self.quotes_store.setdefault(guild_id, [])
-        quotes.append(citation)
-        await self._save_legacy_data()
+        number = await self.store.add_quote(interaction.guild.id, citation, interaction.user.id)
         
         embed = discord.Embed(
             title=" Citation ajoutée",
-            description=f"Citation #{len(quotes)} ajoutée avec succès !",
+            description=f"Citation #{number} ajoutée avec succès !",
             color=discord.Color.green()
         )
         
@@ -235,21 +212,20 @@ class LegacyCommandsCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.")
             return
             
-        guild_id = str(interaction.guild.id)
-        quotes = self.quotes_store.get(guild_id, [])
+        quotes = self.store.quotes(interaction.guild.id)
         
         if not quotes:
             await interaction.response.send_message("❌ Aucune citation enregistrée. Utilisez `/quote_add` pour en ajouter !")
             return
             
-        quote_text = random.choice(quotes)
+        index = random.randrange(len(quotes))
         
         embed = discord.Embed(
             title="📜 Citation Aléatoire",
-            description=f"*\"{quote_text}\"*",
+            description=f"*\"{quotes[index].content}\"*",
             color=discord.Color.blue()
         )
-        embed.set_footer(text=f"Citation {quotes.index(quote_text) + 1} sur {len(quotes)}")
+        embed.set_footer(text=f"Citation {index + 1} sur {len(quotes)}")
         
         await interaction.response.send_message(embed=embed)
 
@@ -262,22 +238,11 @@ class LegacyCommandsCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.")
             return
             
-        guild_id = str(interaction.guild.id)
-        suggestions = self.suggestions_store.setdefault(guild_id, [])
-        
-        suggestion = {
-            "author_id": interaction.user.id,
-            "content": contenu,
-            "status": "open",
-            "timestamp": datetime.datetime.now().isoformat()
-        }
-        
-        suggestions.append(suggestion)
-        await self._save_legacy_data()
+        number = await self.store.add_suggestion(interaction.guild.id, interaction.user.id, contenu)
         
         embed = discord.Embed(
             title="💡 Suggestion soumise",
-            description=f"Suggestion #{len(suggestions)} ajoutée avec succès !",
+            description=f"Suggestion #{number} ajoutée avec succès !",
             color=discord.Color.green()
         )
         embed.add_field(name="Contenu", value=contenu, inline=False)
@@ -291,8 +256,7 @@ class LegacyCommandsCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.")
             return
             
-        guild_id = str(interaction.guild.id)
-        suggestions = self.suggestions_store.get(guild_id, [])
+        suggestions = self.store.suggestions(interaction.guild.id)
         
         if not suggestions:
             await interaction.response.send_message("❌ Aucune suggestion enregistrée.")
@@ -301,10 +265,10 @@ class LegacyCommandsCog(commands.Cog):
         embed = discord.Embed(title="📋 Liste des suggestions", color=discord.Color.blue())
         
         for i, s in enumerate(suggestions[:10], 1):  # Limiter à 10 pour éviter les messages trop longs
-            status_emoji = "🟢" if s["status"] == "open" else "🔴"
+            status_emoji = "🟢" if s.status == "open" else "🔴"
             embed.add_field(
                 name=f"{status_emoji} Suggestion #{i}",
-                value=f"{s['content'][:100]}{'...' if len(s['content']) > 100 else ''}\n*Par <@{s['author_id']}>*",
+                value=f"{s.content[:100]}{'...' if len(s.content) > 100 else ''}\n*Par <@{s.author_id}>*",
                 inline=False
             )
             
@@ -321,15 +285,9 @@ class LegacyCommandsCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.")
             return
             
-        guild_id = str(interaction.guild.id)
-        suggestions = self.suggestions_store.get(guild_id, [])
-        
-        if not (1 <= index <= len(suggestions)):
+        if not await self.store.set_suggestion_status(interaction.guild.id, index, "closed"):
             await interaction.response.send_message("❌ Index de suggestion invalide.")
             return
-            
-        suggestions[index - 1]["status"] = "closed"
-        await self._save_legacy_data()
         
         embed = discord.Embed(
             title="🔒 Suggestion fermée",
@@ -348,10 +306,7 @@ class LegacyCommandsCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.")
             return
             
-        guild_id = str(interaction.guild.id)
-        tags = self.tags_store.setdefault(guild_id, {})
-        tags[nom.lower()] = contenu
-        await self._save_legacy_data()
+        await self.store.set_tag(interaction.guild.id, nom.lower(), contenu, interaction.user.id)
         
         embed = discord.Embed(
             title="🏷️ Tag ajouté",
@@ -368,9 +323,7 @@ class LegacyCommandsCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.")
             return
             
-        guild_id = str(interaction.guild.id)
-        tags = self.tags_store.get(guild_id, {})
-        content = tags.get(nom.lower())
+        content = self.store.tag(interaction.guild.id, nom.lower())
         
         if not content:
             await interaction.response.send_message(f"❌ Tag **{nom}** introuvable.")
@@ -392,15 +345,9 @@ class LegacyCommandsCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.")
             return
             
-        guild_id = str(interaction.guild.id)
-        tags = self.tags_store.get(guild_id, {})
-        
-        if nom.lower() not in tags:
+        if not await self.store.remove_tag(interaction.guild.id, nom.lower()):
             await interaction.response.send_message(f"❌ Tag **{nom}** introuvable.")
             return
-            
-        del tags[nom.lower()]
-        await self._save_legacy_data()
         
         embed = discord.Embed(
             title="🗑️ Tag supprimé",
@@ -417,8 +364,7 @@ class LegacyCommandsCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.")
             return
             
-        guild_id = str(interaction.guild.id)
-        tags = self.tags_store.get(guild_id, {})
+        tags = self.store.tags(interaction.guild.id)
         
         if not tags:
             await interaction.response.send_message("❌ Aucun tag enregistré.")
@@ -443,10 +389,7 @@ class LegacyCommandsCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.")
             return
             
-        guild_id = str(interaction.guild.id)
-        afk_users = self.afk_store.setdefault(guild_id, {})
-        afk_users[str(interaction.user.id)] = raison
-        await self._save_legacy_data()
+        await self.store.set_afk(interaction.guild.id, interaction.user.id, raison)
         
         embed = discord.Embed(
             title="😴 Statut AFK activé",
@@ -463,14 +406,7 @@ class LegacyCommandsCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.")
             return
             
-        guild_id = str(interaction.guild.id)
-        afk_users = self.afk_store.get(guild_id, {})
-        user_id = str(interaction.user.id)
-        
-        if user_id in afk_users:
-            del afk_users[user_id]
-            await self._save_legacy_data()
-            
+        if await self.store.clear_afk(interaction.guild.id, interaction.user.id):
             embed = discord.Embed(
                 title="✅ Statut AFK retiré",
                 description="Tu n'es plus AFK.",
@@ -681,39 +617,35 @@ class LegacyCommandsCog(commands.Cog):
 
     # === ÉVÉNEMENTS ===
     
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Gestion des messages pour AFK et auto-react"""
-        if message.author.bot or not message.guild:
-            return
-            
-        guild_id = str(message.guild.id)
-        
+    async def _afk_autoreact_stage(self, ctx: MessageContext):
+        """Étape du pipeline: mentions d'utilisateurs AFK et auto-réactions"""
         # Vérifier AFK des mentions
-        afk_users = self.afk_store.get(guild_id, {})
-        for user in message.mentions:
-            user_id = str(user.id)
-            if user_id in afk_users:
-                try:
-                    embed = discord.Embed(
-                        title="😴 Utilisateur AFK",
-                        description=f"{user.mention} est AFK: {afk_users[user_id]}",
-                        color=discord.Color.orange()
-                    )
-                    await message.channel.send(embed=embed, delete_after=10)
-                except:
-                    pass
-        
-        # Auto-réactions
-        auto_reacts = self.auto_react_store.get(guild_id, {})
-        if message.content:
-            content_lower = message.content.lower()
-            for trigger, emoji in auto_reacts.items():
-                if trigger.lower() in content_lower:
+        afk_users = self.store.afk_users(ctx.guild_id)
+        if afk_users and ctx.mention_ids:
+            for user in ctx.mentions:
+                if user.id in afk_users:
                     try:
-                        await message.add_reaction(emoji)
+                        embed = discord.Embed(
+                            title="😴 Utilisateur AFK",
+                            description=f"{user.mention} est AFK: {afk_users[user.id]}",
+                            color=discord.Color.orange()
+                        )
+                        await ctx.channel.send(embed=embed, delete_after=10)
                     except:
                         pass
+        
+        # Auto-réactions (déclencheurs trouvés par le scan partagé du message)
+        if not self.store.auto_reactions(ctx.guild_id):
+            return
+        reacted = set()
+        for hit in ctx.matches_of(content_matcher.AUTOREACT):
+            if hit.value in reacted:
+                continue
+            reacted.add(hit.value)
+            try:
+                await ctx.message.add_reaction(hit.value)
+            except:
+                pass
 
 async def setup(bot):
     await bot.add_cog(LegacyCommandsCog(bot))
\ No newline at end of file
@@ -6,7 +6,12 @@ from discord.ext import commands
 from discord import app_commands
 from typing import Optional
 
+from database import db_manager, DatabaseManager
 from utils.logger import bot_logger
+from utils.leaderboard import leaderboard_embed
+
+def _format_level(xp: int) -> str:
+    return f"Niveau {DatabaseManager.calculate_level_from_xp(xp)} ({xp:,} XP)"
 
 class LevelingCog(commands.Cog):
     """Système de niveaux"""
@@ -23,19 +28,53 @@ class LevelingCog(commands.Cog):
 
     @app_commands.command(name="rank", description="Ton rang")
     async def rank(self, interaction: discord.Interaction, membre: Optional[discord.Member] = None):
-        await interaction.response.send_message("📊 Carte de rang")
+        if not interaction.guild:
+            await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
+            return
+        
+        membre = membre or interaction.user
+        ranked = db_manager.leaderboard.rank(interaction.guild.id, 'xp', membre.id)
+        if not ranked:
+            await interaction.response.send_message(f"📊 {membre.mention} n'est pas encore classé.", ephemeral=True)
+            return
+        
+        position, xp = ranked
+        level = DatabaseManager.calculate_level_from_xp(xp)
+        next_level_xp = DatabaseManager.calculate_xp_for_level(level + 1)
+        total = db_manager.leaderboard.size(interaction.guild.id, 'xp')
+        
+        embed = discord.Embed(title=f"📊 Rang de {membre.display_name}", color=discord.Color.blurple())
+        embed.add_field(name="🏆 Rang", value=f"#{position} / {total}")
+        embed.add_field(name="⭐ Niveau", value=str(level))
+        embed.add_field(name="✨ XP", value=f"{xp:,} / {next_level_xp:,}")
+        await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="xp", description="Ton XP")
     async def xp(self, interaction: discord.Interaction, membre: Optional[discord.Member] = None):
         await interaction.response.send_message("✨ Expérience")
 
     @app_commands.command(name="leaderboard_xp", description="Classement XP")
-    async def leaderboard_xp(self, interaction: discord.Interaction):
-        await interaction.response.send_message("🏆 Top XP")
+    async def leaderboard_xp(self, interaction: discord.Interaction, page: int = 1):
+        if not interaction.guild:
+            await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
+            return
+        embed = leaderboard_embed(
+            interaction.guild, db_manager.leaderboard, 'xp', "🏆 Top XP",
+            page=page, formatter=lambda xp: f"{xp:,} XP"
+        )
+        await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="leaderboard_level", description="Classement niveaux")
-    async def leaderboard_level(self, interaction: discord.Interaction):
-        await interaction.response.send_message("🏆 Top niveaux")
+    async def leaderboard_level(self, interaction: discord.Interaction, page: int = 1):
+        if not interaction.guild:
+            await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
+            return
+        # Le niveau est une fonction croissante de l'XP: même ordre que le classement XP
+        embed = leaderboard_embed(
+            interaction.guild, db_manager.leaderboard, 'xp', "🏆 Top niveaux",
+            page=page, formatter=_format_level
+        )
+        await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="setlevel", description="Définit un niveau")
     @app_commands.checks.has_permissions(administrator=True)
@@ -5,7 +5,6 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from typing import Optional
-import aiosqlite
 from datetime import datetime
 
 from config import Config
@@ -25,21 +24,16 @@ class LoggingCog(commands.Cog):
 
     async def send_log(self, guild_id: int, embed: discord.Embed):
         """Envoie un log dans le canal configuré"""
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT log_channel_id FROM logging_config WHERE guild_id = ?
-            """, (guild_id,)) as cursor:
-                config = await cursor.fetchone()
-
-        if not config or not config['log_channel_id']:
+        # Configuration en mémoire: aucune lecture en base par événement
+        config = db_manager.settings.logging_config(guild_id)
+        if not config or not config.log_channel_id:
             return
 
         guild = self.bot.get_guild(guild_id)
         if not guild:
             return
 
-        channel = guild.get_channel(config['log_channel_id'])
+        channel = guild.get_channel(config.log_channel_id)
         if not channel:
             return
 
@@ -56,12 +50,7 @@ class LoggingCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
             return
 
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            await db.execute("""
-                INSERT OR REPLACE INTO logging_config (guild_id, log_channel_id)
-                VALUES (?, ?)
-            """, (interaction.guild.id, channel.id))
-            await db.commit()
+        await db_manager.settings.set_log_channel(interaction.guild.id, channel.id)
 
         embed = discord.Embed(
             title="✅ Logs configurés",
@@ -270,11 +259,7 @@ class LoggingCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
             return
 
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            await db.execute("""
-                DELETE FROM logging_config WHERE guild_id = ?
-            """, (interaction.guild.id,))
-            await db.commit()
+        await db_manager.settings.set_log_channel(interaction.guild.id, None)
 
         embed = discord.Embed(
             title="✅ Logs désactivés",
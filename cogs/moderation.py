@@ -2,11 +2,13 @@
 Système de modération avancé avec automod pour le bot Discord
 """
 import re
+import json
+import time
 import asyncio
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Union
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
 
 from config import Config
@@ -16,6 +18,10 @@ from utils.security import (
     require_permissions, rate_limit, input_validator, 
     permission_manager, content_filter
 )
+from utils.pipeline import MessagePipeline, MessageContext
+from utils.matcher import content_matcher, MatchHit
+from utils.scheduler import scheduler, ScheduledJob
+from utils.spam import spam_tracker, SpamThresholds
 
 class ModerationCog(commands.Cog):
     """Commandes et système de modération avancé"""
@@ -23,49 +29,48 @@ class ModerationCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.automod_enabled = {}  # guild_id: bool
-        self.spam_tracker = {}     # user_id: [timestamps]
-        self.muted_users = {}      # guild_id: {user_id: unmute_time}
-        self.automod_cleanup.start()
         
     async def cog_load(self):
         """Chargement du cog"""
+        self.bot.message_pipeline.register("automod", self._automod_stage, MessagePipeline.PRIORITY_AUTOMOD)
+        await scheduler.register("unmute", self._on_unmute_due, self._load_pending_unmutes)
+        await self._load_spam_thresholds()
         bot_logger.logger.info("Module modération chargé")
         
     def cog_unload(self):
         """Déchargement du cog"""
-        self.automod_cleanup.cancel()
+        self.bot.message_pipeline.unregister("automod")
+        scheduler.unregister("unmute")
     
-    @tasks.loop(minutes=1)
-    async def automod_cleanup(self):
-        """Nettoie les données d'automod expirées"""
-        now = datetime.now()
-        
-        # Nettoyer le tracker de spam
-        for user_id in list(self.spam_tracker.keys()):
-            cutoff = now - timedelta(minutes=1)
-            self.spam_tracker[user_id] = [
-                ts for ts in self.spam_tracker[user_id] if ts > cutoff
-            ]
-            if not self.spam_tracker[user_id]:
-                del self.spam_tracker[user_id]
-        
-        # Démueter les utilisateurs automatiquement
-        for guild_id in list(self.muted_users.keys()):
-            guild = self.bot.get_guild(guild_id)
-            if not guild:
-                continue
-                
-            for user_id in list(self.muted_users[guild_id].keys()):
-                unmute_time = self.muted_users[guild_id][user_id]
-                if now >= unmute_time:
-                    member = guild.get_member(user_id)
-                    if member:
-                        await self.unmute_member(member, reason="Timeout automatique")
-                    del self.muted_users[guild_id][user_id]
+    async def _load_spam_thresholds(self):
+        """Charge les seuils anti-spam configurés par /antispam (guilds.settings)"""
+        try:
+            async with db_manager.acquire() as db:
+                async with db.execute("""
+                    SELECT id, json_extract(settings, '$.antispam') FROM guilds
+                    WHERE json_extract(settings, '$.antispam') IS NOT NULL
+                """) as cursor:
+                    async for guild_id, raw in cursor:
+                        spam_tracker.set_thresholds(guild_id, SpamThresholds.from_dict(json.loads(raw)))
+        except Exception as e:
+            bot_logger.logger.error(f"Erreur chargement seuils anti-spam: {e}")
     
-    @automod_cleanup.before_loop
-    async def before_automod_cleanup(self):
-        await self.bot.wait_until_ready()
+    async def _load_pending_unmutes(self):
+        """Fins de timeout enregistrées par /timeout (échues pendant un arrêt: exécutées au démarrage)"""
+        async with db_manager.acquire() as db:
+            async with db.execute("SELECT guild_id, user_id, until FROM pending_unmutes") as cursor:
+                return [((row[0], row[1]), row[2], None) for row in await cursor.fetchall()]
+    
+    async def _on_unmute_due(self, job: ScheduledJob):
+        """Fin d'un timeout planifiée par /timeout"""
+        guild_id, user_id = job.key
+        await db_manager.writer.execute("""
+            DELETE FROM pending_unmutes WHERE guild_id = ? AND user_id = ?
+        """, (guild_id, user_id))
+        guild = self.bot.get_guild(guild_id)
+        member = guild.get_member(user_id) if guild else None
+        if member:
+            await self.unmute_member(member, reason="Timeout automatique")
     
     # === COMMANDES DE MODÉRATION BASIQUES ===
     
@@ -126,6 +131,13 @@ class ModerationCog(commands.Cog):
                 delete_message_days=delete_days
             )
             
+            # Statut en base: totaux de guild_stats et pages d'administration
+            await db_manager.writer.execute("""
+                INSERT INTO members (user_id, guild_id, is_banned, ban_reason) VALUES (?, ?, TRUE, ?)
+                ON CONFLICT(user_id, guild_id) DO UPDATE SET is_banned = TRUE, ban_reason = excluded.ban_reason
+            """, (membre.id, membre.guild.id, raison))
+            db_manager.member_cache.invalidate((membre.guild.id, membre.id))
+            
             embed = discord.Embed(
                 title="🔨 Membre banni",
                 description=f"{membre.mention} a été banni",
@@ -163,6 +175,11 @@ class ModerationCog(commands.Cog):
             user = await self.bot.fetch_user(user_id)
             if interaction.guild:
                 await interaction.guild.unban(user, reason=f"{raison} | Par {interaction.user}")
+                await db_manager.writer.execute("""
+                    UPDATE members SET is_banned = FALSE, ban_reason = NULL
+                    WHERE user_id = ? AND guild_id = ?
+                """, (user_id_int, interaction.guild.id))
+                db_manager.member_cache.invalidate((interaction.guild.id, user_id_int))
             
             embed = discord.Embed(
                 title="✅ Utilisateur débanni",
@@ -223,6 +240,12 @@ class ModerationCog(commands.Cog):
             
             until = datetime.utcnow() + delta
             await membre.timeout(until, reason=f"{raison} | Par {interaction.user}")
+            unmute_at = time.time() + delta.total_seconds()
+            await db_manager.writer.execute("""
+                INSERT INTO pending_unmutes (guild_id, user_id, until) VALUES (?, ?, ?)
+                ON CONFLICT(guild_id, user_id) DO UPDATE SET until = excluded.until
+            """, (membre.guild.id, membre.id, unmute_at))
+            scheduler.schedule("unmute", (membre.guild.id, membre.id), unmute_at)
             
             embed = discord.Embed(
                 title="⏰ Membre en timeout",
@@ -255,6 +278,10 @@ class ModerationCog(commands.Cog):
         """Retire le timeout d'un membre"""
         try:
             await membre.timeout(None, reason=f"Timeout retiré par {interaction.user}")
+            scheduler.cancel("unmute", (membre.guild.id, membre.id))
+            await db_manager.writer.execute("""
+                DELETE FROM pending_unmutes WHERE guild_id = ? AND user_id = ?
+            """, (membre.guild.id, membre.id))
             
             embed = discord.Embed(
                 title="✅ Timeout retiré",
@@ -289,21 +316,19 @@ class ModerationCog(commands.Cog):
         try:
             raison = input_validator.sanitize_text(raison, 500)
             
-            # Ajouter l'avertissement en base
-            import aiosqlite
-            async with aiosqlite.connect(db_manager.db_path) as db:
-                await db.execute("""
-                    INSERT INTO warnings (guild_id, user_id, moderator_id, reason, active)
-                    VALUES (?, ?, ?, ?, TRUE)
-                """, ((interaction.guild.id if interaction.guild else 0),
-                      (membre.id if membre else 0),
-                      (interaction.user.id if interaction.user else 0),
-                      raison))
-                await db.commit()
+            # Ajouter l'avertissement en base (members.warnings suit par déclencheur)
+            await db_manager.writer.execute("""
+                INSERT INTO warnings (guild_id, user_id, moderator_id, reason, active)
+                VALUES (?, ?, ?, ?, TRUE)
+            """, ((interaction.guild.id if interaction.guild else 0),
+                  (membre.id if membre else 0),
+                  (interaction.user.id if interaction.user else 0),
+                  raison))
+            db_manager.member_cache.invalidate(((interaction.guild.id if interaction.guild else 0), membre.id))
             
             # Compter les avertissements
             import aiosqlite
-            async with aiosqlite.connect(db_manager.db_path) as db:
+            async with db_manager.acquire() as db:
                 async with db.execute("""
                     SELECT COUNT(*) FROM warnings
                     WHERE guild_id = ? AND user_id = ? AND active = TRUE
@@ -359,7 +384,7 @@ class ModerationCog(commands.Cog):
         """Affiche les avertissements d'un membre"""
         try:
             import aiosqlite
-            async with aiosqlite.connect(db_manager.db_path) as db:
+            async with db_manager.acquire() as db:
                 async with db.execute("""
                     SELECT reason, moderator_id, created_at FROM warnings
                     WHERE guild_id = ? AND user_id = ? AND active = TRUE
@@ -407,14 +432,12 @@ class ModerationCog(commands.Cog):
     async def clearwarnings(self, interaction: discord.Interaction, membre: discord.Member):
         """Efface les avertissements d'un membre"""
         try:
-            import aiosqlite
-            async with aiosqlite.connect(db_manager.db_path) as db:
-                await db.execute("""
-                    UPDATE warnings SET active = FALSE
-                    WHERE guild_id = ? AND user_id = ?
-                """, ((interaction.guild.id if interaction.guild else 0),
-                      (membre.id if membre else 0)))
-                await db.commit()
+            await db_manager.writer.execute("""
+                UPDATE warnings SET active = FALSE
+                WHERE guild_id = ? AND user_id = ? AND active = TRUE
+            """, ((interaction.guild.id if interaction.guild else 0),
+                  (membre.id if membre else 0)))
+            db_manager.member_cache.invalidate(((interaction.guild.id if interaction.guild else 0), membre.id))
             
             embed = discord.Embed(
                 title="🗑️ Avertissements effacés",
@@ -457,142 +480,140 @@ class ModerationCog(commands.Cog):
             0, "AUTOMOD", status
         )
     
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Surveillance automatique des messages"""
-        if message.author.bot or not message.guild:
-            return
+    async def _automod_stage(self, ctx: MessageContext):
+        """Étape du pipeline: surveillance automatique des messages
         
-        guild_id = message.guild.id
-        if not self.automod_enabled.get(guild_id, False):
+        Un message supprimé est abandonné: les étapes suivantes (XP...) ne le voient pas.
+        """
+        automod = self.automod_enabled.get(ctx.guild_id, False)
+        # L'anti-spam activé par /antispam (enregistré) s'applique même sans l'automod
+        if not (automod or spam_tracker.enforced(ctx.guild_id)):
             return
         
         # Vérifier les permissions (ne pas modérer les modérateurs)
-        if permission_manager.has_moderator_permissions(message.author):
+        if ctx.is_moderator:
             return
         
-        # Détecter le spam
-        await self._check_spam(message)
-        
-        # Filtrer le contenu
-        await self._check_content(message)
-        
-        # Détecter les mentions en masse
-        await self._check_mass_mentions(message)
-        
-        # Détecter les liens suspects
-        await self._check_suspicious_links(message)
+        # Spam, contenu filtré, mentions en masse puis liens suspects
+        if await self._check_spam(ctx.message):
+            ctx.drop("automod:spam")
+        elif not automod:
+            return
+        elif await self._check_content(ctx.message, ctx.matches):
+            ctx.drop("automod:content")
+        elif await self._check_mass_mentions(ctx.message):
+            ctx.drop("automod:mentions")
+        elif await self._check_suspicious_links(ctx.message, ctx.matches):
+            ctx.drop("automod:link")
     
-    async def _check_spam(self, message):
-        """Détecte le spam de messages"""
-        user_id = message.author.id
-        now = datetime.now()
-        
-        if user_id not in self.spam_tracker:
-            self.spam_tracker[user_id] = []
+    async def _check_spam(self, message) -> bool:
+        """Détecte le spam de messages (seuils propres au serveur)"""
+        if not spam_tracker.hit(message.guild.id, message.author.id):
+            return False
         
-        self.spam_tracker[user_id].append(now)
-        
-        # Vérifier les 10 dernières secondes
-        recent = [ts for ts in self.spam_tracker[user_id] if now - ts <= timedelta(seconds=10)]
-        self.spam_tracker[user_id] = recent  # Mettre à jour la liste
-        
-        if len(recent) >= 5:  # 5 messages en 10 secondes = spam
-            try:
-                await message.delete()
-                until = datetime.utcnow() + timedelta(minutes=5)
-                await message.author.timeout(until, reason="Automod: Spam détecté")
-                
-                embed = discord.Embed(
-                    title="🤖 Automod - Spam détecté",
-                    description=f"{message.author.mention} a été timeout pour spam",
-                    color=discord.Color.red()
-                )
-                await message.channel.send(embed=embed, delete_after=10)
-                
-                bot_logger.moderation_action(
-                    message.guild.id, 0, message.author.id, "AUTOMOD_SPAM", "5 msg/10s"
-                )
-                
-            except discord.Forbidden:
-                pass
-            except discord.HTTPException:
-                pass  # Message déjà supprimé ou autre erreur
+        thresholds = spam_tracker.thresholds(message.guild.id)
+        try:
+            await message.delete()
+            until = datetime.utcnow() + timedelta(minutes=thresholds.timeout_minutes)
+            await message.author.timeout(until, reason="Automod: Spam détecté")
+            
+            embed = discord.Embed(
+                title="🤖 Automod - Spam détecté",
+                description=f"{message.author.mention} a été timeout pour spam",
+                color=discord.Color.red()
+            )
+            await message.channel.send(embed=embed, delete_after=10)
+            
+            bot_logger.moderation_action(
+                message.guild.id, 0, message.author.id, "AUTOMOD_SPAM",
+                f"{thresholds.max_messages} msg/{thresholds.window:g}s"
+            )
+            
+        except discord.Forbidden:
+            pass
+        except discord.HTTPException:
+            pass  # Message déjà supprimé ou autre erreur
+        return True
     
-    async def _check_content(self, message):
+    async def _check_content(self, message, hits: Optional[List[MatchHit]] = None) -> bool:
         """Vérifie le contenu du message"""
         try:
-            if content_filter.is_spam(message.content):
-                await message.delete()
-                
-                embed = discord.Embed(
-                    title="🤖 Automod - Contenu filtré",
-                    description=f"Message de {message.author.mention} supprimé",
-                    color=discord.Color.orange()
-                )
-                await message.channel.send(embed=embed, delete_after=5)
-                
-                bot_logger.moderation_action(
-                    message.guild.id, 0, message.author.id, "AUTOMOD_FILTER", "Contenu suspect"
-                )
-                
+            if not content_filter.is_spam(message.content, hits=hits):
+                return False
+            
+            await message.delete()
+            
+            embed = discord.Embed(
+                title="🤖 Automod - Contenu filtré",
+                description=f"Message de {message.author.mention} supprimé",
+                color=discord.Color.orange()
+            )
+            await message.channel.send(embed=embed, delete_after=5)
+            
+            bot_logger.moderation_action(
+                message.guild.id, 0, message.author.id, "AUTOMOD_FILTER", "Contenu suspect"
+            )
+            
         except discord.Forbidden:
             pass  # Pas de permissions pour supprimer
         except discord.HTTPException:
             pass  # Message déjà supprimé
         except Exception:
             pass  # Autres erreurs
+        return True
     
-    async def _check_mass_mentions(self, message):
+    async def _check_mass_mentions(self, message) -> bool:
         """Détecte les mentions en masse"""
-        if len(message.mentions) >= 5 or message.mention_everyone:
-            try:
-                await message.delete()
-                until = datetime.utcnow() + timedelta(minutes=10)
-                await message.author.timeout(until, reason="Automod: Mentions en masse")
-                
-                embed = discord.Embed(
-                    title="🤖 Automod - Mentions en masse",
-                    description=f"{message.author.mention} timeout pour mentions abusives",
-                    color=discord.Color.red()
-                )
-                await message.channel.send(embed=embed, delete_after=10)
-                
-                bot_logger.moderation_action(
-                    message.guild.id, 0, message.author.id, "AUTOMOD_MENTIONS", 
-                    f"{len(message.mentions)} mentions"
-                )
-                
-            except discord.Forbidden:
-                pass
+        if len(message.mentions) < 5 and not message.mention_everyone:
+            return False
+        
+        try:
+            await message.delete()
+            until = datetime.utcnow() + timedelta(minutes=10)
+            await message.author.timeout(until, reason="Automod: Mentions en masse")
+            
+            embed = discord.Embed(
+                title="🤖 Automod - Mentions en masse",
+                description=f"{message.author.mention} timeout pour mentions abusives",
+                color=discord.Color.red()
+            )
+            await message.channel.send(embed=embed, delete_after=10)
+            
+            bot_logger.moderation_action(
+                message.guild.id, 0, message.author.id, "AUTOMOD_MENTIONS", 
+                f"{len(message.mentions)} mentions"
+            )
+            
+        except discord.Forbidden:
+            pass
+        return True
     
-    async def _check_suspicious_links(self, message):
+    async def _check_suspicious_links(self, message, hits: Optional[List[MatchHit]] = None) -> bool:
         """Détecte les liens suspects"""
-        suspicious_domains = [
-            'bit.ly', 'tinyurl.com', 'goo.gl', 'ow.ly', 't.co',
-            'grabify.link', 'iplogger.org', 'discord-nitro'
-        ]
+        if hits is None:
+            hits = content_filter.scan(message.content.lower(), message.guild.id)
+        domain = next((hit.pattern for hit in hits if hit.category == content_matcher.LINK), None)
+        if domain is None:
+            return False
         
-        for domain in suspicious_domains:
-            if domain in message.content.lower():
-                try:
-                    await message.delete()
-                    
-                    embed = discord.Embed(
-                        title="🤖 Automod - Lien suspect",
-                        description=f"Lien suspect supprimé de {message.author.mention}",
-                        color=discord.Color.red()
-                    )
-                    await message.channel.send(embed=embed, delete_after=10)
-                    
-                    bot_logger.moderation_action(
-                        message.guild.id, 0, message.author.id, "AUTOMOD_LINK", 
-                        f"Domaine: {domain}"
-                    )
-                    break
-                    
-                except discord.Forbidden:
-                    pass
+        try:
+            await message.delete()
+            
+            embed = discord.Embed(
+                title="🤖 Automod - Lien suspect",
+                description=f"Lien suspect supprimé de {message.author.mention}",
+                color=discord.Color.red()
+            )
+            await message.channel.send(embed=embed, delete_after=10)
+            
+            bot_logger.moderation_action(
+                message.guild.id, 0, message.author.id, "AUTOMOD_LINK", 
+                f"Domaine: {domain}"
+            )
+            
+        except discord.Forbidden:
+            pass
+        return True
     
     # === UTILITAIRES ===
     
@@ -35,12 +35,10 @@ class NotesCog(commands.Cog):
 
         note = input_validator.sanitize_text(note, 1000)
 
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            await db.execute("""
-                INSERT INTO user_notes (guild_id, user_id, moderator_id, note, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            """, (interaction.guild.id, membre.id, interaction.user.id, note, datetime.now().isoformat()))
-            await db.commit()
+        await db_manager.writer.execute("""
+            INSERT INTO user_notes (guild_id, user_id, moderator_id, note, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (interaction.guild.id, membre.id, interaction.user.id, note, datetime.now().isoformat()))
 
         embed = discord.Embed(
             title="✅ Note Ajoutée",
@@ -61,7 +59,7 @@ class NotesCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
             return
 
-        async with aiosqlite.connect(db_manager.db_path) as db:
+        async with db_manager.acquire() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT * FROM user_notes
@@ -105,23 +103,14 @@ class NotesCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
             return
 
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            # Vérifier que la note existe
-            db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT * FROM user_notes WHERE id = ? AND guild_id = ?
-            """, (note_id, interaction.guild.id)) as cursor:
-                note = await cursor.fetchone()
-
-            if not note:
-                await interaction.response.send_message("❌ Note introuvable.", ephemeral=True)
-                return
+        # Suppression limitée au serveur: aucune ligne touchée = note introuvable
+        deleted_count, _ = await db_manager.writer.execute("""
+            DELETE FROM user_notes WHERE id = ? AND guild_id = ?
+        """, (note_id, interaction.guild.id))
 
-            # Supprimer la note
-            await db.execute("""
-                DELETE FROM user_notes WHERE id = ?
-            """, (note_id,))
-            await db.commit()
+        if not deleted_count:
+            await interaction.response.send_message("❌ Note introuvable.", ephemeral=True)
+            return
 
         embed = discord.Embed(
             title="✅ Note Supprimée",
@@ -140,13 +129,9 @@ class NotesCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
             return
 
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            cursor = await db.execute("""
-                DELETE FROM user_notes WHERE guild_id = ? AND user_id = ?
-            """, (interaction.guild.id, membre.id))
-            await db.commit()
-
-            deleted_count = cursor.rowcount
+        deleted_count, _ = await db_manager.writer.execute("""
+            DELETE FROM user_notes WHERE guild_id = ? AND user_id = ?
+        """, (interaction.guild.id, membre.id))
 
         if deleted_count == 0:
             await interaction.response.send_message(f"📭 Aucune note à supprimer pour {membre.mention}.", ephemeral=True)
@@ -171,7 +156,7 @@ class NotesCog(commands.Cog):
 
         mot_cle = input_validator.sanitize_text(mot_cle, 100)
 
-        async with aiosqlite.connect(db_manager.db_path) as db:
+        async with db_manager.acquire() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT * FROM user_notes
@@ -12,6 +12,7 @@ from config import Config
 from database import db_manager
 from utils.logger import bot_logger
 from utils.security import input_validator
+from utils.scheduler import scheduler, ScheduledJob
 
 class PollsCog(commands.Cog):
     """Système de création et gestion de sondages"""
@@ -22,8 +23,89 @@ class PollsCog(commands.Cog):
 
     async def cog_load(self):
         """Chargement du cog"""
+        await scheduler.register("poll", self._on_poll_due, self._load_pending_polls)
         bot_logger.logger.info("Module sondages chargé")
 
+    def cog_unload(self):
+        """Déchargement du cog"""
+        scheduler.unregister("poll")
+
+    async def _load_pending_polls(self):
+        """Échéances des sondages actifs avec une durée (index idx_polls_active_end)"""
+        async with db_manager.acquire() as db:
+            async with db.execute("""
+                SELECT id, end_time FROM polls
+                WHERE active = 1 AND end_time IS NOT NULL
+                ORDER BY end_time
+            """) as cursor:
+                return [(row[0], row[1], None) for row in await cursor.fetchall()]
+
+    async def _on_poll_due(self, job: ScheduledJob):
+        """Clôture un sondage arrivé à échéance et publie ses résultats"""
+        async with db_manager.acquire() as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute("""
+                SELECT * FROM polls WHERE id = ? AND active = 1
+            """, (job.key,)) as cursor:
+                poll = await cursor.fetchone()
+
+        if not poll:
+            return
+
+        await db_manager.writer.execute("""
+            UPDATE polls SET active = 0 WHERE id = ?
+        """, (poll['id'],))
+
+        channel = self.bot.get_channel(poll['channel_id'])
+        if not channel:
+            return
+        try:
+            message = await channel.fetch_message(poll['message_id'])
+        except discord.NotFound:
+            return
+
+        await channel.send(
+            "⏰ Le sondage est terminé ! Voici les résultats:",
+            embed=self._results_embed(poll, message)
+        )
+
+    def _results_embed(self, poll, message: discord.Message) -> discord.Embed:
+        """Compte les votes (réactions) et construit l'embed des résultats"""
+        options = poll['options'].split('|')
+        results = []
+        total_votes = 0
+
+        for i, option in enumerate(options):
+            reaction = discord.utils.get(message.reactions, emoji=self.number_emojis[i])
+            count = (reaction.count - 1) if reaction else 0  # -1 pour enlever le bot
+            results.append((option, count))
+            total_votes += count
+
+        # Créer l'embed des résultats
+        embed = discord.Embed(
+            title="📊 Résultats: " + poll['question'],
+            description=f"**Total des votes:** {total_votes}",
+            color=discord.Color.green(),
+            timestamp=datetime.now()
+        )
+
+        # Trier par nombre de votes
+        results.sort(key=lambda x: x[1], reverse=True)
+
+        for i, (option, count) in enumerate(results):
+            percentage = (count / total_votes * 100) if total_votes > 0 else 0
+            bar_length = int(percentage / 5)
+            bar = "█" * bar_length + "░" * (20 - bar_length)
+
+            embed.add_field(
+                name=f"{self.number_emojis[i]} {option}",
+                value=f"`{bar}` {count} votes ({percentage:.1f}%)",
+                inline=False
+            )
+
+        embed.set_footer(text=f"Sondage créé par l'utilisateur ID: {poll['author_id']}")
+        return embed
+
     @app_commands.command(name="poll", description="Crée un sondage")
     async def poll(self, interaction: discord.Interaction,
                    question: str,
@@ -88,14 +170,16 @@ class PollsCog(commands.Cog):
             await message.add_reaction(self.number_emojis[i])
 
         # Sauvegarder le sondage dans la base de données
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            end_time_iso = (datetime.now() + timedelta(minutes=duree_minutes)).isoformat() if duree_minutes else None
-            await db.execute("""
-                INSERT INTO polls (guild_id, channel_id, message_id, question, options, author_id, end_time, active)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (interaction.guild.id, message.channel.id, message.id, question,
-                  "|".join(options), interaction.user.id, end_time_iso, True))
-            await db.commit()
+        end_time = datetime.now() + timedelta(minutes=duree_minutes) if duree_minutes else None
+        _, poll_id = await db_manager.writer.execute("""
+            INSERT INTO polls (guild_id, channel_id, message_id, question, options, author_id, end_time, active)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (interaction.guild.id, message.channel.id, message.id, question,
+              "|".join(options), interaction.user.id, end_time.isoformat() if end_time else None, True))
+
+        # Clôture automatique à l'échéance
+        if end_time:
+            scheduler.schedule("poll", poll_id, end_time)
 
         bot_logger.logger.info(f"Sondage créé par {interaction.user.id}: {question}")
 
@@ -113,7 +197,7 @@ class PollsCog(commands.Cog):
             return
 
         # Récupérer le sondage
-        async with aiosqlite.connect(db_manager.db_path) as db:
+        async with db_manager.acquire() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT * FROM polls WHERE guild_id = ? AND message_id = ?
@@ -136,41 +220,7 @@ class PollsCog(commands.Cog):
             await interaction.response.send_message("❌ Message du sondage introuvable.", ephemeral=True)
             return
 
-        # Compter les votes
-        options = poll['options'].split('|')
-        results = []
-        total_votes = 0
-
-        for i, option in enumerate(options):
-            reaction = discord.utils.get(message.reactions, emoji=self.number_emojis[i])
-            count = (reaction.count - 1) if reaction else 0  # -1 pour enlever le bot
-            results.append((option, count))
-            total_votes += count
-
-        # Créer l'embed des résultats
-        embed = discord.Embed(
-            title="📊 Résultats: " + poll['question'],
-            description=f"**Total des votes:** {total_votes}",
-            color=discord.Color.green(),
-            timestamp=datetime.now()
-        )
-
-        # Trier par nombre de votes
-        results.sort(key=lambda x: x[1], reverse=True)
-
-        for i, (option, count) in enumerate(results):
-            percentage = (count / total_votes * 100) if total_votes > 0 else 0
-            bar_length = int(percentage / 5)
-            bar = "█" * bar_length + "░" * (20 - bar_length)
-
-            embed.add_field(
-                name=f"{self.number_emojis[i]} {option}",
-                value=f"`{bar}` {count} votes ({percentage:.1f}%)",
-                inline=False
-            )
-
-        embed.set_footer(text=f"Sondage créé par l'utilisateur ID: {poll['author_id']}")
-
+        embed = self._results_embed(poll, message)
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="poll_end", description="Termine un sondage et affiche les résultats")
@@ -187,7 +237,7 @@ class PollsCog(commands.Cog):
             return
 
         # Récupérer le sondage
-        async with aiosqlite.connect(db_manager.db_path) as db:
+        async with db_manager.acquire() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT * FROM polls WHERE guild_id = ? AND message_id = ?
@@ -208,11 +258,10 @@ class PollsCog(commands.Cog):
             return
 
         # Marquer comme terminé
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            await db.execute("""
-                UPDATE polls SET active = 0 WHERE message_id = ?
-            """, (msg_id,))
-            await db.commit()
+        await db_manager.writer.execute("""
+            UPDATE polls SET active = 0 WHERE message_id = ?
+        """, (msg_id,))
+        scheduler.cancel("poll", poll['id'])
 
         # Afficher les résultats
         await interaction.response.send_message("✅ Sondage terminé ! Voici les résultats:", ephemeral=True)
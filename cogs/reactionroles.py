@@ -1,11 +1,11 @@
 """
 Système de réaction-roles pour le bot Discord
 """
+import asyncio
 import discord
 from discord.ext import commands
 from discord import app_commands
-from typing import Optional
-import aiosqlite
+from typing import Dict, Optional, Set, Tuple
 
 from config import Config
 from database import db_manager
@@ -17,82 +17,86 @@ class ReactionRolesCog(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        # (guild_id, user_id) -> {role_id: True (ajout) / False (retrait)}, dernier clic gagnant
+        self._pending_roles: Dict[Tuple[int, int], Dict[int, bool]] = {}
+        self._flush_tasks: Set[asyncio.Task] = set()
 
     async def cog_load(self):
         """Chargement du cog"""
         bot_logger.logger.info("Module reaction-roles chargé")
 
+    async def cog_unload(self):
+        """Déchargement du cog: applique les changements de rôles en attente"""
+        for task in list(self._flush_tasks):
+            task.cancel()
+        for key in list(self._pending_roles):
+            await self._apply_role_changes(key)
+
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
         """Ajoute un rôle quand une réaction est ajoutée"""
-        if payload.user_id == self.bot.user.id:
-            return
-
-        # Récupérer la configuration de reaction-role
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT role_id FROM reaction_roles
-                WHERE guild_id = ? AND message_id = ? AND emoji = ?
-            """, (payload.guild_id, payload.message_id, str(payload.emoji))) as cursor:
-                config = await cursor.fetchone()
-
-        if not config:
-            return
-
-        guild = self.bot.get_guild(payload.guild_id)
-        if not guild:
-            return
-
-        member = guild.get_member(payload.user_id)
-        if not member:
-            return
-
-        role = guild.get_role(config['role_id'])
-        if not role:
-            return
-
-        try:
-            await member.add_roles(role, reason="Reaction role")
-            bot_logger.logger.info(f"Rôle {role.name} ajouté à {member} via reaction-role")
-        except discord.Forbidden:
-            bot_logger.logger.warning(f"Impossible d'ajouter le rôle {role.name} à {member}")
+        self._handle_reaction(payload, True)
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
         """Retire un rôle quand une réaction est retirée"""
-        if payload.user_id == self.bot.user.id:
-            return
+        self._handle_reaction(payload, False)
 
-        # Récupérer la configuration de reaction-role
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT role_id FROM reaction_roles
-                WHERE guild_id = ? AND message_id = ? AND emoji = ?
-            """, (payload.guild_id, payload.message_id, str(payload.emoji))) as cursor:
-                config = await cursor.fetchone()
+    def _handle_reaction(self, payload: discord.RawReactionActionEvent, add: bool):
+        """Met en attente le changement de rôle correspondant à une réaction"""
+        # La plupart des réactions visent des messages sans reaction-role: une seule recherche
+        emojis = db_manager.settings.message_reaction_roles(payload.message_id)
+        if emojis is None or payload.guild_id is None:
+            return
 
-        if not config:
+        role_id = emojis.get(str(payload.emoji))
+        if role_id is None or payload.user_id == self.bot.user.id:
             return
 
-        guild = self.bot.get_guild(payload.guild_id)
-        if not guild:
+        key = (payload.guild_id, payload.user_id)
+        pending = self._pending_roles.get(key)
+        if pending is None:
+            pending = self._pending_roles[key] = {}
+            task = asyncio.create_task(self._flush_role_changes(key), name="reaction-roles-flush")
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        pending[role_id] = add
+
+    async def _flush_role_changes(self, key: Tuple[int, int]):
+        """Attend la fin de la rafale de clics puis applique les changements du membre"""
+        await asyncio.sleep(Config.REACTION_ROLE_DELAY)
+        await self._apply_role_changes(key)
+
+    async def _apply_role_changes(self, key: Tuple[int, int]):
+        """Applique en un seul appel API l'état final voulu des rôles d'un membre"""
+        changes = self._pending_roles.pop(key, None)
+        if not changes:
             return
 
-        member = guild.get_member(payload.user_id)
+        guild = self.bot.get_guild(key[0])
+        member = guild.get_member(key[1]) if guild else None
         if not member:
             return
 
-        role = guild.get_role(config['role_id'])
-        if not role:
-            return
+        current = {role.id for role in member.roles}
+        to_add = [guild.get_role(role_id) for role_id, add in changes.items() if add and role_id not in current]
+        to_remove = {role_id for role_id, add in changes.items() if not add and role_id in current}
+        to_add = [role for role in to_add if role is not None]
+        if not to_add and not to_remove:
+            return  # Clics qui s'annulent: aucun appel
 
+        # Rôles actuels sans @everyone (premier de la liste), comme Member.add_roles(atomic=False)
+        roles = [role for role in member.roles[1:] if role.id not in to_remove] + to_add
         try:
-            await member.remove_roles(role, reason="Reaction role removed")
-            bot_logger.logger.info(f"Rôle {role.name} retiré de {member} via reaction-role")
+            await member.edit(roles=roles, reason="Reaction role")
+            if to_add:
+                bot_logger.logger.info(f"Rôle(s) {', '.join(r.name for r in to_add)} ajouté(s) à {member} via reaction-role")
+            if to_remove:
+                bot_logger.logger.info(f"{len(to_remove)} rôle(s) retiré(s) de {member} via reaction-role")
         except discord.Forbidden:
-            bot_logger.logger.warning(f"Impossible de retirer le rôle {role.name} de {member}")
+            bot_logger.logger.warning(f"Impossible de modifier les rôles de {member} (reaction-role)")
+        except discord.HTTPException as e:
+            bot_logger.logger.error(f"Erreur reaction-role pour {member}: {e}")
 
     @app_commands.command(name="reactionrole_add", description="Ajoute un reaction-role")
     @require_permissions("admin")
@@ -131,12 +135,9 @@ class ReactionRolesCog(commands.Cog):
             return
 
         # Sauvegarder dans la base de données
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            await db.execute("""
-                INSERT OR REPLACE INTO reaction_roles (guild_id, channel_id, message_id, emoji, role_id)
-                VALUES (?, ?, ?, ?, ?)
-            """, (interaction.guild.id, message.channel.id, message.id, emoji, role.id))
-            await db.commit()
+        await db_manager.settings.add_reaction_role(
+            interaction.guild.id, message.channel.id, message.id, emoji, role.id
+        )
 
         embed = discord.Embed(
             title="✅ Reaction-Role configuré",
@@ -165,16 +166,9 @@ class ReactionRolesCog(commands.Cog):
             return
 
         # Supprimer de la base de données
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            cursor = await db.execute("""
-                DELETE FROM reaction_roles
-                WHERE guild_id = ? AND message_id = ? AND emoji = ?
-            """, (interaction.guild.id, msg_id, emoji))
-            await db.commit()
-
-            if cursor.rowcount == 0:
-                await interaction.response.send_message("❌ Aucune configuration trouvée pour ce message et cet emoji.", ephemeral=True)
-                return
+        if not await db_manager.settings.remove_reaction_role(interaction.guild.id, msg_id, emoji):
+            await interaction.response.send_message("❌ Aucune configuration trouvée pour ce message et cet emoji.", ephemeral=True)
+            return
 
         embed = discord.Embed(
             title="✅ Reaction-Role supprimé",
@@ -192,12 +186,7 @@ class ReactionRolesCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
             return
 
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT * FROM reaction_roles WHERE guild_id = ?
-            """, (interaction.guild.id,)) as cursor:
-                configs = await cursor.fetchall()
+        configs = db_manager.settings.reaction_roles(interaction.guild.id)
 
         if not configs:
             await interaction.response.send_message("📭 Aucun reaction-role configuré.", ephemeral=True)
@@ -210,12 +199,12 @@ class ReactionRolesCog(commands.Cog):
         )
 
         for config in configs[:25]:  # Limiter à 25 (limite Discord)
-            role = interaction.guild.get_role(config['role_id'])
-            role_name = role.mention if role else f"Rôle inconnu ({config['role_id']})"
+            role = interaction.guild.get_role(config.role_id)
+            role_name = role.mention if role else f"Rôle inconnu ({config.role_id})"
 
             embed.add_field(
-                name=f"{config['emoji']} → {role_name}",
-                value=f"Message ID: `{config['message_id']}`\nCanal: <#{config['channel_id']}>",
+                name=f"{config.emoji} → {role_name}",
+                value=f"Message ID: `{config.message_id}`\nCanal: <#{config.channel_id}>",
                 inline=False
             )
 
@@ -2,7 +2,7 @@
 Système de rappels pour le bot Discord
 """
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
 from typing import Optional
 import aiosqlite
@@ -13,53 +13,52 @@ from config import Config
 from database import db_manager
 from utils.logger import bot_logger
 from utils.security import input_validator
+from utils.scheduler import scheduler, ScheduledJob
 
 class RemindersCog(commands.Cog):
     """Système de rappels programmés"""
 
     def __init__(self, bot):
         self.bot = bot
-        self.check_reminders.start()
 
     async def cog_load(self):
         """Chargement du cog"""
+        await scheduler.register("reminder", self._on_reminder_due, self._load_pending_reminders)
         bot_logger.logger.info("Module rappels chargé")
 
     def cog_unload(self):
         """Déchargement du cog"""
-        self.check_reminders.cancel()
+        scheduler.unregister("reminder")
 
-    @tasks.loop(seconds=30)
-    async def check_reminders(self):
-        """Vérifie et envoie les rappels dus"""
-        try:
-            async with aiosqlite.connect(db_manager.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                now = datetime.now().isoformat()
-
-                async with db.execute("""
-                    SELECT * FROM reminders
-                    WHERE remind_at <= ? AND sent = 0
-                    ORDER BY remind_at
-                """, (now,)) as cursor:
-                    reminders = await cursor.fetchall()
-
-                for reminder in reminders:
-                    await self.send_reminder(reminder)
-
-                    # Marquer comme envoyé
-                    await db.execute("""
-                        UPDATE reminders SET sent = 1
-                        WHERE id = ?
-                    """, (reminder['id'],))
-                    await db.commit()
+    async def _load_pending_reminders(self):
+        """Échéances des rappels non envoyés (index idx_reminders_pending)"""
+        async with db_manager.acquire() as db:
+            async with db.execute("""
+                SELECT id, remind_at FROM reminders
+                WHERE sent = 0
+                ORDER BY remind_at
+            """) as cursor:
+                return [(row[0], row[1], None) for row in await cursor.fetchall()]
 
-        except Exception as e:
-            bot_logger.logger.error(f"Erreur vérification rappels: {e}")
+    async def _on_reminder_due(self, job: ScheduledJob):
+        """Envoie un rappel arrivé à échéance"""
+        async with db_manager.acquire() as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute("""
+                SELECT * FROM reminders WHERE id = ? AND sent = 0
+            """, (job.key,)) as cursor:
+                reminder = await cursor.fetchone()
 
-    @check_reminders.before_loop
-    async def before_check_reminders(self):
-        await self.bot.wait_until_ready()
+        if not reminder:
+            return
+
+        await self.send_reminder(reminder)
+
+        # Marquer comme envoyé
+        await db_manager.writer.execute("""
+            UPDATE reminders SET sent = 1
+            WHERE id = ?
+        """, (reminder['id'],))
 
     async def send_reminder(self, reminder):
         """Envoie un rappel à l'utilisateur"""
@@ -137,18 +136,17 @@ class RemindersCog(commands.Cog):
         remind_at = datetime.now() + delta
         message = input_validator.sanitize_text(message, 500)
 
-        # Sauvegarder le rappel
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            await db.execute("""
-                INSERT INTO reminders (user_id, guild_id, channel_id, message, remind_at, created_at, sent)
-                VALUES (?, ?, ?, ?, ?, ?, 0)
-            """, (interaction.user.id,
-                  interaction.guild.id if interaction.guild else None,
-                  interaction.channel.id,
-                  message,
-                  remind_at.isoformat(),
-                  datetime.now().isoformat()))
-            await db.commit()
+        # Sauvegarder le rappel puis le planifier
+        _, reminder_id = await db_manager.writer.execute("""
+            INSERT INTO reminders (user_id, guild_id, channel_id, message, remind_at, created_at, sent)
+            VALUES (?, ?, ?, ?, ?, ?, 0)
+        """, (interaction.user.id,
+              interaction.guild.id if interaction.guild else None,
+              interaction.channel.id,
+              message,
+              remind_at.isoformat(),
+              datetime.now().isoformat()))
+        scheduler.schedule("reminder", reminder_id, remind_at)
 
         embed = discord.Embed(
             title="✅ Rappel programmé",
@@ -168,7 +166,7 @@ class RemindersCog(commands.Cog):
     @app_commands.command(name="reminders_list", description="Liste tes rappels actifs")
     async def reminders_list(self, interaction: discord.Interaction):
         """Liste les rappels actifs de l'utilisateur"""
-        async with aiosqlite.connect(db_manager.db_path) as db:
+        async with db_manager.acquire() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT * FROM reminders
@@ -203,23 +201,16 @@ class RemindersCog(commands.Cog):
     @app_commands.command(name="reminder_delete", description="Supprime un rappel")
     async def reminder_delete(self, interaction: discord.Interaction, reminder_id: int):
         """Supprime un rappel"""
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            # Vérifier que le rappel appartient à l'utilisateur
-            db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT * FROM reminders WHERE id = ? AND user_id = ?
-            """, (reminder_id, interaction.user.id)) as cursor:
-                reminder = await cursor.fetchone()
+        # Suppression limitée aux rappels de l'utilisateur: aucune ligne touchée = refus
+        deleted_count, _ = await db_manager.writer.execute("""
+            DELETE FROM reminders WHERE id = ? AND user_id = ?
+        """, (reminder_id, interaction.user.id))
 
-            if not reminder:
-                await interaction.response.send_message("❌ Rappel introuvable ou non autorisé.", ephemeral=True)
-                return
+        if not deleted_count:
+            await interaction.response.send_message("❌ Rappel introuvable ou non autorisé.", ephemeral=True)
+            return
 
-            # Supprimer le rappel
-            await db.execute("""
-                DELETE FROM reminders WHERE id = ?
-            """, (reminder_id,))
-            await db.commit()
+        scheduler.cancel("reminder", reminder_id)
 
         embed = discord.Embed(
             title="✅ Rappel supprimé",
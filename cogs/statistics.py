@@ -1,12 +1,39 @@
 """
 Module de statistiques avancées
 """
+import sqlite3
 import discord
 from discord.ext import commands
 from discord import app_commands
-from typing import Optional
+from datetime import datetime
+from typing import Any, Dict, Optional
 
+from database import db_manager, DatabaseManager
 from utils.logger import bot_logger
+from utils.leaderboard import leaderboard_embed
+
+def _guild_report(conn: sqlite3.Connection, guild_id: int) -> Dict[str, Any]:
+    """Statistiques d'un serveur sur 7 jours (instantané en lecture seule, thread de rapport)"""
+    totals = conn.execute("""
+        SELECT members, coins, banned, warned FROM guild_stats WHERE guild_id = ?
+    """, (guild_id,)).fetchone()
+    commands = conn.execute("""
+        SELECT COALESCE(SUM(commands), 0) FROM daily_stats WHERE day >= date('now', 'localtime', '-6 days')
+    """).fetchone()[0]
+    # Parcours de idx_activity_logs_guild_time limité à la fenêtre
+    activity = conn.execute("""
+        SELECT action_type, COUNT(*) FROM activity_logs
+        WHERE guild_id = ? AND timestamp >= datetime('now', '-7 days')
+        GROUP BY action_type ORDER BY COUNT(*) DESC
+    """, (guild_id,)).fetchall()
+    return {
+        'members': totals['members'] if totals else 0,
+        'coins': totals['coins'] if totals else 0,
+        'banned': totals['banned'] if totals else 0,
+        'warned': totals['warned'] if totals else 0,
+        'commands': commands,
+        'activity': [(action_type, count) for action_type, count in activity]
+    }
 
 class StatisticsCog(commands.Cog):
     """Statistiques avancées"""
@@ -19,7 +46,28 @@ class StatisticsCog(commands.Cog):
 
     @app_commands.command(name="stats", description="Statistiques générales")
     async def stats(self, interaction: discord.Interaction):
-        await interaction.response.send_message("📊 Statistiques générales")
+        if not interaction.guild:
+            await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
+            return
+        report = await db_manager.run_report(_guild_report, interaction.guild.id)
+
+        embed = discord.Embed(
+            title=f"📊 Statistiques de {interaction.guild.name}",
+            color=discord.Color.blue(),
+            timestamp=datetime.now()
+        )
+        embed.add_field(name="👥 Membres enregistrés", value=f"{report['members']:,}", inline=True)
+        embed.add_field(name="💰 Pièces en circulation", value=f"{report['coins']:,}", inline=True)
+        embed.add_field(name="⚙️ Commandes (7 jours, tous serveurs)", value=f"{report['commands']:,}", inline=True)
+        embed.add_field(name="🔨 Bannis", value=str(report['banned']), inline=True)
+        embed.add_field(name="⚠️ Avertis", value=str(report['warned']), inline=True)
+        if report['activity']:
+            embed.add_field(
+                name="📈 Activité (7 jours)",
+                value="\n".join(f"`{action_type}`: {count:,}" for action_type, count in report['activity'][:10]),
+                inline=False
+            )
+        await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="messages_stats", description="Stats de messages")
     async def messages_stats(self, interaction: discord.Interaction, membre: Optional[discord.Member] = None):
@@ -47,11 +95,25 @@ class StatisticsCog(commands.Cog):
 
     @app_commands.command(name="top_level", description="Top niveaux")
     async def top_level(self, interaction: discord.Interaction):
-        await interaction.response.send_message("⭐ Top niveaux")
+        if not interaction.guild:
+            await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
+            return
+        embed = leaderboard_embed(
+            interaction.guild, db_manager.leaderboard, 'xp', "⭐ Top niveaux",
+            formatter=lambda xp: f"Niveau {DatabaseManager.calculate_level_from_xp(xp)}"
+        )
+        await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="top_coins", description="Top richesse")
     async def top_coins(self, interaction: discord.Interaction):
-        await interaction.response.send_message("💰 Top richesse")
+        if not interaction.guild:
+            await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
+            return
+        embed = leaderboard_embed(
+            interaction.guild, db_manager.leaderboard, 'coins', "💰 Top richesse",
+            formatter=lambda coins: f"{coins:,} pièces"
+        )
+        await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="server_growth", description="Croissance du serveur")
     async def server_growth(self, interaction: discord.Interaction):
@@ -106,7 +168,7 @@ class StatisticsCog(commands.Cog):
         await interaction.response.send_message("⏰ Heures de pointe")
 
     @app_commands.command(name="bot_usage", description="Utilisation du bot")
-    async def bot_usage(self, interaction: discord.Interaction):
+    async def usage_stats(self, interaction: discord.Interaction):
         await interaction.response.send_message("🤖 Utilisation du bot")
 
     @app_commands.command(name="command_stats", description="Stats des commandes")
@@ -38,12 +38,7 @@ class TicketsCog(commands.Cog):
             category = await interaction.guild.create_category(self.ticket_category_name)
 
         # Sauvegarder la configuration dans la base de données
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            await db.execute("""
-                INSERT OR REPLACE INTO ticket_config (guild_id, category_id)
-                VALUES (?, ?)
-            """, (interaction.guild.id, category.id))
-            await db.commit()
+        await db_manager.settings.set_ticket_category(interaction.guild.id, category.id)
 
         embed = discord.Embed(
             title="✅ Système de tickets configuré",
@@ -61,25 +56,20 @@ class TicketsCog(commands.Cog):
 
         sujet = input_validator.sanitize_text(sujet, 100)
 
-        # Récupérer la configuration
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT category_id FROM ticket_config WHERE guild_id = ?
-            """, (interaction.guild.id,)) as cursor:
-                config = await cursor.fetchone()
+        # Récupérer la configuration (en mémoire)
+        config = db_manager.settings.ticket_config(interaction.guild.id)
 
         if not config:
             await interaction.response.send_message("❌ Le système de tickets n'est pas configuré. Demandez à un administrateur d'utiliser `/ticket_setup`.", ephemeral=True)
             return
 
-        category = interaction.guild.get_channel(config['category_id'])
+        category = interaction.guild.get_channel(config.category_id)
         if not category:
             await interaction.response.send_message("❌ La catégorie de tickets n'existe plus. Demandez à un administrateur de refaire `/ticket_setup`.", ephemeral=True)
             return
 
         # Vérifier si l'utilisateur n'a pas déjà un ticket ouvert
-        async with aiosqlite.connect(db_manager.db_path) as db:
+        async with db_manager.acquire() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT channel_id FROM tickets
@@ -111,12 +101,10 @@ class TicketsCog(commands.Cog):
         )
 
         # Enregistrer le ticket dans la base de données
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            await db.execute("""
-                INSERT INTO tickets (guild_id, channel_id, user_id, subject, status, created_at)
-                VALUES (?, ?, ?, ?, 'open', ?)
-            """, (interaction.guild.id, ticket_channel.id, interaction.user.id, sujet, datetime.now().isoformat()))
-            await db.commit()
+        await db_manager.writer.execute("""
+            INSERT INTO tickets (guild_id, channel_id, user_id, subject, status, created_at)
+            VALUES (?, ?, ?, ?, 'open', ?)
+        """, (interaction.guild.id, ticket_channel.id, interaction.user.id, sujet, datetime.now().isoformat()))
 
         # Message initial dans le ticket
         embed = discord.Embed(
@@ -146,7 +134,7 @@ class TicketsCog(commands.Cog):
             return
 
         # Vérifier si c'est un canal de ticket
-        async with aiosqlite.connect(db_manager.db_path) as db:
+        async with db_manager.acquire() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT user_id, subject FROM tickets
@@ -185,13 +173,11 @@ class TicketsCog(commands.Cog):
         await interaction.response.send_message(embed=embed)
 
         # Mettre à jour la base de données
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            await db.execute("""
-                UPDATE tickets
-                SET status = 'closed', closed_at = ?, closed_by = ?, close_reason = ?
-                WHERE guild_id = ? AND channel_id = ?
-            """, (datetime.now().isoformat(), interaction.user.id, raison, interaction.guild.id, interaction.channel.id))
-            await db.commit()
+        await db_manager.writer.execute("""
+            UPDATE tickets
+            SET status = 'closed', closed_at = ?, closed_by = ?, close_reason = ?
+            WHERE guild_id = ? AND channel_id = ?
+        """, (datetime.now().isoformat(), interaction.user.id, raison, interaction.guild.id, interaction.channel.id))
 
         # Supprimer le canal après 5 secondes
         await interaction.channel.send("⚠️ Ce canal sera supprimé dans 5 secondes...")
@@ -209,7 +195,7 @@ class TicketsCog(commands.Cog):
             return
 
         # Vérifier si c'est un canal de ticket
-        async with aiosqlite.connect(db_manager.db_path) as db:
+        async with db_manager.acquire() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT user_id FROM tickets
@@ -234,7 +220,7 @@ class TicketsCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
             return
 
-        async with aiosqlite.connect(db_manager.db_path) as db:
+        async with db_manager.acquire() as db:
             db.row_factory = aiosqlite.Row
             async with db.execute("""
                 SELECT channel_id, user_id, subject, created_at
@@ -5,7 +5,6 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from typing import Optional
-import aiosqlite
 from datetime import datetime
 
 from config import Config
@@ -29,25 +28,17 @@ class WelcomeCog(commands.Cog):
         if member.bot:
             return
 
-        # Récupérer la configuration
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT welcome_enabled, welcome_channel_id, welcome_message
-                FROM welcome_config
-                WHERE guild_id = ?
-            """, (member.guild.id,)) as cursor:
-                config = await cursor.fetchone()
-
-        if not config or not config['welcome_enabled']:
+        # Configuration en mémoire (aucune lecture en base)
+        config = db_manager.settings.welcome_config(member.guild.id)
+        if not config or not config.welcome_enabled:
             return
 
-        channel = member.guild.get_channel(config['welcome_channel_id'])
+        channel = member.guild.get_channel(config.welcome_channel_id)
         if not channel:
             return
 
         # Variables disponibles pour le message
-        message = config['welcome_message'] or "Bienvenue {user} sur **{server}** ! Tu es le membre n°{count} !"
+        message = config.welcome_message or "Bienvenue {user} sur **{server}** ! Tu es le membre n°{count} !"
         message = message.replace("{user}", member.mention)
         message = message.replace("{username}", member.name)
         message = message.replace("{server}", member.guild.name)
@@ -73,25 +64,17 @@ class WelcomeCog(commands.Cog):
         if member.bot:
             return
 
-        # Récupérer la configuration
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT goodbye_enabled, goodbye_channel_id, goodbye_message
-                FROM welcome_config
-                WHERE guild_id = ?
-            """, (member.guild.id,)) as cursor:
-                config = await cursor.fetchone()
-
-        if not config or not config['goodbye_enabled']:
+        # Configuration en mémoire (aucune lecture en base)
+        config = db_manager.settings.welcome_config(member.guild.id)
+        if not config or not config.goodbye_enabled:
             return
 
-        channel = member.guild.get_channel(config['goodbye_channel_id'])
+        channel = member.guild.get_channel(config.goodbye_channel_id)
         if not channel:
             return
 
         # Variables disponibles pour le message
-        message = config['goodbye_message'] or "Au revoir {username}, nous espérons te revoir bientôt sur **{server}** !"
+        message = config.goodbye_message or "Au revoir {username}, nous espérons te revoir bientôt sur **{server}** !"
         message = message.replace("{user}", f"**{member.name}**")
         message = message.replace("{username}", member.name)
         message = message.replace("{server}", member.guild.name)
@@ -124,13 +107,11 @@ class WelcomeCog(commands.Cog):
         if message:
             message = input_validator.sanitize_text(message, 1000)
 
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            await db.execute("""
-                INSERT OR REPLACE INTO welcome_config
-                (guild_id, welcome_enabled, welcome_channel_id, welcome_message)
-                VALUES (?, ?, ?, ?)
-            """, (interaction.guild.id, True, channel.id, message))
-            await db.commit()
+        # Les réglages d'au revoir sont conservés
+        await db_manager.settings.update_welcome(
+            interaction.guild.id,
+            welcome_enabled=True, welcome_channel_id=channel.id, welcome_message=message
+        )
 
         embed = discord.Embed(
             title="✅ Bienvenue configurée",
@@ -172,13 +153,11 @@ class WelcomeCog(commands.Cog):
         if message:
             message = input_validator.sanitize_text(message, 1000)
 
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            await db.execute("""
-                INSERT OR REPLACE INTO welcome_config
-                (guild_id, goodbye_enabled, goodbye_channel_id, goodbye_message)
-                VALUES (?, ?, ?, ?)
-            """, (interaction.guild.id, True, channel.id, message))
-            await db.commit()
+        # Les réglages de bienvenue sont conservés
+        await db_manager.settings.update_welcome(
+            interaction.guild.id,
+            goodbye_enabled=True, goodbye_channel_id=channel.id, goodbye_message=message
+        )
 
         embed = discord.Embed(
             title="✅ Au revoir configuré",
@@ -215,13 +194,7 @@ class WelcomeCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
             return
 
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            await db.execute("""
-                UPDATE welcome_config
-                SET welcome_enabled = ?
-                WHERE guild_id = ?
-            """, (activer, interaction.guild.id))
-            await db.commit()
+        await db_manager.settings.update_welcome(interaction.guild.id, welcome_enabled=activer)
 
         status = "activé" if activer else "désactivé"
         embed = discord.Embed(
@@ -240,13 +213,7 @@ class WelcomeCog(commands.Cog):
             await interaction.response.send_message("❌ Cette commande ne peut être utilisée que dans un serveur.", ephemeral=True)
             return
 
-        async with aiosqlite.connect(db_manager.db_path) as db:
-            await db.execute("""
-                UPDATE welcome_config
-                SET goodbye_enabled = ?
-                WHERE guild_id = ?
-            """, (activer, interaction.guild.id))
-            await db.commit()
+        await db_manager.settings.update_welcome(interaction.guild.id, goodbye_enabled=activer)
 
         status = "activé" if activer else "désactivé"
         embed = discord.Embed(
@@ -23,20 +23,45 @@ class Config:
     # Discord
     DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
     COMMAND_PREFIX = os.getenv("COMMAND_PREFIX", "!")
+    MENTION_PREFIX = os.getenv("MENTION_PREFIX", "true").lower() == "true"
     
     # Base de données
     DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DATA_DIR}/bot.db")
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "200"))
+    DB_WRITE_FLUSH_INTERVAL = float(os.getenv("DB_WRITE_FLUSH_INTERVAL", "0.01"))
+    DB_CACHE_SIZE = int(os.getenv("DB_CACHE_SIZE", "5000"))
+    DB_CACHE_TTL = float(os.getenv("DB_CACHE_TTL", "300"))
+    DB_REPORT_WORKERS = int(os.getenv("DB_REPORT_WORKERS", "2"))
     
     # Interface web
     INTERFACE_SECRET = os.getenv("INTERFACE_SECRET", "change-me-in-production")
     INTERFACE_PASSWORD = os.getenv("INTERFACE_PASSWORD", "admin123")
     INTERFACE_HOST = os.getenv("INTERFACE_HOST", "127.0.0.1")
     INTERFACE_PORT = int(os.getenv("INTERFACE_PORT", "5000"))
+    # Durée de cache des statistiques du tableau de bord (secondes)
+    DASHBOARD_STATS_TTL = float(os.getenv("DASHBOARD_STATS_TTL", "5"))
+    # Flux en direct (SSE): période de suivi d'activity_logs quand l'interface tourne à part
+    LIVE_FEED_INTERVAL = float(os.getenv("LIVE_FEED_INTERVAL", "1"))
+    # Servir l'interface depuis le processus du bot (aiohttp) au lieu de web_interface.py
+    INTERFACE_EMBEDDED = os.getenv("INTERFACE_EMBEDDED", "false").lower() == "true"
     
     # Webhooks
     DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL", "")
     LOG_CHANNEL_ID = int(os.getenv("LOG_CHANNEL_ID", "0"))
     
+    # Logs: formatage et écritures dans un thread dédié (QueueHandler/QueueListener)
+    LOG_QUEUE = os.getenv("LOG_QUEUE", "true").lower() == "true"
+    
+    # Métriques: export périodique (secondes, 0 = désactivé) lu par /metrics de l'interface web
+    METRICS_EXPORT_INTERVAL = float(os.getenv("METRICS_EXPORT_INTERVAL", "15"))
+    METRICS_FILE = DATA_DIR / "metrics.prom"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+    
+    # Surveillance de la boucle asyncio: période du battement et seuil de blocage (secondes, 0 = désactivé)
+    LOOP_WATCHDOG_INTERVAL = float(os.getenv("LOOP_WATCHDOG_INTERVAL", "0.1"))
+    LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.25"))
+    
     # Fonctionnalités
     ENABLE_RSS = os.getenv("ENABLE_RSS", "true").lower() == "true"
     ENABLE_ECONOMY = os.getenv("ENABLE_ECONOMY", "true").lower() == "true"
@@ -46,7 +71,11 @@ class Config:
     # Limites
     MAX_WARNINGS = int(os.getenv("MAX_WARNINGS", "5"))
     MAX_XP_PER_MESSAGE = int(os.getenv("MAX_XP_PER_MESSAGE", "5"))
+    XP_COOLDOWN_SECONDS = int(os.getenv("XP_COOLDOWN_SECONDS", "60"))
+    XP_FLUSH_INTERVAL = float(os.getenv("XP_FLUSH_INTERVAL", "5"))
     COOLDOWN_SECONDS = int(os.getenv("COOLDOWN_SECONDS", "60"))
+    RATE_LIMIT_SWEEP_INTERVAL = float(os.getenv("RATE_LIMIT_SWEEP_INTERVAL", "60"))
+    REACTION_ROLE_DELAY = float(os.getenv("REACTION_ROLE_DELAY", "1.0"))
     
     # Economie
     DAILY_COINS = int(os.getenv("DAILY_COINS", "100"))
@@ -4,26 +4,647 @@ Gestionnaire de base de données SQLite pour le bot Discord
 import sqlite3
 import json
 import asyncio
+import time
+import threading
 import aiosqlite
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Tuple, Union, AsyncIterator, Awaitable, Callable, Iterable, Iterator
 from datetime import datetime, timedelta
 import logging
 
 from config import Config
+from utils.leaderboard import Leaderboard
+from utils.prefixes import PrefixCache
+from utils.guild_settings import GuildSettings
+from utils.community import CommunityStore
+from utils.metrics import metrics
+from utils.events import event_bus
 
 logger = logging.getLogger(__name__)
 
+def _sql_xp_level(xp: Optional[int]) -> int:
+    """Fonction SQL `xp_level(xp)`: niveau correspondant à un total d'XP"""
+    return DatabaseManager.calculate_level_from_xp(xp or 0)
+
+class ConnectionPool:
+    """Pool fixe de connexions aiosqlite ouvertes une seule fois et réutilisées"""
+    
+    # Pragmas appliqués une fois à l'ouverture de chaque connexion
+    PRAGMAS = (
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA busy_timeout = 5000",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA cache_size = -8000",
+    )
+    
+    def __init__(self, db_path: Path, size: int = 5):
+        self.db_path = db_path
+        self.size = max(1, size)
+        self._connections: List[aiosqlite.Connection] = []
+        self._available: Optional[asyncio.Queue] = None
+        self._open_lock = asyncio.Lock()
+        self._closed = False
+    
+    @property
+    def is_open(self) -> bool:
+        return self._available is not None and not self._closed
+    
+    async def open(self):
+        """Ouvre toutes les connexions du pool (idempotent)"""
+        async with self._open_lock:
+            if self.is_open:
+                return
+            
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            available: asyncio.Queue = asyncio.Queue()
+            for _ in range(self.size):
+                conn = await self.create_connection()
+                self._connections.append(conn)
+                available.put_nowait(conn)
+            
+            self._available = available
+            self._closed = False
+            logger.info(f"Pool SQLite ouvert ({self.size} connexions)")
+    
+    async def create_connection(self) -> aiosqlite.Connection:
+        """Ouvre une connexion, applique les pragmas et enregistre les fonctions SQL"""
+        conn = await aiosqlite.connect(self.db_path)
+        conn.row_factory = aiosqlite.Row
+        for pragma in self.PRAGMAS:
+            await conn.execute(pragma)
+        await conn.create_function("xp_level", 1, _sql_xp_level, deterministic=True)
+        return conn
+    
+    async def acquire(self) -> aiosqlite.Connection:
+        """Emprunte une connexion (attend si toutes sont occupées)"""
+        if not self.is_open:
+            await self.open()
+        return await self._available.get()
+    
+    async def release(self, conn: aiosqlite.Connection):
+        """Rend une connexion au pool en annulant toute transaction restée ouverte"""
+        if self._closed:
+            try:
+                await conn.close()
+            except Exception:
+                pass
+            return
+        
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+            conn.row_factory = aiosqlite.Row
+        except Exception as e:
+            logger.warning(f"Connexion SQLite invalide, remplacement: {e}")
+            conn = await self._replace(conn)
+        
+        self._available.put_nowait(conn)
+    
+    async def _replace(self, conn: aiosqlite.Connection) -> aiosqlite.Connection:
+        """Remplace une connexion défectueuse par une nouvelle"""
+        try:
+            await conn.close()
+        except Exception:
+            pass
+        new_conn = await self.create_connection()
+        self._connections = [c for c in self._connections if c is not conn] + [new_conn]
+        return new_conn
+    
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Context manager: `async with pool.connection() as db:`"""
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+    
+    async def close(self):
+        """Ferme toutes les connexions du pool"""
+        async with self._open_lock:
+            if self._available is None:
+                return
+            self._closed = True
+            
+            for conn in self._connections:
+                try:
+                    await conn.close()
+                except Exception as e:
+                    logger.warning(f"Erreur fermeture connexion SQLite: {e}")
+            
+            self._connections.clear()
+            self._available = None
+            logger.info("Pool SQLite fermé")
+
+class SnapshotReader:
+    """Connexions sqlite3 en lecture seule pour les rapports et l'interface web
+
+    Ouvertes en `mode=ro` avec `query_only`: elles ne peuvent rien écrire ni verrouiller
+    en écriture. `snapshot()` ouvre une transaction de lecture: en WAL, toutes les
+    requêtes du bloc voient le même état de la base pendant que le bot continue
+    d'écrire. `run()` exécute un rapport dans un thread dédié, sans emprunter de
+    connexion au pool (dont la file d'écriture a besoin) ni bloquer la boucle.
+    """
+    
+    PRAGMAS = (
+        "PRAGMA query_only = ON",
+        "PRAGMA busy_timeout = 5000",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA cache_size = -8000",
+    )
+    
+    def __init__(self, db_path: Path, workers: int = 2):
+        self.db_path = db_path
+        self.workers = max(1, workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._worker_connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+    
+    def connect(self) -> sqlite3.Connection:
+        """Nouvelle connexion en lecture seule (à fermer par l'appelant)"""
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        conn.create_function("xp_level", 1, _sql_xp_level, deterministic=True)
+        return conn
+    
+    @contextmanager
+    def snapshot(self) -> Iterator[sqlite3.Connection]:
+        """`with reader.snapshot() as conn:` lectures cohérentes entre elles
+        
+        Réutilise la connexion du thread de rapport, sinon en ouvre une le temps du bloc.
+        """
+        conn = getattr(self._local, 'conn', None)
+        owned = conn is None
+        if owned:
+            conn = self.connect()
+        try:
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                # Fin de la transaction de lecture: libère l'instantané (points de contrôle WAL)
+                conn.execute("ROLLBACK")
+        finally:
+            if owned:
+                conn.close()
+    
+    def _init_worker(self):
+        conn = self.connect()
+        self._local.conn = conn
+        with self._lock:
+            self._worker_connections.append(conn)
+    
+    def _call(self, func: Callable[..., Any], args: Tuple[Any, ...]) -> Any:
+        start = time.perf_counter_ns()
+        error = False
+        try:
+            with self.snapshot() as conn:
+                return func(conn, *args)
+        except BaseException:
+            error = True
+            raise
+        finally:
+            metrics.observe('db', getattr(func, '__name__', 'report'), 'report',
+                            time.perf_counter_ns() - start, error)
+    
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Exécute `func(conn, *args)` sur un instantané, dans un thread de rapport"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="db-report", initializer=self._init_worker
+            )
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._call, func, args)
+    
+    def close(self):
+        """Attend les rapports en cours puis ferme les connexions des threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._lock:
+            for conn in self._worker_connections:
+                conn.close()
+            self._worker_connections.clear()
+
+class _WriteOp:
+    """Opération d'écriture en attente dans la file"""
+    
+    __slots__ = ('sql', 'params', 'func', 'many', 'future')
+    
+    def __init__(self, future: asyncio.Future, sql: Optional[str] = None, params: Any = (),
+                 func: Optional[Callable[[aiosqlite.Connection], Awaitable[Any]]] = None, many: bool = False):
+        self.sql = sql
+        self.params = params
+        self.func = func
+        self.many = many
+        self.future = future
+    
+    async def apply(self, conn: aiosqlite.Connection) -> Any:
+        if self.func is not None:
+            return await self.func(conn)
+        if self.many:
+            cursor = await conn.executemany(self.sql, self.params)
+        else:
+            cursor = await conn.execute(self.sql, self.params)
+        result = (cursor.rowcount, cursor.lastrowid)
+        await cursor.close()
+        return result
+
+class WriteQueue:
+    """Écrivain unique: applique les écritures en file par lots transactionnels (group commit)
+    
+    Un lot est validé dès qu'il atteint `batch_size` opérations ou que `flush_interval`
+    secondes se sont écoulées (une opération isolée est validée immédiatement). Dans un lot,
+    chaque opération est isolée par un SAVEPOINT: une erreur n'annule que l'opération
+    fautive. Les futures sont résolues après le COMMIT.
+    """
+    
+    def __init__(self, pool: ConnectionPool, batch_size: int = 200,
+                 flush_interval: float = 0.01, max_pending: int = 10000):
+        self.pool = pool
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.0, flush_interval)
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+        
+        # Statistiques
+        self.batches_committed = 0
+        self.ops_committed = 0
+    
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    async def start(self):
+        """Ouvre la connexion d'écriture et démarre la tâche d'écriture"""
+        async with self._start_lock:
+            if self.is_running:
+                return
+            self._conn = await self.pool.create_connection()
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._task = asyncio.create_task(self._run(), name="sqlite-writer")
+            logger.info("File d'écriture SQLite démarrée")
+    
+    async def stop(self):
+        """Vide la file, valide les dernières écritures et ferme la connexion"""
+        async with self._start_lock:
+            if not self.is_running:
+                return
+            await self._queue.put(None)
+            await self._task
+            await self._conn.close()
+            self._task = None
+            self._conn = None
+            logger.info(
+                f"File d'écriture SQLite arrêtée ({self.ops_committed} écritures "
+                f"en {self.batches_committed} lots)"
+            )
+    
+    async def _submit(self, op_kwargs: Dict[str, Any]) -> asyncio.Future:
+        if not self.is_running:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_WriteOp(future, **op_kwargs))
+        return future
+    
+    async def _call(self, name: str, op_kwargs: Dict[str, Any]) -> Any:
+        """Soumet une opération et attend sa validation (durée mesurée, file d'attente comprise)"""
+        start = time.perf_counter_ns()
+        error = False
+        try:
+            return await (await self._submit(op_kwargs))
+        except BaseException:
+            error = True
+            raise
+        finally:
+            metrics.observe('db', name, 'writer', time.perf_counter_ns() - start, error)
+    
+    async def execute(self, sql: str, params: Iterable[Any] = ()) -> Any:
+        """Met une requête en file et attend sa validation: retourne (rowcount, lastrowid)"""
+        return await self._call('write', {'sql': sql, 'params': tuple(params)})
+    
+    async def executemany(self, sql: str, seq_of_params: Iterable[Iterable[Any]]) -> Any:
+        """Met une requête multi-lignes en file et attend sa validation"""
+        return await self._call('write_many', {'sql': sql, 'params': list(seq_of_params), 'many': True})
+    
+    async def run(self, func: Callable[[aiosqlite.Connection], Awaitable[Any]]) -> Any:
+        """Exécute `func(conn)` dans la transaction du lot et retourne son résultat
+        
+        `func` ne doit ni valider ni annuler la transaction elle-même.
+        """
+        return await self._call('write_func', {'func': func})
+    
+    async def fetchone(self, sql: str, params: Iterable[Any] = ()) -> Optional[Dict]:
+        """Exécute une écriture avec clause RETURNING et retourne la première ligne"""
+        async def _fetch(conn: aiosqlite.Connection) -> Optional[Dict]:
+            async with conn.execute(sql, tuple(params)) as cursor:
+                row = await cursor.fetchone()
+            return dict(row) if row else None
+        return await self.run(_fetch)
+    
+    async def enqueue(self, sql: str, params: Iterable[Any] = ()):
+        """Met une requête en file sans attendre sa validation (erreurs journalisées)"""
+        future = await self._submit({'sql': sql, 'params': tuple(params)})
+        future.add_done_callback(self._log_failure)
+    
+    @staticmethod
+    def _log_failure(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Écriture SQLite différée échouée: {future.exception()}")
+    
+    async def _run(self):
+        """Boucle de l'écrivain: regroupe les opérations et les valide par lots"""
+        stopping = False
+        while not stopping:
+            op = await self._queue.get()
+            if op is None:
+                break
+            batch = [op]
+            
+            # Une opération isolée est validée tout de suite; en rafale, on attend
+            # jusqu'à `flush_interval` pour remplir le lot
+            stopping = self._drain(batch)
+            if not stopping and 1 < len(batch) < self.batch_size and self.flush_interval:
+                await asyncio.sleep(self.flush_interval)
+                stopping = self._drain(batch)
+            
+            start = time.perf_counter_ns()
+            await self._apply(batch)
+            metrics.observe('db', 'commit_batch', 'writer', time.perf_counter_ns() - start)
+    
+    def _drain(self, batch: List[_WriteOp]) -> bool:
+        """Ajoute au lot les opérations déjà en file; retourne True si l'arrêt est demandé"""
+        while len(batch) < self.batch_size:
+            try:
+                op = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return False
+            if op is None:
+                return True
+            batch.append(op)
+        return False
+    
+    async def _apply(self, batch: List[_WriteOp]):
+        """Applique un lot dans une transaction unique"""
+        conn = self._conn
+        outcomes = []
+        isolate = len(batch) > 1
+        try:
+            await conn.execute("BEGIN IMMEDIATE")
+            for op in batch:
+                if not isolate:
+                    outcomes.append((op, await op.apply(conn), None))
+                    break
+                await conn.execute("SAVEPOINT write_op")
+                try:
+                    result = await op.apply(conn)
+                except Exception as e:
+                    await conn.execute("ROLLBACK TO write_op")
+                    await conn.execute("RELEASE write_op")
+                    outcomes.append((op, None, e))
+                    continue
+                await conn.execute("RELEASE write_op")
+                outcomes.append((op, result, None))
+            await conn.commit()
+        except Exception as e:
+            logger.error(f"Échec du lot d'écriture SQLite ({len(batch)} opérations): {e}")
+            try:
+                await conn.rollback()
+            except Exception:
+                pass
+            for op in batch:
+                if not op.future.done():
+                    op.future.set_exception(e)
+            return
+        
+        self.batches_committed += 1
+        self.ops_committed += len(batch)
+        for op, result, error in outcomes:
+            if op.future.done():
+                continue
+            if error is not None:
+                op.future.set_exception(error)
+            else:
+                op.future.set_result(result)
+
+class RowCache:
+    """Cache LRU borné avec expiration (TTL) pour les lignes les plus lues"""
+    
+    def __init__(self, max_size: int = 5000, ttl: float = 300.0):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Horloge incrémentée à chaque invalidation; chaque clé garde la date de sa
+        # dernière invalidation: une lecture commencée avant une écriture sur cette
+        # clé ne doit pas remettre en cache une ligne périmée (les autres clés ne
+        # sont pas concernées)
+        self.version = 0
+        self._invalidated: "OrderedDict[Any, int]" = OrderedDict()
+        # Date de la plus récente invalidation oubliée (registre borné): les lectures
+        # plus anciennes sont refusées par prudence
+        self._floor = 0
+    
+    def get(self, key: Any) -> Optional[Dict]:
+        """Retourne une copie de la ligne en cache, ou None (absente ou expirée)"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, row = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        
+        self._data.move_to_end(key)
+        self.hits += 1
+        return dict(row)
+    
+    def set(self, key: Any, row: Dict, version: Optional[int] = None):
+        """Ajoute ou remplace une ligne, en évinçant la moins récemment utilisée
+        
+        Si la clé a été invalidée depuis `version` (lue avant la requête), la ligne est ignorée.
+        """
+        if version is not None and (version < self._floor or self._invalidated.get(key, 0) > version):
+            return
+        self._data[key] = (time.monotonic() + self.ttl, dict(row))
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, key: Any):
+        """Retire une ligne du cache (à appeler après chaque écriture)"""
+        self.version += 1
+        self._invalidated[key] = self.version
+        self._invalidated.move_to_end(key)
+        while len(self._invalidated) > self.max_size:
+            _, self._floor = self._invalidated.popitem(last=False)
+        self._data.pop(key, None)
+    
+    def clear(self):
+        self._data.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs pour dimensionner le cache"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
 class DatabaseManager:
     """Gestionnaire principal de la base de données"""
     
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(self, db_path: Optional[Path] = None, pool_size: Optional[int] = None):
         self.db_path = db_path or Config.DATA_DIR / "bot.db"
-        self.connection_pool = {}
+        self.pool = ConnectionPool(self.db_path, pool_size or Config.DB_POOL_SIZE)
+        self.writer = WriteQueue(
+            self.pool,
+            batch_size=Config.DB_WRITE_BATCH_SIZE,
+            flush_interval=Config.DB_WRITE_FLUSH_INTERVAL
+        )
+        
+        # Lectures lourdes (statistiques, interface web) hors du pool, en lecture seule
+        self.reader = SnapshotReader(self.db_path, Config.DB_REPORT_WORKERS)
+        
+        # Caches de lecture des lignes `users` (clé: user_id) et `members` (clé: (guild_id, user_id))
+        self.user_cache = RowCache(Config.DB_CACHE_SIZE, Config.DB_CACHE_TTL)
+        self.member_cache = RowCache(Config.DB_CACHE_SIZE, Config.DB_CACHE_TTL)
+        
+        # Classements XP / pièces par serveur, tenus à jour à chaque écriture
+        self.leaderboard = Leaderboard()
+        
+        # Préfixes de commandes par serveur (lus à chaque message, sans E/S)
+        self.prefixes = PrefixCache(Config.COMMAND_PREFIX, Config.MENTION_PREFIX)
+        
+        # Configuration des serveurs (bienvenue, logs, tickets, reaction-roles)
+        self.settings = GuildSettings(self)
+        
+        # Citations, suggestions, tags, auto-réactions et AFK (commandes legacy)
+        self.community = CommunityStore(self)
+        
+        # Accumulateur d'XP (s'enregistre à sa création): à prévenir des autres écritures d'XP
+        self.xp_accumulator: Optional["XPAccumulator"] = None
+    
+    def acquire(self):
+        """Emprunte une connexion du pool: `async with db_manager.acquire() as db:`"""
+        return self.pool.connection()
+    
+    def snapshot(self):
+        """Instantané en lecture seule (code synchrone): `with db_manager.snapshot() as conn:`"""
+        return self.reader.snapshot()
+    
+    async def run_report(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Exécute un rapport `func(conn, *args)` (sqlite3, lecture seule) dans un thread dédié"""
+        return await self.reader.run(func, *args)
+    
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Compteurs des caches de lecture"""
+        return {
+            'users': self.user_cache.stats(),
+            'members': self.member_cache.stats()
+        }
+    
+    async def load_leaderboards(self):
+        """Reconstruit les classements en mémoire depuis `members` (au démarrage)"""
+        self.leaderboard.clear()
+        count = 0
+        async with self.acquire() as db:
+            # Parcours dans l'ordre des index idx_members_guild_xp_user / idx_members_guild_coins_user
+            for metric in self.leaderboard.METRICS:
+                async with db.execute(f"""
+                    SELECT guild_id, user_id, {metric} FROM members
+                    ORDER BY guild_id, {metric} DESC
+                """) as cursor:
+                    async for guild_id, user_id, score in cursor:
+                        self.leaderboard.update(guild_id, metric, user_id, score or 0)
+                        count += 1
+        self.leaderboard.loaded = True
+        logger.info(f"🏆 Classements chargés ({count} entrées)")
+    
+    @metrics.timed('db', 'leaderboard_member', 'read')
+    async def restore_leaderboard_member(self, guild_id: int, user_id: int):
+        """Réinscrit un membre revenu sur le serveur avec ses scores enregistrés"""
+        async with self.acquire() as db:
+            async with db.execute(
+                "SELECT xp, coins FROM members WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id)
+            ) as cursor:
+                row = await cursor.fetchone()
+        if row is not None:
+            self.leaderboard.update(guild_id, 'xp', user_id, row[0] or 0)
+            self.leaderboard.update(guild_id, 'coins', user_id, row[1] or 0)
+    
+    async def load_prefixes(self):
+        """Charge les préfixes personnalisés de `guilds` (au démarrage)"""
+        async with self.acquire() as db:
+            async with db.execute("SELECT id, prefix FROM guilds WHERE prefix IS NOT NULL") as cursor:
+                count = self.prefixes.load(await cursor.fetchall())
+        logger.info(f"🔤 Préfixes personnalisés chargés ({count} serveurs)")
+    
+    async def set_guild_prefixes(self, guild_id: int, prefixes: Iterable[str],
+                                 name: Optional[str] = None, owner_id: Optional[int] = None) -> Tuple[str, ...]:
+        """Enregistre les préfixes d'un serveur (écriture puis cache); ValueError si invalides"""
+        prefixes = self.prefixes.validate(prefixes)
+        await self.writer.execute("""
+            INSERT INTO guilds (id, name, owner_id, prefix) VALUES (?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET prefix = excluded.prefix
+        """, (guild_id, name, owner_id, self.prefixes.serialize(prefixes)))
+        self.prefixes.put(guild_id, prefixes)
+        return prefixes
+    
+    async def record_command(self):
+        """Compte une commande exécutée dans `daily_stats` (écriture différée)"""
+        await self.writer.enqueue("""
+            INSERT INTO daily_stats (day, commands) VALUES (date('now', 'localtime'), 1)
+            ON CONFLICT(day) DO UPDATE SET commands = commands + 1
+        """)
+        event_bus.publish(event_bus.STATS_DELTA, {'commands_today': 1})
+    
+    async def log_activity(self, guild_id: Optional[int], user_id: Optional[int],
+                           action_type: str, action_data: str = ""):
+        """Ajoute une ligne à `activity_logs` (écriture différée) et la publie sur le flux en direct"""
+        await self.writer.enqueue("""
+            INSERT INTO activity_logs (guild_id, user_id, action_type, action_data)
+            VALUES (?, ?, ?, ?)
+        """, (guild_id, user_id, action_type, action_data))
+        event_bus.publish(event_bus.ACTIVITY, {
+            'guild_id': guild_id,
+            'user_id': user_id,
+            'action_type': action_type,
+            'description': action_data,
+            'timestamp': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        })
+    
+    async def close(self):
+        """Vide la file d'écriture puis ferme le pool (à appeler à l'arrêt du bot)"""
+        await self.writer.stop()
+        await asyncio.to_thread(self.reader.close)
+        await self.pool.close()
         
     async def init_database(self):
         """Initialise la base de données avec toutes les tables"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.acquire() as db:
             await db.executescript("""
                 -- Guildes
                 CREATE TABLE IF NOT EXISTS guilds (
@@ -290,6 +911,14 @@ class DatabaseManager:
                     FOREIGN KEY (guild_id) REFERENCES guilds(id)
                 );
 
+                -- Fins de timeout planifiées par /timeout (rechargées au démarrage)
+                CREATE TABLE IF NOT EXISTS pending_unmutes (
+                    guild_id INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    until REAL NOT NULL,
+                    PRIMARY KEY (guild_id, user_id)
+                );
+
                 -- Reaction-roles
                 CREATE TABLE IF NOT EXISTS reaction_roles (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -347,8 +976,124 @@ class DatabaseManager:
                     FOREIGN KEY (guild_id) REFERENCES guilds(id)
                 );
 
+                -- Compteurs du tableau de bord (tenus à jour par les déclencheurs ci-dessous)
+                CREATE TABLE IF NOT EXISTS stats_counters (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL DEFAULT 0
+                );
+                
+                -- Commandes exécutées par jour (date locale)
+                CREATE TABLE IF NOT EXISTS daily_stats (
+                    day TEXT PRIMARY KEY,
+                    commands INTEGER NOT NULL DEFAULT 0
+                );
+                
+                -- Valeurs initiales (une seule fois: les lignes existantes sont conservées)
+                INSERT OR IGNORE INTO stats_counters (name, value) SELECT 'guilds', COUNT(*) FROM guilds;
+                INSERT OR IGNORE INTO stats_counters (name, value) SELECT 'users', COUNT(*) FROM users;
+                
+                CREATE TRIGGER IF NOT EXISTS trg_guilds_count_insert AFTER INSERT ON guilds BEGIN
+                    UPDATE stats_counters SET value = value + 1 WHERE name = 'guilds';
+                END;
+                CREATE TRIGGER IF NOT EXISTS trg_guilds_count_delete AFTER DELETE ON guilds BEGIN
+                    UPDATE stats_counters SET value = value - 1 WHERE name = 'guilds';
+                END;
+                CREATE TRIGGER IF NOT EXISTS trg_users_count_insert AFTER INSERT ON users BEGIN
+                    UPDATE stats_counters SET value = value + 1 WHERE name = 'users';
+                END;
+                CREATE TRIGGER IF NOT EXISTS trg_users_count_delete AFTER DELETE ON users BEGIN
+                    UPDATE stats_counters SET value = value - 1 WHERE name = 'users';
+                END;
+                
+                -- Totaux par serveur des pages économie/modération (tenus à jour par déclencheurs)
+                CREATE TABLE IF NOT EXISTS guild_stats (
+                    guild_id INTEGER PRIMARY KEY,
+                    members INTEGER NOT NULL DEFAULT 0,
+                    coins INTEGER NOT NULL DEFAULT 0,
+                    banned INTEGER NOT NULL DEFAULT 0,
+                    warned INTEGER NOT NULL DEFAULT 0
+                );
+                
+                -- Calcul initial (une seule fois, marqué dans stats_counters)
+                INSERT INTO guild_stats (guild_id, members, coins, banned, warned)
+                SELECT guild_id, COUNT(*), COALESCE(SUM(coins), 0),
+                       SUM(COALESCE(is_banned, 0) != 0), SUM(COALESCE(warnings, 0) > 0)
+                FROM members
+                WHERE NOT EXISTS (SELECT 1 FROM stats_counters WHERE name = 'guild_stats_seeded')
+                GROUP BY guild_id;
+                INSERT OR IGNORE INTO stats_counters (name, value) VALUES ('guild_stats_seeded', 1);
+                
+                CREATE TRIGGER IF NOT EXISTS trg_members_stats_insert AFTER INSERT ON members BEGIN
+                    INSERT INTO guild_stats (guild_id, members, coins, banned, warned)
+                    VALUES (NEW.guild_id, 1, COALESCE(NEW.coins, 0),
+                            COALESCE(NEW.is_banned, 0) != 0, COALESCE(NEW.warnings, 0) > 0)
+                    ON CONFLICT(guild_id) DO UPDATE SET
+                        members = members + 1,
+                        coins = coins + excluded.coins,
+                        banned = banned + excluded.banned,
+                        warned = warned + excluded.warned;
+                END;
+                CREATE TRIGGER IF NOT EXISTS trg_members_stats_delete AFTER DELETE ON members BEGIN
+                    UPDATE guild_stats SET
+                        members = members - 1,
+                        coins = coins - COALESCE(OLD.coins, 0),
+                        banned = banned - (COALESCE(OLD.is_banned, 0) != 0),
+                        warned = warned - (COALESCE(OLD.warnings, 0) > 0)
+                    WHERE guild_id = OLD.guild_id;
+                END;
+                -- Les mises à jour d'XP ne touchent pas ces colonnes: pas de surcoût par message
+                CREATE TRIGGER IF NOT EXISTS trg_members_stats_update
+                AFTER UPDATE OF coins, is_banned, warnings ON members
+                WHEN NEW.coins IS NOT OLD.coins OR NEW.is_banned IS NOT OLD.is_banned
+                     OR NEW.warnings IS NOT OLD.warnings
+                BEGIN
+                    UPDATE guild_stats SET
+                        coins = coins + COALESCE(NEW.coins, 0) - COALESCE(OLD.coins, 0),
+                        banned = banned + (COALESCE(NEW.is_banned, 0) != 0) - (COALESCE(OLD.is_banned, 0) != 0),
+                        warned = warned + (COALESCE(NEW.warnings, 0) > 0) - (COALESCE(OLD.warnings, 0) > 0)
+                    WHERE guild_id = NEW.guild_id;
+                END;
+                
+                -- members.warnings = avertissements actifs (table warnings), pour les totaux et le tri
+                CREATE TRIGGER IF NOT EXISTS trg_warnings_member_insert
+                AFTER INSERT ON warnings WHEN COALESCE(NEW.active, 0) != 0
+                BEGIN
+                    INSERT INTO members (user_id, guild_id, warnings) VALUES (NEW.user_id, NEW.guild_id, 1)
+                    ON CONFLICT(user_id, guild_id) DO UPDATE SET warnings = COALESCE(warnings, 0) + 1;
+                END;
+                CREATE TRIGGER IF NOT EXISTS trg_warnings_member_update
+                AFTER UPDATE OF active ON warnings
+                WHEN (COALESCE(NEW.active, 0) != 0) != (COALESCE(OLD.active, 0) != 0)
+                BEGIN
+                    UPDATE members SET warnings = MAX(0, COALESCE(warnings, 0)
+                        + CASE WHEN COALESCE(NEW.active, 0) != 0 THEN 1 ELSE -1 END)
+                    WHERE user_id = NEW.user_id AND guild_id = NEW.guild_id;
+                END;
+                CREATE TRIGGER IF NOT EXISTS trg_warnings_member_delete
+                AFTER DELETE ON warnings WHEN COALESCE(OLD.active, 0) != 0
+                BEGIN
+                    UPDATE members SET warnings = MAX(0, COALESCE(warnings, 0) - 1)
+                    WHERE user_id = OLD.user_id AND guild_id = OLD.guild_id;
+                END;
+                
+                -- Recalcul initial (une seule fois): guild_stats suit via trg_members_stats_update
+                UPDATE members SET warnings = (
+                    SELECT COUNT(*) FROM warnings w
+                    WHERE w.user_id = members.user_id AND w.guild_id = members.guild_id
+                      AND COALESCE(w.active, 0) != 0
+                )
+                WHERE NOT EXISTS (SELECT 1 FROM stats_counters WHERE name = 'member_warnings_seeded');
+                INSERT OR IGNORE INTO stats_counters (name, value) VALUES ('member_warnings_seeded', 1);
+
                 -- Index pour optimiser les performances
-                CREATE INDEX IF NOT EXISTS idx_members_guild_xp ON members(guild_id, xp DESC);
+                -- Classements et pagination par clé (score, user_id) des pages d'administration
+                DROP INDEX IF EXISTS idx_members_guild_xp;
+                DROP INDEX IF EXISTS idx_members_guild_coins;
+                CREATE INDEX IF NOT EXISTS idx_members_guild_xp_user ON members(guild_id, xp DESC, user_id DESC);
+                CREATE INDEX IF NOT EXISTS idx_members_guild_coins_user ON members(guild_id, coins DESC, user_id DESC);
+                CREATE INDEX IF NOT EXISTS idx_members_guild_warnings_user ON members(guild_id, warnings DESC, user_id DESC);
+                -- Recherche par préfixe de nom (LIKE insensible à la casse)
+                CREATE INDEX IF NOT EXISTS idx_users_username ON users(username COLLATE NOCASE, id);
                 CREATE INDEX IF NOT EXISTS idx_warnings_user_guild ON warnings(user_id, guild_id, active);
                 CREATE INDEX IF NOT EXISTS idx_activity_logs_guild_time ON activity_logs(guild_id, timestamp DESC);
                 CREATE INDEX IF NOT EXISTS idx_tags_guild_name ON tags(guild_id, name);
@@ -357,13 +1102,20 @@ class DatabaseManager:
                 CREATE INDEX IF NOT EXISTS idx_reminders_user_time ON reminders(user_id, remind_at);
                 CREATE INDEX IF NOT EXISTS idx_reaction_roles_message ON reaction_roles(message_id);
                 CREATE INDEX IF NOT EXISTS idx_giveaways_guild_ended ON giveaways(guild_id, ended);
+                CREATE INDEX IF NOT EXISTS idx_reminders_pending ON reminders(sent, remind_at);
+                CREATE INDEX IF NOT EXISTS idx_giveaways_pending ON giveaways(ended, end_time);
+                CREATE INDEX IF NOT EXISTS idx_polls_active_end ON polls(active, end_time);
                 CREATE INDEX IF NOT EXISTS idx_user_notes_user ON user_notes(guild_id, user_id);
             """)
             await db.commit()
             logger.info("Base de données initialisée avec succès")
     
     async def migrate_from_json(self, json_file: Path):
-        """Migre les données depuis l'ancien fichier JSON"""
+        """Importe une fois les données de l'ancien fichier JSON (en une transaction)
+        
+        Relancer l'import sur le même fichier n'ajoute pas de doublons: les citations
+        et suggestions déjà présentes (même serveur, même contenu) sont ignorées.
+        """
         if not json_file.exists():
             logger.warning(f"Fichier JSON {json_file} introuvable pour la migration")
             return
@@ -372,51 +1124,61 @@ class DatabaseManager:
             with open(json_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
-            async with aiosqlite.connect(self.db_path) as db:
+            async def _import(db: aiosqlite.Connection):
                 # Migration des tags
-                for guild_id, tags in data.get('tags_store', {}).items():
-                    for tag_name, content in tags.items():
-                        await db.execute("""
-                            INSERT OR REPLACE INTO tags (guild_id, name, content, author_id)
-                            VALUES (?, ?, ?, ?)
-                        """, (int(guild_id), tag_name, content, 0))
+                await db.executemany("""
+                    INSERT OR REPLACE INTO tags (guild_id, name, content, author_id)
+                    VALUES (?, ?, ?, ?)
+                """, [(int(guild_id), tag_name, content, 0)
+                      for guild_id, tags in data.get('tags_store', {}).items()
+                      for tag_name, content in tags.items()])
                 
                 # Migration des auto-réactions
-                for guild_id, reacts in data.get('auto_react_store', {}).items():
-                    for trigger, emoji in reacts.items():
-                        await db.execute("""
-                            INSERT OR REPLACE INTO auto_reactions (guild_id, trigger_word, emoji, created_by)
-                            VALUES (?, ?, ?, ?)
-                        """, (int(guild_id), trigger, emoji, 0))
+                await db.executemany("""
+                    INSERT OR REPLACE INTO auto_reactions (guild_id, trigger_word, emoji, created_by)
+                    VALUES (?, ?, ?, ?)
+                """, [(int(guild_id), trigger, emoji, 0)
+                      for guild_id, reacts in data.get('auto_react_store', {}).items()
+                      for trigger, emoji in reacts.items()])
                 
                 # Migration des suggestions
-                for guild_id, suggestions in data.get('suggestions_store', {}).items():
-                    for suggestion in suggestions:
-                        await db.execute("""
-                            INSERT INTO suggestions (guild_id, author_id, content, status)
-                            VALUES (?, ?, ?, ?)
-                        """, (int(guild_id), suggestion.get('author_id', 0), 
-                             suggestion.get('content', ''), suggestion.get('status', 'open')))
+                await db.executemany("""
+                    INSERT INTO suggestions (guild_id, author_id, content, status)
+                    SELECT ?1, ?2, ?3, ?4
+                    WHERE NOT EXISTS (SELECT 1 FROM suggestions WHERE guild_id = ?1 AND content = ?3)
+                """, [(int(guild_id), suggestion.get('author_id', 0),
+                       suggestion.get('content', ''), suggestion.get('status', 'open'))
+                      for guild_id, suggestions in data.get('suggestions_store', {}).items()
+                      for suggestion in suggestions])
                 
                 # Migration des citations
-                for guild_id, quotes in data.get('quotes_store', {}).items():
-                    for quote in quotes:
-                        await db.execute("""
-                            INSERT INTO quotes (guild_id, content, added_by)
-                            VALUES (?, ?, ?)
-                        """, (int(guild_id), quote, 0))
+                await db.executemany("""
+                    INSERT INTO quotes (guild_id, content, added_by)
+                    SELECT ?1, ?2, ?3
+                    WHERE NOT EXISTS (SELECT 1 FROM quotes WHERE guild_id = ?1 AND content = ?2)
+                """, [(int(guild_id), quote, 0)
+                      for guild_id, quotes in data.get('quotes_store', {}).items()
+                      for quote in quotes])
                 
-                # Migration de l'XP
-                for guild_id, users_xp in data.get('xp_store', {}).items():
-                    for user_id, xp in users_xp.items():
-                        level = self.calculate_level_from_xp(xp)
-                        await db.execute("""
-                            INSERT OR REPLACE INTO members (user_id, guild_id, xp, level)
-                            VALUES (?, ?, ?, ?)
-                        """, (int(user_id), int(guild_id), xp, level))
+                # Migration des statuts AFK
+                await db.executemany("""
+                    INSERT OR REPLACE INTO afk_status (user_id, guild_id, reason)
+                    VALUES (?, ?, ?)
+                """, [(int(user_id), int(guild_id), reason)
+                      for guild_id, users in data.get('afk_store', {}).items()
+                      for user_id, reason in users.items()])
                 
-                await db.commit()
-                logger.info("Migration depuis JSON terminée avec succès")
+                # Migration de l'XP (UPSERT: un REPLACE ne déclencherait pas trg_members_stats_delete)
+                await db.executemany("""
+                    INSERT INTO members (user_id, guild_id, xp, level)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(user_id, guild_id) DO UPDATE SET xp = excluded.xp, level = excluded.level
+                """, [(int(user_id), int(guild_id), xp, self.calculate_level_from_xp(xp))
+                      for guild_id, users_xp in data.get('xp_store', {}).items()
+                      for user_id, xp in users_xp.items()])
+            
+            await self.writer.run(_import)
+            logger.info("Migration depuis JSON terminée avec succès")
                 
         except Exception as e:
             logger.error(f"Erreur lors de la migration JSON: {e}")
@@ -436,110 +1198,137 @@ class DatabaseManager:
 class UserManager:
     """Gestionnaire des utilisateurs et membres"""
     
-    def __init__(self, db_path: Path):
-        self.db_path = db_path
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self.db_path = db.db_path
+    
+    async def _read_or_insert(self, name: str, select_sql: str, insert_sql: str, key: Tuple[Any, ...],
+                              insert_params: Tuple[Any, ...]) -> Optional[Dict]:
+        """Lecture sur le pool (mesurée sous `name`); la file d'écriture n'est sollicitée que si la ligne manque"""
+        with metrics.timer('db', name, 'read'):
+            async with self.db.acquire() as db:
+                async with db.execute(select_sql, key) as cursor:
+                    row = await cursor.fetchone()
+        if row is not None:
+            return dict(row)
+        
+        row = await self.db.writer.fetchone(insert_sql, insert_params)
+        if row is not None:
+            return row
+        # Insérée entre-temps par une autre tâche (DO NOTHING ne retourne rien): relire
+        async with self.db.acquire() as db:
+            async with db.execute(select_sql, key) as cursor:
+                row = await cursor.fetchone()
+        return dict(row) if row is not None else None
     
     async def get_or_create_user(self, user_id: int, username: Optional[str] = None) -> Dict:
-        """Récupère ou crée un utilisateur"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            
-            async with db.execute("SELECT * FROM users WHERE id = ?", (user_id,)) as cursor:
-                user = await cursor.fetchone()
-                
-            if not user:
-                await db.execute("""
-                    INSERT INTO users (id, username) VALUES (?, ?)
-                """, (user_id, username or f"User{user_id}"))
-                await db.commit()
-                
-                async with db.execute("SELECT * FROM users WHERE id = ?", (user_id,)) as cursor:
-                    user = await cursor.fetchone()
-                
-        return dict(user) if user else {}
+        """Récupère un utilisateur, créé s'il n'existe pas encore"""
+        cached = self.db.user_cache.get(user_id)
+        if cached is not None:
+            return cached
+        version = self.db.user_cache.version
+        
+        user = await self._read_or_insert(
+            'user',
+            "SELECT * FROM users WHERE id = ?",
+            """
+            INSERT INTO users (id, username) VALUES (?, ?)
+            ON CONFLICT(id) DO NOTHING
+            RETURNING *
+            """,
+            (user_id,), (user_id, username or f"User{user_id}")
+        )
+        
+        if not user:
+            return {}
+        self.db.user_cache.set(user_id, user, version)
+        return user
     
     async def get_member_data(self, user_id: int, guild_id: int) -> Dict:
-        """Récupère les données d'un membre"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            
-            async with db.execute("""
-                SELECT * FROM members WHERE user_id = ? AND guild_id = ?
-            """, (user_id, guild_id)) as cursor:
-                member = await cursor.fetchone()
-                
-            if not member:
-                await db.execute("""
-                    INSERT INTO members (user_id, guild_id) VALUES (?, ?)
-                """, (user_id, guild_id))
-                await db.commit()
-                
-                async with db.execute("""
-                    SELECT * FROM members WHERE user_id = ? AND guild_id = ?
-                """, (user_id, guild_id)) as cursor:
-                    member = await cursor.fetchone()
-                    
-        return dict(member) if member else {}
+        """Récupère les données d'un membre, créé s'il n'existe pas encore"""
+        cached = self.db.member_cache.get((guild_id, user_id))
+        if cached is not None:
+            return cached
+        version = self.db.member_cache.version
+        
+        member = await self._read_or_insert(
+            'member',
+            "SELECT * FROM members WHERE user_id = ? AND guild_id = ?",
+            """
+            INSERT INTO members (user_id, guild_id) VALUES (?, ?)
+            ON CONFLICT(user_id, guild_id) DO NOTHING
+            RETURNING *
+            """,
+            (user_id, guild_id), (user_id, guild_id)
+        )
+        
+        if not member:
+            return {}
+        self.db.member_cache.set((guild_id, user_id), member, version)
+        return member
     
     async def add_xp(self, user_id: int, guild_id: int, xp_amount: int) -> Dict:
         """Ajoute de l'XP à un utilisateur"""
-        await self.get_member_data(user_id, guild_id)  # S'assurer que le membre existe
+        try:
+            current = await self.db.writer.fetchone("""
+                INSERT INTO members (user_id, guild_id, xp, level) VALUES (?, ?, ?, xp_level(?))
+                ON CONFLICT(user_id, guild_id) DO UPDATE SET
+                    xp = members.xp + excluded.xp,
+                    level = xp_level(members.xp + excluded.xp)
+                RETURNING xp, level
+            """, (user_id, guild_id, xp_amount, xp_amount))
+        finally:
+            self.db.member_cache.invalidate((guild_id, user_id))
+            if self.db.xp_accumulator is not None:
+                self.db.xp_accumulator.forget(guild_id, user_id)
         
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            
-            # Récupérer l'XP actuel
-            async with db.execute("""
-                SELECT xp, level FROM members WHERE user_id = ? AND guild_id = ?
-            """, (user_id, guild_id)) as cursor:
-                current = await cursor.fetchone()
-                
-            current_xp = current['xp'] if current else 0
-            current_level = current['level'] if current else 1
-            new_xp = current_xp + xp_amount
-            new_level = DatabaseManager.calculate_level_from_xp(new_xp)
-            
-            await db.execute("""
-                UPDATE members SET xp = ?, level = ? WHERE user_id = ? AND guild_id = ?
-            """, (new_xp, new_level, user_id, guild_id))
-            await db.commit()
-            
-            return {
-                'old_xp': current_xp,
-                'new_xp': new_xp,
-                'old_level': current_level,
-                'new_level': new_level,
-                'level_up': new_level > current_level
-            }
+        new_xp = current['xp']
+        new_level = current['level']
+        self.db.leaderboard.update(guild_id, 'xp', user_id, new_xp)
+        current_xp = new_xp - xp_amount
+        current_level = DatabaseManager.calculate_level_from_xp(current_xp)
+        
+        return {
+            'old_xp': current_xp,
+            'new_xp': new_xp,
+            'old_level': current_level,
+            'new_level': new_level,
+            'level_up': new_level > current_level
+        }
 
 class EconomyManager:
     """Gestionnaire de l'économie"""
     
-    def __init__(self, db_path: Path):
-        self.db_path = db_path
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self.db_path = db.db_path
     
     async def get_balance(self, user_id: int, guild_id: int) -> int:
         """Récupère le solde d'un utilisateur"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            
-            async with db.execute("""
-                SELECT coins FROM members WHERE user_id = ? AND guild_id = ?
-            """, (user_id, guild_id)) as cursor:
-                result = await cursor.fetchone()
-                return result['coins'] if result else 0
+        cached = self.db.member_cache.get((guild_id, user_id))
+        if cached is not None:
+            return cached['coins']
+        
+        with metrics.timer('db', 'balance', 'read'):
+            async with self.db.acquire() as db:
+                db.row_factory = aiosqlite.Row
+                
+                async with db.execute("""
+                    SELECT coins FROM members WHERE user_id = ? AND guild_id = ?
+                """, (user_id, guild_id)) as cursor:
+                    result = await cursor.fetchone()
+        return result['coins'] if result else 0
     
     async def add_coins(self, user_id: int, guild_id: int, amount: int, reason: str = "Unknown") -> int:
-        """Ajoute des pièces à un utilisateur"""
-        # S'assurer que l'utilisateur existe dans members
-        user_mgr = UserManager(self.db_path)
-        await user_mgr.get_member_data(user_id, guild_id)
-        
-        async with aiosqlite.connect(self.db_path) as db:
-            # Mettre à jour le solde
-            await db.execute("""
-                UPDATE members SET coins = coins + ? WHERE user_id = ? AND guild_id = ?
-            """, (amount, user_id, guild_id))
+        """Ajoute des pièces à un utilisateur et retourne le nouveau solde"""
+        async def _apply(db: aiosqlite.Connection) -> int:
+            # Créer le membre si besoin et mettre à jour le solde en une requête
+            async with db.execute("""
+                INSERT INTO members (user_id, guild_id, coins) VALUES (?, ?, ?)
+                ON CONFLICT(user_id, guild_id) DO UPDATE SET coins = members.coins + excluded.coins
+                RETURNING coins
+            """, (user_id, guild_id, amount)) as cursor:
+                result = await cursor.fetchone()
             
             # Enregistrer la transaction
             await db.execute("""
@@ -547,42 +1336,317 @@ class EconomyManager:
                 VALUES (?, ?, ?, ?, ?)
             """, (guild_id, user_id, amount, "add", reason))
             
-            await db.commit()
-            return await self.get_balance(user_id, guild_id)
+            return result['coins']
+        
+        try:
+            balance = await self.db.writer.run(_apply)
+        finally:
+            self.db.member_cache.invalidate((guild_id, user_id))
+        
+        self.db.leaderboard.update(guild_id, 'coins', user_id, balance)
+        return balance
+    
+    async def apply_ledger(self, guild_id: int, entries: Iterable[Tuple[int, int, str]],
+                           transaction_type: str = "add") -> Optional[Dict[int, int]]:
+        """Applique atomiquement un lot de crédits/débits `(user_id, montant, raison)`
+        
+        Les soldes sont vérifiés puis tous les mouvements et leurs lignes
+        `economy_transactions` sont écrits dans la même transaction. Retourne les
+        nouveaux soldes par utilisateur, ou None (rien n'est écrit) si un débit
+        rendrait un solde négatif.
+        """
+        entries = [(user_id, amount, reason) for user_id, amount, reason in entries]
+        if not entries:
+            return {}
+        
+        deltas: Dict[int, int] = {}
+        for user_id, amount, _ in entries:
+            deltas[user_id] = deltas.get(user_id, 0) + amount
+        
+        async def _apply(db: aiosqlite.Connection) -> Optional[Dict[int, int]]:
+            placeholders = ", ".join("?" * len(deltas))
+            async with db.execute(f"""
+                SELECT user_id, coins FROM members
+                WHERE guild_id = ? AND user_id IN ({placeholders})
+            """, (guild_id, *deltas)) as cursor:
+                balances = {row['user_id']: row['coins'] for row in await cursor.fetchall()}
+            
+            new_balances = {
+                user_id: balances.get(user_id, 0) + delta
+                for user_id, delta in deltas.items()
+            }
+            if any(balance < 0 and deltas[user_id] < 0 for user_id, balance in new_balances.items()):
+                return None
+            
+            await db.executemany("""
+                INSERT INTO members (user_id, guild_id, coins) VALUES (?, ?, ?)
+                ON CONFLICT(user_id, guild_id) DO UPDATE SET coins = members.coins + excluded.coins
+            """, [(user_id, guild_id, delta) for user_id, delta in deltas.items()])
+            
+            await db.executemany("""
+                INSERT INTO economy_transactions (guild_id, user_id, amount, transaction_type, description)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(guild_id, user_id, amount, transaction_type, reason) for user_id, amount, reason in entries])
+            
+            return new_balances
+        
+        try:
+            new_balances = await self.db.writer.run(_apply)
+        finally:
+            for user_id in deltas:
+                self.db.member_cache.invalidate((guild_id, user_id))
+        
+        if new_balances is not None:
+            for user_id, balance in new_balances.items():
+                self.db.leaderboard.update(guild_id, 'coins', user_id, balance)
+        return new_balances
+    
+    async def transfer(self, from_id: int, to_id: int, guild_id: int, amount: int,
+                       reason: str = "Transfert") -> Optional[Tuple[int, int]]:
+        """Transfère des pièces entre deux membres en une seule transaction
+        
+        Retourne (solde_émetteur, solde_destinataire), ou None si le solde est insuffisant.
+        """
+        if amount <= 0 or from_id == to_id:
+            raise ValueError("Montant ou destinataire de transfert invalide")
+        
+        balances = await self.apply_ledger(guild_id, [
+            (from_id, -amount, reason),
+            (to_id, amount, reason)
+        ], transaction_type="transfer")
+        
+        if balances is None:
+            return None
+        return balances[from_id], balances[to_id]
     
     async def can_daily(self, user_id: int, guild_id: int) -> bool:
         """Vérifie si l'utilisateur peut récupérer ses pièces quotidiennes"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        result = self.db.member_cache.get((guild_id, user_id))
+        if result is None:
+            with metrics.timer('db', 'last_daily', 'read'):
+                async with self.db.acquire() as db:
+                    db.row_factory = aiosqlite.Row
+                    
+                    async with db.execute("""
+                        SELECT last_daily FROM members WHERE user_id = ? AND guild_id = ?
+                    """, (user_id, guild_id)) as cursor:
+                        result = await cursor.fetchone()
             
-            async with db.execute("""
-                SELECT last_daily FROM members WHERE user_id = ? AND guild_id = ?
-            """, (user_id, guild_id)) as cursor:
-                result = await cursor.fetchone()
-                
-            if not result or not result['last_daily']:
-                return True
-                
-            last_daily = datetime.fromisoformat(result['last_daily'])
-            return datetime.now() - last_daily >= timedelta(days=1)
+        if not result or not result['last_daily']:
+            return True
+            
+        last_daily = datetime.fromisoformat(result['last_daily'])
+        return datetime.now() - last_daily >= timedelta(days=1)
     
     async def claim_daily(self, user_id: int, guild_id: int) -> int:
-        """Permet à l'utilisateur de récupérer ses pièces quotidiennes"""
-        if not await self.can_daily(user_id, guild_id):
-            return 0
-            
+        """Permet à l'utilisateur de récupérer ses pièces quotidiennes
+        
+        La vérification du délai et le crédit sont faits dans le même UPSERT:
+        deux réclamations simultanées ne peuvent pas être créditées deux fois.
+        """
         amount = Config.DAILY_COINS
-        await self.add_coins(user_id, guild_id, amount, "Daily reward")
+        now = datetime.now()
         
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                UPDATE members SET last_daily = ? WHERE user_id = ? AND guild_id = ?
-            """, (datetime.now().isoformat(), user_id, guild_id))
-            await db.commit()
+        async def _apply(db: aiosqlite.Connection) -> Optional[int]:
+            async with db.execute("""
+                INSERT INTO members (user_id, guild_id, coins, last_daily) VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id, guild_id) DO UPDATE SET
+                    coins = members.coins + excluded.coins,
+                    last_daily = excluded.last_daily
+                WHERE members.last_daily IS NULL OR members.last_daily <= ?
+                RETURNING coins
+            """, (user_id, guild_id, amount, now.isoformat(),
+                  (now - timedelta(days=1)).isoformat())) as cursor:
+                claimed = await cursor.fetchone()
+            
+            if not claimed:
+                return None
             
+            await db.execute("""
+                INSERT INTO economy_transactions (guild_id, user_id, amount, transaction_type, description)
+                VALUES (?, ?, ?, ?, ?)
+            """, (guild_id, user_id, amount, "add", "Daily reward"))
+            return claimed['coins']
+        
+        try:
+            balance = await self.db.writer.run(_apply)
+        finally:
+            self.db.member_cache.invalidate((guild_id, user_id))
+        
+        if balance is None:
+            return 0
+        self.db.leaderboard.update(guild_id, 'coins', user_id, balance)
         return amount
 
+class XPAccumulator:
+    """Accumulateur d'XP en mémoire (write-behind) pour le chemin chaud on_message
+    
+    Les gains sont appliqués immédiatement sur des totaux en cache et les montées de
+    niveau sont calculées sans accès disque. Les gains en attente sont écrits dans
+    `members` par un UPSERT groupé toutes les `flush_interval` secondes et à l'arrêt.
+    """
+    
+    def __init__(self, db: DatabaseManager, cooldown: float = 60.0,
+                 flush_interval: float = 5.0, idle_ttl: float = 900.0):
+        self.db = db
+        self.cooldown = cooldown
+        self.flush_interval = flush_interval
+        self.idle_ttl = idle_ttl
+        
+        # (guild_id, user_id) -> [xp, level] connus (base + gains en attente)
+        self._totals: Dict[tuple, List[int]] = {}
+        # (guild_id, user_id) -> XP gagnée non encore écrite
+        self._pending: Dict[tuple, int] = {}
+        # (guild_id, user_id) -> instant (monotonic) du dernier gain
+        self._last_gain: Dict[tuple, float] = {}
+        # user_id -> nom à insérer dans `users` au prochain flush
+        self._new_users: Dict[int, str] = {}
+        
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        db.xp_accumulator = self
+    
+    def start(self):
+        """Démarre la tâche de flush périodique"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop(), name="xp-accumulator")
+    
+    async def stop(self):
+        """Arrête la tâche périodique et écrit les gains restants"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+    
+    async def add_xp(self, user_id: int, guild_id: int, xp_amount: int,
+                     username: Optional[str] = None) -> Optional[Dict]:
+        """Ajoute de l'XP en mémoire; retourne None si le membre est en cooldown"""
+        key = (guild_id, user_id)
+        now = time.monotonic()
+        last = self._last_gain.get(key)
+        if last is not None and now - last < self.cooldown:
+            return None
+        self._last_gain[key] = now
+        
+        totals = self._totals.get(key)
+        if totals is None:
+            totals = await self._load(key)
+            if username:
+                self._new_users.setdefault(user_id, username)
+        
+        old_xp, old_level = totals
+        new_xp = old_xp + xp_amount
+        new_level = DatabaseManager.calculate_level_from_xp(new_xp)
+        totals[0] = new_xp
+        totals[1] = max(old_level, new_level)
+        self._pending[key] = self._pending.get(key, 0) + xp_amount
+        self.db.leaderboard.update(guild_id, 'xp', user_id, new_xp)
+        
+        return {
+            'old_xp': old_xp,
+            'new_xp': new_xp,
+            'old_level': old_level,
+            'new_level': new_level,
+            'level_up': new_level > old_level
+        }
+    
+    def forget(self, guild_id: int, user_id: int):
+        """Oublie le total en cache d'un membre dont l'XP a été écrite ailleurs (rechargé au prochain gain)"""
+        self._totals.pop((guild_id, user_id), None)
+    
+    @metrics.timed('db', 'xp_totals', 'read')
+    async def _load(self, key: tuple) -> List[int]:
+        """Charge l'XP actuelle d'un membre depuis la base (une fois par membre actif)"""
+        guild_id, user_id = key
+        # Pas de flush en cours: la base plus les gains en attente donne le total exact
+        async with self._flush_lock:
+            async with self.db.acquire() as db:
+                async with db.execute("""
+                    SELECT xp, level FROM members WHERE user_id = ? AND guild_id = ?
+                """, (user_id, guild_id)) as cursor:
+                    row = await cursor.fetchone()
+            pending = self._pending.get(key, 0)
+        
+        # Un autre message a pu charger ce membre pendant l'attente
+        totals = self._totals.get(key)
+        if totals is None:
+            xp = (row['xp'] if row else 0) + pending
+            level = max(row['level'] if row else 1, DatabaseManager.calculate_level_from_xp(xp))
+            totals = [xp, level]
+            self._totals[key] = totals
+        return totals
+    
+    async def flush(self) -> int:
+        """Écrit les gains en attente en un seul lot; retourne le nombre de membres écrits"""
+        async with self._flush_lock:
+            if not self._pending and not self._new_users:
+                return 0
+            
+            pending, self._pending = self._pending, {}
+            new_users, self._new_users = self._new_users, {}
+            rows = [
+                (user_id, guild_id, gain, self._totals.get((guild_id, user_id), [0, 1])[1])
+                for (guild_id, user_id), gain in pending.items()
+            ]
+            
+            async def _apply(db: aiosqlite.Connection):
+                if new_users:
+                    await db.executemany("""
+                        INSERT OR IGNORE INTO users (id, username) VALUES (?, ?)
+                    """, list(new_users.items()))
+                if rows:
+                    await db.executemany("""
+                        INSERT INTO members (user_id, guild_id, xp, level) VALUES (?, ?, ?, ?)
+                        ON CONFLICT(user_id, guild_id) DO UPDATE SET
+                            xp = members.xp + excluded.xp,
+                            level = xp_level(members.xp + excluded.xp)
+                    """, rows)
+            
+            try:
+                await self.db.writer.run(_apply)
+            except Exception as e:
+                logger.error(f"Erreur flush XP ({len(rows)} membres): {e}")
+                # Remettre les gains en attente pour le prochain flush
+                for key, gain in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + gain
+                for user_id, username in new_users.items():
+                    self._new_users.setdefault(user_id, username)
+                return 0
+            
+            for guild_id, user_id in pending:
+                self.db.member_cache.invalidate((guild_id, user_id))
+            self._evict_idle()
+            return len(rows)
+    
+    def _evict_idle(self):
+        """Oublie les membres inactifs depuis `idle_ttl` (déjà écrits en base)"""
+        cutoff = time.monotonic() - self.idle_ttl
+        idle = [
+            key for key, last in self._last_gain.items()
+            if last < cutoff and key not in self._pending
+        ]
+        for key in idle:
+            del self._last_gain[key]
+            self._totals.pop(key, None)
+    
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Erreur boucle flush XP: {e}")
+
 # Instance globale
 db_manager = DatabaseManager()
-user_manager = UserManager(Config.DATA_DIR / "bot.db")
-economy_manager = EconomyManager(Config.DATA_DIR / "bot.db")
\ No newline at end of file
+user_manager = UserManager(db_manager)
+economy_manager = EconomyManager(db_manager)
+xp_accumulator = XPAccumulator(
+    db_manager,
+    cooldown=Config.XP_COOLDOWN_SECONDS,
+    flush_interval=Config.XP_FLUSH_INTERVAL
+)
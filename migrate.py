@@ -5,7 +5,6 @@ import os
 import json
 import shutil
 import asyncio
-import aiosqlite
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any
@@ -166,7 +165,7 @@ class MigrationManager:
             if not db_manager.db_path.exists():
                 raise Exception(f"Base de données non trouvée: {db_manager.db_path}")
             
-            async with aiosqlite.connect(db_manager.db_path) as db:
+            async with db_manager.acquire() as db:
                 # Vérifier que les tables existent
                 cursor = await db.execute("SELECT name FROM sqlite_master WHERE type='table'")
                 tables = [row[0] for row in await cursor.fetchall()]
@@ -375,6 +374,8 @@ async def main():
     except Exception as e:
         logger.error(f"Migration échouée: {e}")
         return 1
+    finally:
+        await db_manager.close()
 
 if __name__ == "__main__":
     import sys
@@ -5,8 +5,12 @@ call .venv\Scripts\activate.bat
 REM Lance le bot principal
 start python bot.py
 
-REM Lance l'interface web
-start python web_interface.py
+REM Lance l'interface web, sauf avec INTERFACE_EMBEDDED=true (le bot la sert lui-même)
+REM Comme python-dotenv: la variable d'environnement l'emporte sur le fichier .env
+if not defined INTERFACE_EMBEDDED (
+    for /f "tokens=1,* delims==" %%a in ('findstr /b /i "INTERFACE_EMBEDDED=" .env 2^>nul') do set "INTERFACE_EMBEDDED=%%b"
+)
+if /i not "%INTERFACE_EMBEDDED%"=="true" start python web_interface.py
 
 REM Lance la migration de la base de données
 start python migrate.py
@@ -0,0 +1,10 @@
+"""
+Configuration commune des tests: racine du projet importable, jeton factice
+(config.py refuse de s'importer sans DISCORD_TOKEN)
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
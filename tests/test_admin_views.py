@@ -0,0 +1,81 @@
+"""
+Pagination par clé des pages d'administration: curseurs et parcours complet avec égalités
+"""
+import random
+import sqlite3
+
+import pytest
+
+from utils.admin_views import MAX_PAGE_SIZE, SORT_COLUMNS, decode_cursor, encode_cursor, list_members
+
+GUILD_ID = 1
+
+@pytest.fixture
+def conn():
+    """Schéma réduit de `members`/`users` avec les index utilisés par les pages"""
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("""
+        CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT);
+        CREATE TABLE members (
+            user_id INTEGER, guild_id INTEGER,
+            xp INTEGER DEFAULT 0, level INTEGER DEFAULT 1, coins INTEGER DEFAULT 0,
+            warnings INTEGER DEFAULT 0, is_banned BOOLEAN DEFAULT FALSE, ban_reason TEXT,
+            PRIMARY KEY (user_id, guild_id)
+        );
+        CREATE INDEX idx_members_guild_coins_user ON members(guild_id, coins DESC, user_id DESC);
+        CREATE INDEX idx_users_username ON users(username COLLATE NOCASE, id);
+    """)
+    rng = random.Random(0)
+    for user_id in range(1, 301):
+        # Peu de valeurs et de noms distincts: beaucoup d'égalités à départager
+        conn.execute("INSERT INTO users (id, username) VALUES (?, ?)",
+                     (user_id, rng.choice(["alice", "Alice", "bob", "al_ex", "al%x"])))
+        conn.execute("""
+            INSERT INTO members (user_id, guild_id, xp, coins, warnings) VALUES (?, ?, ?, ?, ?)
+        """, (user_id, GUILD_ID, rng.randrange(5), rng.randrange(10), rng.randrange(3)))
+    # Membre d'un autre serveur: jamais listé
+    conn.execute("INSERT INTO members (user_id, guild_id, coins) VALUES (1, 2, 1000)")
+    yield conn
+    conn.close()
+
+def _all_pages(conn, limit, **kwargs):
+    rows, cursor, pages = [], None, 0
+    while True:
+        page = list_members(conn, GUILD_ID, cursor=cursor, limit=limit, **kwargs)
+        rows.extend(page.rows)
+        pages += 1
+        if page.next_cursor is None:
+            return rows, pages
+        assert len(page.rows) == min(limit, MAX_PAGE_SIZE)
+        cursor = page.next_cursor
+
+def test_cursor_round_trip():
+    for values in [(0, 1), (-5, 2**40), ("élodie", 3), ("a_b%c", 4)]:
+        assert decode_cursor(encode_cursor(values)) == values
+
+@pytest.mark.parametrize("cursor", [None, "", "pas-un-curseur", encode_cursor([1]), encode_cursor(["x", "y"])])
+def test_invalid_cursor_restarts_from_first_page(cursor):
+    assert decode_cursor(cursor) is None
+
+@pytest.mark.parametrize("sort", sorted(SORT_COLUMNS))
+@pytest.mark.parametrize("limit", [1, 7, 50, 300])
+def test_sorted_pages_cover_every_member_once(conn, sort, limit):
+    rows, pages = _all_pages(conn, sort=sort, limit=limit)
+    column = SORT_COLUMNS[sort]
+    expected = sorted(
+        conn.execute(f"SELECT user_id, {column} FROM members WHERE guild_id = ?", (GUILD_ID,)),
+        key=lambda row: (-row[1], -row[0])
+    )
+    assert [(row['user_id'], row[column]) for row in rows] == expected
+    # Pas de page vide en fin de parcours, même quand le total est un multiple de la limite
+    assert pages == -(-len(expected) // min(limit, MAX_PAGE_SIZE))
+
+@pytest.mark.parametrize("search", ["al", "ALICE", "al_", "al%"])
+def test_search_pages_cover_every_match_once(conn, search):
+    rows, _ = _all_pages(conn, search=search, limit=11)
+    expected = sorted(
+        ((user_id, username) for user_id, username in conn.execute("SELECT id, username FROM users")
+         if username.lower().startswith(search.lower())),
+        key=lambda row: (row[1].lower(), row[0])
+    )
+    assert [(row['user_id'], row['username']) for row in rows] == expected
@@ -0,0 +1,83 @@
+"""
+Classements en mémoire: skip-list indexable et RankedBoard comparés à sorted()
+"""
+import random
+
+import pytest
+
+from utils.leaderboard import IndexableSkipList, Leaderboard, RankedBoard
+
+def _expected(scores):
+    """Classement de référence: score décroissant puis user_id croissant"""
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+def test_skiplist_matches_sorted():
+    rng = random.Random(1)
+    skiplist = IndexableSkipList()
+    values = []
+    for _ in range(2000):
+        if values and rng.random() < 0.3:
+            value = values.pop(rng.randrange(len(values)))
+            skiplist.remove(value)
+        else:
+            value = (rng.randrange(100), rng.randrange(10_000))
+            if value in values:
+                continue
+            values.append(value)
+            skiplist.insert(value)
+
+    values.sort()
+    assert len(skiplist) == len(values)
+    assert skiplist.slice(0, len(values)) == values
+    for index, value in enumerate(values):
+        assert skiplist[index] == value
+        assert skiplist.rank(value) == index
+
+@pytest.mark.parametrize("seed", range(5))
+def test_ranked_board_rank_and_pages(seed):
+    rng = random.Random(seed)
+    board = RankedBoard()
+    scores = {}
+    for _ in range(1500):
+        user_id = rng.randrange(300)
+        if user_id in scores and rng.random() < 0.2:
+            board.remove(user_id)
+            del scores[user_id]
+        else:
+            # Peu de valeurs distinctes: beaucoup d'égalités départagées par user_id
+            scores[user_id] = rng.randrange(20)
+            board.update(user_id, scores[user_id])
+
+    expected = _expected(scores)
+    assert len(board) == len(expected)
+    for rank, (user_id, score) in enumerate(expected, 1):
+        assert board.rank(user_id) == (rank, score)
+
+    per_page = 17
+    for start in range(0, len(expected) + per_page, per_page):
+        assert board.page(start, per_page) == [
+            (start + offset + 1, user_id, score)
+            for offset, (user_id, score) in enumerate(expected[start:start + per_page])
+        ]
+
+def test_leaderboard_pages_and_departures():
+    board = Leaderboard()
+    scores = {user_id: (user_id * 37) % 11 for user_id in range(1, 41)}
+    for user_id, score in scores.items():
+        board.update(1, 'xp', user_id, score)
+        board.update(1, 'coins', user_id, score * 2)
+
+    expected = _expected(scores)
+    assert board.page(1, 'xp', 2, 10) == [
+        (rank, user_id, score) for rank, (user_id, score) in enumerate(expected, 1)
+    ][10:20]
+    assert board.page(2, 'xp') == []
+
+    board.remove_member(1, expected[0][0])
+    assert board.rank(1, 'xp', expected[0][0]) is None
+    assert board.top(1, 'xp', 1)[0][1] == expected[1][0]
+
+    present = {user_id for user_id in scores if user_id % 2}
+    board.prune(1, present)
+    for metric in Leaderboard.METRICS:
+        assert {user_id for _, user_id, _ in board.page(1, metric, 1, 100)} == present - {expected[0][0]}
@@ -0,0 +1,69 @@
+"""
+Recherche multi-motifs: l'automate d'Aho-Corasick comparé à un parcours naïf
+"""
+import random
+
+import pytest
+
+from utils.matcher import AhoCorasick, ContentMatcher, MatchHit
+
+def _naive(patterns, text):
+    """Toutes les occurrences (chevauchements compris) par recherche de sous-chaîne"""
+    hits = []
+    for pattern in patterns:
+        start = text.find(pattern)
+        while start != -1:
+            hits.append((start, pattern))
+            start = text.find(pattern, start + 1)
+    return sorted(hits)
+
+def _automaton(patterns):
+    automaton = AhoCorasick()
+    for pattern in patterns:
+        automaton.add(pattern, pattern)
+    automaton.build()
+    return automaton
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_patterns_match_naive_scan(seed):
+    rng = random.Random(seed)
+    # Petit alphabet: motifs imbriqués, préfixes et suffixes communs
+    alphabet = "abc"
+    patterns = {
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5)))
+        for _ in range(rng.randint(1, 12))
+    }
+    automaton = _automaton(patterns)
+    for _ in range(20):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+        assert sorted(automaton.search(text)) == _naive(patterns, text)
+
+def test_nested_and_overlapping_patterns():
+    patterns = ["he", "she", "his", "hers", "s"]
+    text = "ushers shishe"
+    assert sorted(_automaton(patterns).search(text)) == _naive(patterns, text)
+
+def test_patterns_added_after_build_are_found():
+    automaton = _automaton(["spam"])
+    automaton.add("pub", "pub")
+    assert sorted(automaton.search("spam pub")) == [(0, "spam"), (5, "pub")]
+
+def test_empty_inputs():
+    automaton = _automaton(["", "x"])
+    assert automaton.search("") == []
+    assert automaton.search("abc") == []
+
+def test_content_matcher_merges_global_and_guild_patterns():
+    matcher = ContentMatcher()
+    matcher.set_global(ContentMatcher.BANNED, ["Spam"])
+    matcher.set_patterns(1, ContentMatcher.AUTOREACT, {"bonjour": "👋"})
+
+    assert matcher.scan(1, "bonjour spam") == [
+        MatchHit(ContentMatcher.AUTOREACT, "bonjour", "👋", 0),
+        MatchHit(ContentMatcher.BANNED, "spam", "Spam", 8)
+    ]
+    # Un autre serveur ne voit que les motifs globaux
+    assert matcher.scan(2, "bonjour spam") == [MatchHit(ContentMatcher.BANNED, "spam", "Spam", 8)]
+
+    matcher.set_patterns(1, ContentMatcher.AUTOREACT, {})
+    assert matcher.scan(1, "bonjour") == []
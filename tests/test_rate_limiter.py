@@ -0,0 +1,58 @@
+"""
+Limitation de taux GCRA: rafale, cadence et bornes de hit()/retry_after()
+"""
+import pytest
+
+from utils.security import RateLimiter
+
+KEY = ('user', 'test', 1)
+
+def test_burst_then_limited_with_exact_delay():
+    limiter = RateLimiter()
+    # 5 requêtes par 60 s: rafale de 5 puis une toutes les 12 s
+    for _ in range(5):
+        assert limiter.hit(KEY, 5, 60, now=0.0) == 0.0
+    assert limiter.hit(KEY, 5, 60, now=0.0) == pytest.approx(12.0)
+    assert limiter.retry_after(KEY, 5, 60, now=0.0) == pytest.approx(12.0)
+
+def test_allowed_exactly_at_retry_after_boundary():
+    limiter = RateLimiter()
+    for _ in range(5):
+        limiter.hit(KEY, 5, 60, now=0.0)
+    assert limiter.hit(KEY, 5, 60, now=11.999) > 0.0
+    assert limiter.retry_after(KEY, 5, 60, now=12.0) == 0.0
+    assert limiter.hit(KEY, 5, 60, now=12.0) == 0.0
+    # Le créneau libéré est consommé: le suivant est de nouveau 12 s plus tard
+    assert limiter.hit(KEY, 5, 60, now=12.0) == pytest.approx(12.0)
+
+def test_refused_requests_do_not_consume():
+    limiter = RateLimiter()
+    for _ in range(5):
+        limiter.hit(KEY, 5, 60, now=0.0)
+    for _ in range(100):
+        limiter.hit(KEY, 5, 60, now=1.0)
+    assert limiter.retry_after(KEY, 5, 60, now=1.0) == pytest.approx(11.0)
+    assert limiter.stats()['limited'] == 100
+
+def test_steady_rate_never_limited():
+    limiter = RateLimiter()
+    for index in range(50):
+        assert limiter.hit(KEY, 5, 60, now=index * 12.0) == 0.0
+
+def test_full_bucket_after_window_and_eviction():
+    limiter = RateLimiter()
+    for _ in range(5):
+        limiter.hit(KEY, 5, 60, now=0.0)
+    assert limiter.retry_after(('user', 'test', 2), 5, 60, now=0.0) == 0.0
+    assert limiter.evict(now=59.0) == 0
+    assert limiter.evict(now=60.0) == 1
+    for _ in range(5):
+        assert limiter.hit(KEY, 5, 60, now=60.0) == 0.0
+
+def test_keys_are_independent():
+    limiter = RateLimiter()
+    assert limiter.hit(KEY, 1, 10, now=0.0) == 0.0
+    assert limiter.hit(KEY, 1, 10, now=0.0) == pytest.approx(10.0)
+    assert limiter.hit(RateLimiter.make_key('member', 'test', 1, guild_id=7), 1, 10, now=0.0) == 0.0
+    # Hors serveur, la portée membre retombe sur l'utilisateur
+    assert RateLimiter.make_key('member', 'test', 1) == KEY
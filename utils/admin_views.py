@@ -0,0 +1,148 @@
+"""
+Requêtes des pages d'administration (économie, modération) de l'interface web
+
+Les listes de membres sont paginées par clé: la page suivante reprend après le
+dernier couple (valeur de tri, user_id) affiché, ce qui suit directement l'index
+`(guild_id, colonne DESC, user_id DESC)` quelle que soit la profondeur de la page.
+La recherche porte sur le début du nom d'utilisateur (index `idx_users_username`),
+les résultats sont alors triés par nom. Les totaux viennent de `guild_stats`.
+"""
+import json
+import base64
+import sqlite3
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Tri accepté -> colonne de `members` (indexée avec guild_id et user_id)
+SORT_COLUMNS = {
+    'coins': 'coins',
+    'xp': 'xp',
+    'warnings': 'warnings',
+}
+
+_MEMBER_COLUMNS = """
+    m.user_id, u.username, m.coins, m.xp, m.level, m.warnings, m.is_banned, m.ban_reason
+"""
+
+class MemberPage(NamedTuple):
+    """Page de membres et curseur de la suivante (None = dernière page)"""
+    rows: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+    sort: str
+    search: str
+    limit: int = PAGE_SIZE
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[Any, ...]]:
+    """Décode un curseur; None s'il est absent ou invalide (retour à la première page)"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(values, list) or len(values) != 2 or not isinstance(values[1], int):
+        return None
+    return tuple(values)
+
+def _like_prefix(search: str) -> str:
+    escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"{escaped}%"
+
+def members_query(guild_id: int, sort: str = 'coins', search: str = '',
+                  cursor: Optional[str] = None, limit: int = PAGE_SIZE) -> Tuple[str, List[Any], MemberPage]:
+    """Requête d'une page de membres: (sql, paramètres, page vide portant tri/recherche/limite)
+
+    Séparée de l'exécution pour servir la connexion sqlite3 de l'interface Flask comme
+    le pool aiosqlite de l'interface intégrée au bot (voir `members_page`).
+    """
+    sort = sort if sort in SORT_COLUMNS else 'coins'
+    search = (search or '').strip()
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    after = decode_cursor(cursor)
+
+    if search:
+        # CROSS JOIN: parcourir l'index des noms puis chercher le membre par clé primaire
+        sql = f"""
+            SELECT {_MEMBER_COLUMNS} FROM users u
+            CROSS JOIN members m ON m.user_id = u.id AND m.guild_id = ?
+            WHERE u.username LIKE ? ESCAPE '\\'
+        """
+        params: List[Any] = [guild_id, _like_prefix(search)]
+        if after is not None:
+            sql += " AND (u.username COLLATE NOCASE, u.id) > (?, ?)"
+            params += [str(after[0]), after[1]]
+        sql += " ORDER BY u.username COLLATE NOCASE, u.id LIMIT ?"
+    else:
+        column = SORT_COLUMNS[sort]
+        sql = f"""
+            SELECT {_MEMBER_COLUMNS} FROM members m
+            LEFT JOIN users u ON u.id = m.user_id
+            WHERE m.guild_id = ?
+        """
+        params = [guild_id]
+        if after is not None:
+            sql += f" AND (m.{column}, m.user_id) < (?, ?)"
+            params += [after[0], after[1]]
+        sql += f" ORDER BY m.{column} DESC, m.user_id DESC LIMIT ?"
+    # Une ligne de plus pour savoir s'il existe une page suivante
+    params.append(limit + 1)
+    return sql, params, MemberPage([], None, sort, search, limit)
+
+def members_page(query_page: MemberPage, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> MemberPage:
+    """Construit la page à partir des lignes lues pour `members_query`"""
+    rows = [dict(zip(columns, row)) for row in rows]
+    next_cursor = None
+    if len(rows) > query_page.limit:
+        rows = rows[:query_page.limit]
+        last = rows[-1]
+        key = last['username'] if query_page.search else last[SORT_COLUMNS[query_page.sort]]
+        next_cursor = encode_cursor((key, last['user_id']))
+    return query_page._replace(rows=rows, next_cursor=next_cursor)
+
+def list_members(conn: sqlite3.Connection, guild_id: int, sort: str = 'coins',
+                 search: str = '', cursor: Optional[str] = None,
+                 limit: int = PAGE_SIZE) -> MemberPage:
+    """Une page de membres d'un serveur, triée par `sort` ou filtrée par nom"""
+    sql, params, page = members_query(guild_id, sort, search, cursor, limit)
+    result = conn.execute(sql, params)
+    return members_page(page, [description[0] for description in result.description], result)
+
+GUILDS_SQL = """
+    SELECT s.guild_id, g.name, s.members FROM guild_stats s
+    LEFT JOIN guilds g ON g.id = s.guild_id
+    WHERE s.members > 0
+    ORDER BY s.members DESC
+"""
+
+def guilds_from_rows(rows: Iterable[Sequence[Any]]) -> List[Dict[str, Any]]:
+    return [{'id': guild_id, 'name': name or str(guild_id), 'members': members}
+            for guild_id, name, members in rows]
+
+def list_guilds(conn: sqlite3.Connection) -> List[Dict[str, Any]]:
+    """Serveurs ayant des membres enregistrés, du plus grand au plus petit"""
+    return guilds_from_rows(conn.execute(GUILDS_SQL))
+
+_TOTALS = ('members', 'coins', 'banned', 'warned')
+
+def totals_query(guild_id: Optional[int] = None) -> Tuple[str, Tuple[Any, ...]]:
+    where, params = ("WHERE guild_id = ?", (guild_id,)) if guild_id is not None else ("", ())
+    return f"""
+        SELECT COALESCE(SUM(members), 0), COALESCE(SUM(coins), 0),
+               COALESCE(SUM(banned), 0), COALESCE(SUM(warned), 0)
+        FROM guild_stats {where}
+    """, params
+
+def totals_from_row(row: Sequence[Any]) -> Dict[str, int]:
+    return dict(zip(_TOTALS, row))
+
+def guild_totals(conn: sqlite3.Connection, guild_id: Optional[int] = None) -> Dict[str, int]:
+    """Totaux entretenus (membres, pièces, bannis, avertis) d'un serveur ou de tous"""
+    sql, params = totals_query(guild_id)
+    return totals_from_row(conn.execute(sql, params).fetchone())
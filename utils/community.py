@@ -0,0 +1,188 @@
+"""
+Données communautaires des serveurs servies depuis la mémoire
+
+`CommunityStore` charge au démarrage les citations, suggestions, tags,
+auto-réactions et statuts AFK. Les commandes lisent ces caches sans E/S et
+chaque modification n'écrit que la ligne concernée (via la file d'écriture):
+le coût d'une commande ne dépend plus du volume de données accumulé.
+"""
+import logging
+from typing import Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+class Quote(NamedTuple):
+    """Ligne de `quotes`"""
+    id: int
+    content: str
+    added_by: Optional[int] = None
+
+class Suggestion(NamedTuple):
+    """Ligne de `suggestions`"""
+    id: int
+    author_id: int
+    content: str
+    status: str = 'open'
+
+class CommunityStore:
+    """Cache écriture-directe des citations, suggestions, tags, auto-réactions et AFK"""
+
+    def __init__(self, db):
+        # DatabaseManager: une seule lecture par table au chargement, puis une ligne écrite par modification
+        self.db = db
+        self._quotes: Dict[int, List[Quote]] = {}
+        self._suggestions: Dict[int, List[Suggestion]] = {}
+        self._tags: Dict[int, Dict[str, str]] = {}
+        self._auto_reactions: Dict[int, Dict[str, str]] = {}
+        self._afk: Dict[int, Dict[int, str]] = {}
+        self.loaded = False
+
+    # === Chargement ===
+
+    async def load(self):
+        """Charge toutes les tables (au démarrage)"""
+        self._quotes.clear()
+        self._suggestions.clear()
+        self._tags.clear()
+        self._auto_reactions.clear()
+        self._afk.clear()
+
+        async with self.db.acquire() as db:
+            async with db.execute("SELECT guild_id, id, content, added_by FROM quotes ORDER BY id") as cursor:
+                async for guild_id, *values in cursor:
+                    self._quotes.setdefault(guild_id, []).append(Quote(*values))
+
+            async with db.execute("""
+                SELECT guild_id, id, author_id, content, status FROM suggestions ORDER BY id
+            """) as cursor:
+                async for guild_id, *values in cursor:
+                    self._suggestions.setdefault(guild_id, []).append(Suggestion(*values))
+
+            async with db.execute("SELECT guild_id, name, content FROM tags ORDER BY id") as cursor:
+                async for guild_id, name, content in cursor:
+                    self._tags.setdefault(guild_id, {})[name] = content
+
+            async with db.execute("SELECT guild_id, trigger_word, emoji FROM auto_reactions") as cursor:
+                async for guild_id, trigger, emoji in cursor:
+                    self._auto_reactions.setdefault(guild_id, {})[trigger] = emoji
+
+            async with db.execute("SELECT guild_id, user_id, reason FROM afk_status") as cursor:
+                async for guild_id, user_id, reason in cursor:
+                    self._afk.setdefault(guild_id, {})[user_id] = reason
+
+        self.loaded = True
+        counts = self.stats()
+        logger.info(
+            f"💬 Données communautaires chargées ({counts['quotes']} citations, "
+            f"{counts['suggestions']} suggestions, {counts['tags']} tags, "
+            f"{counts['auto_reactions']} auto-réactions, {counts['afk']} AFK)"
+        )
+
+    # === Lectures (sans E/S) ===
+
+    def quotes(self, guild_id: int) -> List[Quote]:
+        return self._quotes.get(guild_id, [])
+
+    def suggestions(self, guild_id: int) -> List[Suggestion]:
+        """Suggestions d'un serveur, numérotées à partir de 1 dans l'ordre de création"""
+        return self._suggestions.get(guild_id, [])
+
+    def tags(self, guild_id: int) -> Dict[str, str]:
+        return self._tags.get(guild_id, {})
+
+    def tag(self, guild_id: int, name: str) -> Optional[str]:
+        tags = self._tags.get(guild_id)
+        return tags.get(name) if tags else None
+
+    def auto_reactions(self, guild_id: int) -> Dict[str, str]:
+        return self._auto_reactions.get(guild_id, {})
+
+    def auto_reaction_guilds(self) -> List[int]:
+        return list(self._auto_reactions)
+
+    def afk_users(self, guild_id: int) -> Optional[Dict[int, str]]:
+        """{user_id: raison} des membres AFK, ou None si personne n'est AFK"""
+        return self._afk.get(guild_id)
+
+    # === Écritures (base puis cache) ===
+
+    async def add_quote(self, guild_id: int, content: str, added_by: Optional[int] = None) -> int:
+        """Ajoute une citation; retourne son numéro dans le serveur"""
+        _, quote_id = await self.db.writer.execute("""
+            INSERT INTO quotes (guild_id, content, added_by) VALUES (?, ?, ?)
+        """, (guild_id, content, added_by))
+        quotes = self._quotes.setdefault(guild_id, [])
+        quotes.append(Quote(quote_id, content, added_by))
+        return len(quotes)
+
+    async def add_suggestion(self, guild_id: int, author_id: int, content: str) -> int:
+        """Enregistre une suggestion; retourne son numéro dans le serveur"""
+        _, suggestion_id = await self.db.writer.execute("""
+            INSERT INTO suggestions (guild_id, author_id, content, status) VALUES (?, ?, ?, 'open')
+        """, (guild_id, author_id, content))
+        suggestions = self._suggestions.setdefault(guild_id, [])
+        suggestions.append(Suggestion(suggestion_id, author_id, content))
+        return len(suggestions)
+
+    async def set_suggestion_status(self, guild_id: int, index: int, status: str) -> Optional[Suggestion]:
+        """Change le statut de la suggestion n° `index` (1-based); None si elle n'existe pas"""
+        suggestions = self._suggestions.get(guild_id, [])
+        if not 1 <= index <= len(suggestions):
+            return None
+        suggestion = suggestions[index - 1]
+        await self.db.writer.execute("""
+            UPDATE suggestions SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+        """, (status, suggestion.id))
+        suggestion = suggestions[index - 1] = suggestion._replace(status=status)
+        return suggestion
+
+    async def set_tag(self, guild_id: int, name: str, content: str, author_id: Optional[int] = None):
+        await self.db.writer.execute("""
+            INSERT INTO tags (guild_id, name, content, author_id) VALUES (?, ?, ?, ?)
+            ON CONFLICT(guild_id, name) DO UPDATE SET
+                content = excluded.content, author_id = excluded.author_id
+        """, (guild_id, name, content, author_id))
+        self._tags.setdefault(guild_id, {})[name] = content
+
+    async def remove_tag(self, guild_id: int, name: str) -> bool:
+        """Supprime un tag; retourne False s'il n'existait pas"""
+        rowcount, _ = await self.db.writer.execute(
+            "DELETE FROM tags WHERE guild_id = ? AND name = ?", (guild_id, name)
+        )
+        tags = self._tags.get(guild_id)
+        if tags:
+            tags.pop(name, None)
+            if not tags:
+                del self._tags[guild_id]
+        return rowcount > 0
+
+    async def set_afk(self, guild_id: int, user_id: int, reason: str):
+        await self.db.writer.execute("""
+            INSERT INTO afk_status (user_id, guild_id, reason) VALUES (?, ?, ?)
+            ON CONFLICT(user_id, guild_id) DO UPDATE SET
+                reason = excluded.reason, set_at = CURRENT_TIMESTAMP
+        """, (user_id, guild_id, reason))
+        self._afk.setdefault(guild_id, {})[user_id] = reason
+
+    async def clear_afk(self, guild_id: int, user_id: int) -> bool:
+        """Retire le statut AFK; retourne False si le membre n'était pas AFK"""
+        users = self._afk.get(guild_id)
+        if not users or user_id not in users:
+            return False
+        await self.db.writer.execute(
+            "DELETE FROM afk_status WHERE user_id = ? AND guild_id = ?", (user_id, guild_id)
+        )
+        del users[user_id]
+        if not users:
+            del self._afk[guild_id]
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Nombre d'entrées en cache par type (jauge community_entries)"""
+        return {
+            'quotes': sum(len(quotes) for quotes in self._quotes.values()),
+            'suggestions': sum(len(suggestions) for suggestions in self._suggestions.values()),
+            'tags': sum(len(tags) for tags in self._tags.values()),
+            'auto_reactions': sum(len(reacts) for reacts in self._auto_reactions.values()),
+            'afk': sum(len(users) for users in self._afk.values())
+        }
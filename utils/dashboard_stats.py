@@ -0,0 +1,66 @@
+"""
+Statistiques du tableau de bord de l'interface web
+
+Les compteurs sont tenus à jour côté base: `stats_counters` par des déclencheurs
+sur `guilds`/`users`, `daily_stats` par le bot à chaque commande réussie. Les lire
+coûte deux recherches par clé primaire, quelle que soit la taille d'`activity_logs`;
+le résultat est en plus gardé en mémoire `ttl` secondes (routes et sondage /api/stats).
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class DashboardStats:
+    """Compteurs du tableau de bord avec cache à durée de vie (partagé entre threads)"""
+
+    COUNTERS_SQL = "SELECT name, value FROM stats_counters WHERE name IN ('guilds', 'users')"
+    TODAY_SQL = "SELECT commands FROM daily_stats WHERE day = date('now', 'localtime')"
+
+    def __init__(self, reader, ttl: float = 5.0):
+        # Chaque rechargement lit compteurs et total du jour dans un même instantané du `reader`
+        self.reader = reader
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value: Optional[Dict[str, int]] = None
+        self._expires = 0.0
+
+    def get(self) -> Dict[str, int]:
+        """{'guilds', 'users', 'commands_today'} depuis le cache ou la base"""
+        now = time.monotonic()
+        value = self._value
+        if value is not None and now < self._expires:
+            return dict(value)
+        with self._lock:
+            # Un seul thread recharge; les autres attendent puis lisent le résultat
+            if self._value is None or time.monotonic() >= self._expires:
+                self._value = self._read()
+                self._expires = time.monotonic() + self.ttl
+            return dict(self._value)
+
+    def invalidate(self):
+        self._expires = 0.0
+
+    async def get_async(self) -> Dict[str, int]:
+        """Comme get(), depuis une coroutine: lecture dans un thread de rapport (interface intégrée)"""
+        now = time.monotonic()
+        if self._value is not None and now < self._expires:
+            return dict(self._value)
+        self._value = await self.reader.run(self.read_counters)
+        self._expires = time.monotonic() + self.ttl
+        return dict(self._value)
+
+    @classmethod
+    def read_counters(cls, conn) -> Dict[str, int]:
+        stats = {'guilds': 0, 'users': 0, 'commands_today': 0}
+        for name, value in conn.execute(cls.COUNTERS_SQL).fetchall():
+            stats[name] = value or 0
+        today = conn.execute(cls.TODAY_SQL).fetchone()
+        stats['commands_today'] = today[0] if today and today[0] is not None else 0
+        return stats
+
+    def _read(self) -> Dict[str, int]:
+        with self.reader.snapshot() as conn:
+            return self.read_counters(conn)
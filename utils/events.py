@@ -0,0 +1,158 @@
+"""
+Bus d'événements en mémoire (publication / abonnement) pour le flux en direct
+
+Le bot publie ses événements d'activité et les variations des compteurs du tableau
+de bord; chaque onglet de l'interface ouvert sur le flux SSE est un abonné. Publier
+coûte un verrou et un ajout par abonné: aucune requête en base, quel que soit le
+nombre d'onglets. Les derniers événements sont gardés pour rejouer ceux manqués
+lors d'une reconnexion (`Last-Event-ID`).
+"""
+import json
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, NamedTuple, Optional
+
+class Event(NamedTuple):
+    """Événement publié sur le bus"""
+    id: int
+    topic: str
+    data: Dict[str, Any]
+    time: float
+
+    def to_sse(self) -> str:
+        """Encodage `text/event-stream`"""
+        payload = json.dumps(self.data, ensure_ascii=False, default=str)
+        return f"id: {self.id}\nevent: {self.topic}\ndata: {payload}\n\n"
+
+class Subscription:
+    """File d'un abonné; les événements les plus anciens sont perdus s'il ne suit pas"""
+
+    __slots__ = ('topics', '_pending', '_wakeup', 'dropped')
+
+    def __init__(self, topics: Optional[Iterable[str]], max_pending: int):
+        self.topics = frozenset(topics) if topics else None
+        self._pending: Deque[Event] = deque(maxlen=max_pending)
+        self._wakeup = threading.Event()
+        self.dropped = 0
+
+    def _push(self, event: Event) -> bool:
+        if self.topics is not None and event.topic not in self.topics:
+            return False
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append(event)
+        self._wakeup.set()
+        return True
+
+    def get(self, timeout: Optional[float] = None) -> List[Event]:
+        """Attend au plus `timeout` secondes et retourne les événements en attente"""
+        if not self._pending:
+            self._wakeup.wait(timeout)
+        self._wakeup.clear()
+        events = []
+        while self._pending:
+            events.append(self._pending.popleft())
+        return events
+
+class AsyncSubscription(Subscription):
+    """Abonné attendu depuis une boucle asyncio (interface web intégrée au bot)"""
+
+    __slots__ = ('_loop', '_async_wakeup')
+
+    def __init__(self, topics: Optional[Iterable[str]], max_pending: int):
+        super().__init__(topics, max_pending)
+        self._loop = asyncio.get_running_loop()
+        self._async_wakeup = asyncio.Event()
+
+    def _push(self, event: Event) -> bool:
+        if not super()._push(event):
+            return False
+        # La publication peut venir d'un autre thread
+        self._loop.call_soon_threadsafe(self._async_wakeup.set)
+        return True
+
+    async def get_async(self, timeout: Optional[float] = None) -> List[Event]:
+        """Attend au plus `timeout` secondes sans bloquer la boucle"""
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._async_wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._async_wakeup.clear()
+        events = []
+        while self._pending:
+            events.append(self._pending.popleft())
+        return events
+
+class EventBus:
+    """Bus thread-safe: publication depuis la boucle asyncio ou n'importe quel thread"""
+
+    # Sujets publiés
+    ACTIVITY = 'activity'        # nouvelle ligne d'activity_logs
+    STATS = 'stats'              # compteurs complets du tableau de bord
+    STATS_DELTA = 'stats_delta'  # variations des compteurs ({'commands_today': 1}, ...)
+
+    def __init__(self, history: int = 100, max_pending: int = 256):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._history: Deque[Event] = deque(maxlen=history)
+        self._subscribers: List[Subscription] = []
+
+        # Statistiques
+        self.published = 0
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, topic: str, data: Dict[str, Any]) -> Event:
+        with self._lock:
+            event = Event(self._next_id, topic, data, time.time())
+            self._next_id += 1
+            self._history.append(event)
+            self.published += 1
+            for subscription in self._subscribers:
+                subscription._push(event)
+        return event
+
+    def subscribe(self, topics: Optional[Iterable[str]] = None,
+                  last_event_id: Optional[int] = None, asynchronous: bool = False) -> Subscription:
+        """Nouvel abonné; avec `last_event_id`, rejoue les événements publiés depuis
+
+        `asynchronous=True` (dans une coroutine) retourne un `AsyncSubscription`.
+        """
+        cls = AsyncSubscription if asynchronous else Subscription
+        subscription = cls(topics, self.max_pending)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._history:
+                    if event.id > last_event_id:
+                        subscription._push(event)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            try:
+                self._subscribers.remove(subscription)
+            except ValueError:
+                pass
+
+    def recent(self, topic: str, limit: int = 10) -> List[Event]:
+        """Derniers événements d'un sujet, du plus récent au plus ancien"""
+        with self._lock:
+            events = [event for event in reversed(self._history) if event.topic == topic]
+        return events[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs exportés en jauges par le bot (event_bus_*)"""
+        return {
+            'subscribers': len(self._subscribers),
+            'published': self.published,
+            'dropped': sum(subscription.dropped for subscription in self._subscribers)
+        }
+
+# Instance globale
+event_bus = EventBus()
@@ -0,0 +1,203 @@
+"""
+Configuration des serveurs servie depuis la mémoire
+
+`GuildSettings` charge au démarrage les tables de configuration (bienvenue, logs,
+tickets, reaction-roles) dans des objets typés par serveur. Les listeners lisent
+ces objets sans aucune E/S; les commandes de configuration écrivent en base via
+la file d'écriture puis mettent le cache à jour.
+"""
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class WelcomeConfig(NamedTuple):
+    """Ligne de `welcome_config`"""
+    welcome_enabled: bool = False
+    welcome_channel_id: Optional[int] = None
+    welcome_message: Optional[str] = None
+    goodbye_enabled: bool = False
+    goodbye_channel_id: Optional[int] = None
+    goodbye_message: Optional[str] = None
+
+class LoggingConfig(NamedTuple):
+    """Ligne de `logging_config`"""
+    log_channel_id: Optional[int] = None
+
+class TicketConfig(NamedTuple):
+    """Ligne de `ticket_config`"""
+    category_id: Optional[int] = None
+
+class ReactionRole(NamedTuple):
+    """Ligne de `reaction_roles`"""
+    guild_id: int
+    channel_id: int
+    message_id: int
+    emoji: str
+    role_id: int
+
+class GuildSettings:
+    """Cache écriture-directe de la configuration des serveurs"""
+
+    WELCOME = 'welcome'
+    LOGGING = 'logging'
+    TICKETS = 'tickets'
+    REACTION_ROLES = 'reaction_roles'
+
+    def __init__(self, db):
+        # DatabaseManager: load() lit les quatre tables sur le pool, les commandes écrivent via db.writer
+        self.db = db
+        self._welcome: Dict[int, WelcomeConfig] = {}
+        self._logging: Dict[int, LoggingConfig] = {}
+        self._tickets: Dict[int, TicketConfig] = {}
+        self._reaction_roles: Dict[int, Dict[Tuple[int, str], ReactionRole]] = {}
+        # Index des événements de réaction: message_id -> {emoji: role_id}
+        self._by_message: Dict[int, Dict[str, int]] = {}
+        self.loaded = False
+
+    # === Chargement ===
+
+    async def load(self):
+        """Charge toutes les tables de configuration (au démarrage)"""
+        self._welcome.clear()
+        self._logging.clear()
+        self._tickets.clear()
+        self._reaction_roles.clear()
+        self._by_message.clear()
+
+        async with self.db.acquire() as db:
+            async with db.execute(f"""
+                SELECT guild_id, {', '.join(WelcomeConfig._fields)} FROM welcome_config
+            """) as cursor:
+                async for guild_id, *values in cursor:
+                    self._welcome[guild_id] = self._welcome_row(values)
+
+            async with db.execute("SELECT guild_id, log_channel_id FROM logging_config") as cursor:
+                async for guild_id, channel_id in cursor:
+                    self._logging[guild_id] = LoggingConfig(channel_id)
+
+            async with db.execute("SELECT guild_id, category_id FROM ticket_config") as cursor:
+                async for guild_id, category_id in cursor:
+                    self._tickets[guild_id] = TicketConfig(category_id)
+
+            async with db.execute("""
+                SELECT guild_id, channel_id, message_id, emoji, role_id FROM reaction_roles
+            """) as cursor:
+                async for row in cursor:
+                    self._store_reaction_role(ReactionRole(*row))
+
+        self.loaded = True
+        logger.info(
+            f"⚙️ Configuration des serveurs chargée ({len(self._welcome)} bienvenue, "
+            f"{len(self._logging)} logs, {len(self._tickets)} tickets, "
+            f"{sum(len(roles) for roles in self._reaction_roles.values())} reaction-roles)"
+        )
+
+    @staticmethod
+    def _welcome_row(values) -> WelcomeConfig:
+        config = WelcomeConfig(*values)
+        return config._replace(
+            welcome_enabled=bool(config.welcome_enabled),
+            goodbye_enabled=bool(config.goodbye_enabled)
+        )
+
+    # === Lectures (sans E/S) ===
+
+    def welcome_config(self, guild_id: int) -> Optional[WelcomeConfig]:
+        return self._welcome.get(guild_id)
+
+    def logging_config(self, guild_id: int) -> Optional[LoggingConfig]:
+        return self._logging.get(guild_id)
+
+    def ticket_config(self, guild_id: int) -> Optional[TicketConfig]:
+        return self._tickets.get(guild_id)
+
+    def reaction_role(self, guild_id: int, message_id: int, emoji: str) -> Optional[ReactionRole]:
+        roles = self._reaction_roles.get(guild_id)
+        return roles.get((message_id, emoji)) if roles else None
+
+    def message_reaction_roles(self, message_id: int) -> Optional[Dict[str, int]]:
+        """{emoji: role_id} d'un message, ou None s'il n'a aucun reaction-role (une recherche)"""
+        return self._by_message.get(message_id)
+
+    def reaction_roles(self, guild_id: int) -> List[ReactionRole]:
+        return list(self._reaction_roles.get(guild_id, {}).values())
+
+    # === Écritures (base puis cache) ===
+
+    async def update_welcome(self, guild_id: int, **fields: Any) -> WelcomeConfig:
+        """Modifie des champs de la configuration bienvenue/au revoir (les autres sont conservés)"""
+        config = self._welcome.get(guild_id, WelcomeConfig())._replace(**fields)
+        columns = WelcomeConfig._fields
+        await self.db.writer.execute(f"""
+            INSERT INTO welcome_config (guild_id, {', '.join(columns)})
+            VALUES (?, {', '.join('?' for _ in columns)})
+            ON CONFLICT(guild_id) DO UPDATE SET
+                {', '.join(f'{column} = excluded.{column}' for column in columns)}
+        """, (guild_id, *config))
+        self._welcome[guild_id] = config
+        return config
+
+    async def set_log_channel(self, guild_id: int, channel_id: Optional[int]):
+        """Définit le canal de logs (None désactive les logs)"""
+        if channel_id is None:
+            await self.db.writer.execute("DELETE FROM logging_config WHERE guild_id = ?", (guild_id,))
+            self._logging.pop(guild_id, None)
+        else:
+            await self.db.writer.execute("""
+                INSERT INTO logging_config (guild_id, log_channel_id) VALUES (?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET log_channel_id = excluded.log_channel_id
+            """, (guild_id, channel_id))
+            self._logging[guild_id] = LoggingConfig(channel_id)
+
+    async def set_ticket_category(self, guild_id: int, category_id: int):
+        await self.db.writer.execute("""
+            INSERT INTO ticket_config (guild_id, category_id) VALUES (?, ?)
+            ON CONFLICT(guild_id) DO UPDATE SET category_id = excluded.category_id
+        """, (guild_id, category_id))
+        self._tickets[guild_id] = TicketConfig(category_id)
+
+    def _store_reaction_role(self, reaction_role: ReactionRole):
+        self._reaction_roles.setdefault(reaction_role.guild_id, {})[
+            (reaction_role.message_id, reaction_role.emoji)
+        ] = reaction_role
+        self._by_message.setdefault(reaction_role.message_id, {})[reaction_role.emoji] = reaction_role.role_id
+
+    async def add_reaction_role(self, guild_id: int, channel_id: int, message_id: int,
+                                emoji: str, role_id: int) -> ReactionRole:
+        await self.db.writer.execute("""
+            INSERT INTO reaction_roles (guild_id, channel_id, message_id, emoji, role_id)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(guild_id, message_id, emoji) DO UPDATE SET
+                channel_id = excluded.channel_id, role_id = excluded.role_id
+        """, (guild_id, channel_id, message_id, emoji, role_id))
+        reaction_role = ReactionRole(guild_id, channel_id, message_id, emoji, role_id)
+        self._store_reaction_role(reaction_role)
+        return reaction_role
+
+    async def remove_reaction_role(self, guild_id: int, message_id: int, emoji: str) -> bool:
+        """Retire un reaction-role; retourne False s'il n'existait pas"""
+        rowcount, _ = await self.db.writer.execute("""
+            DELETE FROM reaction_roles
+            WHERE guild_id = ? AND message_id = ? AND emoji = ?
+        """, (guild_id, message_id, emoji))
+        roles = self._reaction_roles.get(guild_id)
+        if roles:
+            roles.pop((message_id, emoji), None)
+            if not roles:
+                del self._reaction_roles[guild_id]
+        emojis = self._by_message.get(message_id)
+        if emojis:
+            emojis.pop(emoji, None)
+            if not emojis:
+                del self._by_message[message_id]
+        return rowcount > 0
+
+    def stats(self) -> Dict[str, int]:
+        """Nombre d'entrées en cache par section (jauge guild_settings_entries)"""
+        return {
+            self.WELCOME: len(self._welcome),
+            self.LOGGING: len(self._logging),
+            self.TICKETS: len(self._tickets),
+            self.REACTION_ROLES: sum(len(roles) for roles in self._reaction_roles.values())
+        }
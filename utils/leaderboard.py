@@ -0,0 +1,252 @@
+"""
+Classements en mémoire (XP, pièces) pour le bot Discord
+"""
+import random
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import discord
+
+class _SkipNode:
+    """Nœud de la skip-list indexable"""
+
+    __slots__ = ('value', 'next', 'width')
+
+    def __init__(self, value: Any, height: int):
+        self.value = value
+        self.next: List[Optional['_SkipNode']] = [None] * height
+        # width[i] = nombre de positions franchies en suivant next[i]
+        self.width: List[int] = [1] * height
+
+class IndexableSkipList:
+    """Skip-list triée avec largeurs de liens (arbre d'ordre statistique)
+
+    Insertion, suppression, accès au k-ième élément et rang d'une valeur
+    en O(log n) en moyenne.
+    """
+
+    MAX_LEVEL = 32
+
+    def __init__(self):
+        self._head = _SkipNode(None, self.MAX_LEVEL)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _random_height(self) -> int:
+        height = 1
+        while height < self.MAX_LEVEL and random.random() < 0.5:
+            height += 1
+        return height
+
+    def _find(self, value: Any) -> Tuple[List[_SkipNode], List[int]]:
+        """Retourne, pour chaque niveau, le dernier nœud < value et sa position"""
+        chain: List[_SkipNode] = [self._head] * self.MAX_LEVEL
+        steps = [0] * self.MAX_LEVEL
+        node = self._head
+        pos = 0
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].value < value:
+                pos += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+            steps[level] = pos
+        return chain, steps
+
+    def insert(self, value: Any):
+        chain, steps = self._find(value)
+        height = self._random_height()
+        new_node = _SkipNode(value, height)
+        new_pos = steps[0] + 1
+
+        for level in range(height):
+            prev = chain[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            new_node.width[level] = prev.width[level] - (new_pos - steps[level]) + 1
+            prev.width[level] = new_pos - steps[level]
+
+        for level in range(height, self.MAX_LEVEL):
+            chain[level].width[level] += 1
+
+        self._size += 1
+
+    def remove(self, value: Any):
+        chain, _ = self._find(value)
+        target = chain[0].next[0]
+        if target is None or target.value != value:
+            raise ValueError(f"{value!r} absent de la skip-list")
+
+        height = len(target.next)
+        for level in range(height):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+
+        for level in range(height, self.MAX_LEVEL):
+            chain[level].width[level] -= 1
+
+        self._size -= 1
+
+    def rank(self, value: Any) -> int:
+        """Nombre d'éléments strictement inférieurs à value (rang 0-based)"""
+        _, steps = self._find(value)
+        return steps[0]
+
+    def _node_at(self, index: int) -> _SkipNode:
+        if not 0 <= index < self._size:
+            raise IndexError("index hors limites")
+        node = self._head
+        pos = 0
+        target = index + 1
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not None and pos + node.width[level] <= target:
+                pos += node.width[level]
+                node = node.next[level]
+        return node
+
+    def __getitem__(self, index: int) -> Any:
+        return self._node_at(index).value
+
+    def slice(self, start: int, count: int) -> List[Any]:
+        """Retourne jusqu'à `count` éléments à partir de `start` (O(log n + count))"""
+        if count <= 0 or start >= self._size:
+            return []
+        node = self._node_at(max(0, start))
+        values = []
+        while node is not None and len(values) < count:
+            values.append(node.value)
+            node = node.next[0]
+        return values
+
+class RankedBoard:
+    """Classement d'un serveur pour une métrique (score décroissant)"""
+
+    def __init__(self):
+        self._list = IndexableSkipList()
+        self._scores: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._list)
+
+    def update(self, user_id: int, score: int):
+        old = self._scores.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            self._list.remove((-old, user_id))
+        self._list.insert((-score, user_id))
+        self._scores[user_id] = score
+
+    def remove(self, user_id: int):
+        old = self._scores.pop(user_id, None)
+        if old is not None:
+            self._list.remove((-old, user_id))
+
+    def members(self) -> List[int]:
+        return list(self._scores)
+
+    def rank(self, user_id: int) -> Optional[Tuple[int, int]]:
+        """Retourne (rang 1-based, score) ou None si absent"""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return self._list.rank((-score, user_id)) + 1, score
+
+    def page(self, start: int, count: int) -> List[Tuple[int, int, int]]:
+        """Retourne [(rang, user_id, score), ...] à partir du rang start+1"""
+        return [
+            (start + offset + 1, user_id, -neg_score)
+            for offset, (neg_score, user_id) in enumerate(self._list.slice(start, count))
+        ]
+
+class Leaderboard:
+    """Classements par serveur et par métrique ('xp', 'coins')"""
+
+    METRICS = ('xp', 'coins')
+
+    def __init__(self):
+        self._boards: Dict[Tuple[int, str], RankedBoard] = {}
+        self.loaded = False
+
+    def _board(self, guild_id: int, metric: str) -> RankedBoard:
+        if metric not in self.METRICS:
+            raise ValueError(f"Métrique de classement inconnue: {metric}")
+        board = self._boards.get((guild_id, metric))
+        if board is None:
+            board = self._boards[(guild_id, metric)] = RankedBoard()
+        return board
+
+    def update(self, guild_id: int, metric: str, user_id: int, score: int):
+        """Met à jour le score d'un membre (appelé après chaque écriture)"""
+        self._board(guild_id, metric).update(user_id, score)
+
+    def remove_member(self, guild_id: int, user_id: int):
+        """Retire un membre parti de tous les classements du serveur"""
+        for metric in self.METRICS:
+            board = self._boards.get((guild_id, metric))
+            if board is not None:
+                board.remove(user_id)
+
+    def prune(self, guild_id: int, present: Set[int]) -> int:
+        """Retire les membres absents de `present` (départs pendant l'arrêt du bot)"""
+        removed = 0
+        for metric in self.METRICS:
+            board = self._boards.get((guild_id, metric))
+            if board is None:
+                continue
+            for user_id in board.members():
+                if user_id not in present:
+                    board.remove(user_id)
+                    removed += 1
+        return removed
+
+    def clear(self):
+        self._boards.clear()
+        self.loaded = False
+
+    def top(self, guild_id: int, metric: str, limit: int = 10) -> List[Tuple[int, int, int]]:
+        """Top N: [(rang, user_id, score), ...]"""
+        return self.page(guild_id, metric, 1, limit)
+
+    def page(self, guild_id: int, metric: str, page: int = 1, per_page: int = 10) -> List[Tuple[int, int, int]]:
+        """Page N (1-based) du classement"""
+        board = self._boards.get((guild_id, metric))
+        if board is None:
+            return []
+        return board.page((max(1, page) - 1) * per_page, per_page)
+
+    def rank(self, guild_id: int, metric: str, user_id: int) -> Optional[Tuple[int, int]]:
+        """Rang d'un membre: (rang 1-based, score) ou None"""
+        board = self._boards.get((guild_id, metric))
+        return board.rank(user_id) if board is not None else None
+
+    def size(self, guild_id: int, metric: str) -> int:
+        board = self._boards.get((guild_id, metric))
+        return len(board) if board is not None else 0
+
+MEDALS = {1: "🥇", 2: "🥈", 3: "🥉"}
+
+def leaderboard_embed(guild: discord.Guild, board: Leaderboard, metric: str, title: str,
+                      page: int = 1, per_page: int = 10,
+                      formatter: Optional[Callable[[int], str]] = None,
+                      color: Optional[discord.Color] = None) -> discord.Embed:
+    """Construit l'embed d'une page de classement"""
+    total = board.size(guild.id, metric)
+    pages = max(1, (total + per_page - 1) // per_page)
+    page = min(max(1, page), pages)
+    formatter = formatter or str
+
+    lines = []
+    for rank, user_id, score in board.page(guild.id, metric, page, per_page):
+        member = guild.get_member(user_id)
+        name = member.display_name if member else f"<@{user_id}>"
+        lines.append(f"{MEDALS.get(rank, f'`#{rank}`')} **{name}** — {formatter(score)}")
+
+    embed = discord.Embed(
+        title=title,
+        description="\n".join(lines) or "Aucun membre classé pour le moment.",
+        color=color or discord.Color.gold()
+    )
+    embed.set_footer(text=f"Page {page}/{pages} • {total} membres classés")
+    return embed
@@ -0,0 +1,87 @@
+"""
+Alimentation du bus d'événements quand l'interface web tourne hors du processus du bot
+
+Le bot publie directement sur `event_bus`, mais un processus web séparé ne voit pas
+ces publications. Un unique thread les remplace: il lit les nouvelles lignes
+d'`activity_logs` par clé primaire (`id > dernier vu`) et les compteurs du tableau
+de bord, puis publie sur le bus local. Son coût ne dépend ni du nombre d'onglets
+abonnés ni de la taille de la table, et il ne tourne que s'il y a des abonnés.
+"""
+import sqlite3
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from utils.events import EventBus
+from utils.dashboard_stats import DashboardStats
+
+logger = logging.getLogger(__name__)
+
+class ActivityTail:
+    """Thread qui publie les nouvelles activités et les compteurs sur un bus local"""
+
+    BATCH_SIZE = 100
+
+    def __init__(self, bus: EventBus, reader, stats: DashboardStats, interval: float = 1.0):
+        self.bus = bus
+        # Le thread ouvre une connexion en lecture seule à lui (reader.connect()) pour toute sa durée
+        self.reader = reader
+        self.stats = stats
+        self.interval = interval
+        self._last_id: Optional[int] = None
+        self._last_stats: Optional[Dict[str, int]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def ensure_running(self):
+        """Démarre le thread s'il ne tourne pas (appelé à chaque nouvel abonné)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="activity-tail", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        logger.info("📡 Flux en direct: suivi d'activity_logs démarré")
+        conn = self.reader.connect()
+        try:
+            while True:
+                with self._lock:
+                    if not len(self.bus):
+                        # Au redémarrage, reprendre à la fin de la table (pas de rattrapage)
+                        self._thread = None
+                        self._last_id = None
+                        self._last_stats = None
+                        break
+                try:
+                    self._poll(conn)
+                except Exception as e:
+                    logger.error(f"Erreur flux en direct: {e}")
+                time.sleep(self.interval)
+        finally:
+            conn.close()
+            logger.info("📡 Flux en direct: plus d'abonnés, suivi arrêté")
+
+    def _poll(self, conn: sqlite3.Connection):
+        if self._last_id is None:
+            row = conn.execute("SELECT MAX(id) FROM activity_logs").fetchone()
+            self._last_id = row[0] or 0
+        rows = conn.execute("""
+            SELECT id, guild_id, user_id, action_type, action_data, timestamp
+            FROM activity_logs WHERE id > ? ORDER BY id LIMIT ?
+        """, (self._last_id, self.BATCH_SIZE)).fetchall()
+        for row_id, guild_id, user_id, action_type, action_data, timestamp in rows:
+            self._last_id = row_id
+            self.bus.publish(self.bus.ACTIVITY, {
+                'guild_id': guild_id,
+                'user_id': user_id,
+                'action_type': action_type,
+                'description': action_data or '',
+                'timestamp': timestamp
+            })
+
+        stats = self.stats.get()
+        if stats != self._last_stats:
+            self._last_stats = stats
+            self.bus.publish(self.bus.STATS, stats)
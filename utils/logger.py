@@ -5,9 +5,13 @@ import logging
 import logging.handlers
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
 import json
+import time
+import queue
+import atexit
 import asyncio
+import threading
 from discord.ext import commands
 
 from config import Config
@@ -25,82 +29,296 @@ class ColoredFormatter(logging.Formatter):
     }
     
     def format(self, record):
-        log_color = self.COLORS.get(record.levelname, self.COLORS['RESET'])
-        record.levelname = f"{log_color}{record.levelname}{self.COLORS['RESET']}"
-        return super().format(record)
+        # Ne pas modifier l'enregistrement partagé: les autres handlers
+        # (fichiers) recevraient le niveau avec les codes couleur
+        levelname = record.levelname
+        log_color = self.COLORS.get(levelname, self.COLORS['RESET'])
+        record.levelname = f"{log_color}{levelname}{self.COLORS['RESET']}"
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
 
 class JSONFormatter(logging.Formatter):
-    """Formateur JSON pour les logs structurés"""
+    """Formateur JSON pour les logs structurés
+    
+    Le préfixe d'horodatage est mis en cache par seconde, et `module`/`function`
+    ne sont ajoutés qu'à partir de WARNING (la ligne et le logger suffisent sinon).
+    """
+    
+    DISCORD_FIELDS = ('guild_id', 'user_id', 'channel_id')
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_second = None
+        self._cached_prefix = ""
+        self._dumps = json.JSONEncoder(ensure_ascii=False, default=str).encode
+    
+    def _timestamp(self, created: float) -> str:
+        second = int(created)
+        if second != self._cached_second:
+            self._cached_second = second
+            self._cached_prefix = datetime.fromtimestamp(second).strftime('%Y-%m-%dT%H:%M:%S')
+        return f"{self._cached_prefix}.{int((created - second) * 1_000_000):06d}"
     
     def format(self, record):
         log_data = {
-            'timestamp': datetime.fromtimestamp(record.created).isoformat(),
+            'timestamp': self._timestamp(record.created),
             'level': record.levelname,
             'logger': record.name,
             'message': record.getMessage(),
-            'module': record.module,
-            'function': record.funcName,
             'line': record.lineno
         }
+        if record.levelno >= logging.WARNING:
+            log_data['module'] = record.module
+            log_data['function'] = record.funcName
         
         # Ajouter des informations Discord si disponibles
-        if record.__dict__.get('guild_id') is not None:
-            log_data['guild_id'] = record.__dict__.get('guild_id')
-        if record.__dict__.get('user_id') is not None:
-            log_data['user_id'] = record.__dict__.get('user_id')
-        if record.__dict__.get('channel_id') is not None:
-            log_data['channel_id'] = record.__dict__.get('channel_id')
+        attributes = record.__dict__
+        for field in self.DISCORD_FIELDS:
+            value = attributes.get(field)
+            if value is not None:
+                log_data[field] = value
             
         # Ajouter l'exception si présente
         if record.exc_info:
             log_data['exception'] = self.formatException(record.exc_info)
             
-        return json.dumps(log_data, ensure_ascii=False)
+        return self._dumps(log_data)
 
 class DiscordLogHandler(logging.Handler):
-    """Handler pour envoyer les logs critiques vers Discord"""
+    """Handler pour envoyer les logs critiques vers Discord
     
-    def __init__(self, webhook_url: Optional[str] = None):
+    emit() ne fait que mettre l'enregistrement en file: l'envoi HTTP se fait dans
+    un thread dédié, sans jamais bloquer la boucle asyncio du bot. Les erreurs
+    identiques reçues pendant `flush_interval` secondes sont regroupées en un seul
+    embed avec un compteur, jusqu'à 10 embeds par appel au webhook, et les limites
+    de débit du webhook (429, X-RateLimit-*) sont respectées.
+    """
+    
+    MAX_EMBEDS_PER_MESSAGE = 10
+    MAX_MESSAGE_CHARS = 6000      # Limite Discord: total des embeds d'un message
+    MAX_DESCRIPTION_CHARS = 1000
+    MAX_DISTINCT_PER_FLUSH = 50
+    
+    def __init__(self, webhook_url: Optional[str] = None, flush_interval: float = 5.0,
+                 max_queue: int = 1000):
         super().__init__()
         self.webhook_url = webhook_url or Config.DISCORD_WEBHOOK_URL
         self.setLevel(logging.ERROR)
+        self.flush_interval = flush_interval
+        
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._blocked_until = 0.0
+        
+        # Statistiques
+        self.dropped = 0
+        self.sent_messages = 0
         
     def emit(self, record):
         if not self.webhook_url:
             return
             
+        try:
+            self._queue.put_nowait((
+                record.levelname, record.module, record.funcName, record.lineno,
+                self.format(record), record.created
+            ))
+        except queue.Full:
+            self.dropped += 1  # Tempête d'erreurs: on ne bloque jamais l'appelant
+            return
+        except Exception:
+            return  # Ne pas faire planter le bot pour les logs
+        
+        if self._thread is None:
+            self._start_sender()
+    
+    def _start_sender(self):
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="discord-log-sender", daemon=True
+                )
+                self._thread.start()
+    
+    def close(self):
+        """Envoie les erreurs en attente puis arrête le thread d'envoi"""
+        if self._thread is not None:
+            try:
+                self._queue.put(None, timeout=1)
+                self._thread.join(timeout=self.flush_interval + 5)
+            except Exception:
+                pass
+            self._thread = None
+        super().close()
+    
+    def _run(self):
+        """Thread d'envoi: regroupe les erreurs d'une fenêtre puis les livre"""
         try:
             import requests
+            session = requests.Session()
+        except Exception:
+            return
+        
+        stopping = False
+        while not stopping:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            
+            pending: Dict[tuple, Dict[str, Any]] = {}
+            self._coalesce(pending, entry)
+            deadline = time.monotonic() + self.flush_interval
+            
+            # Collecter jusqu'à la fin de la fenêtre de regroupement
+            while True:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                self._coalesce(pending, entry)
             
-            message = self.format(record)
-            payload = {
-                "embeds": [{
-                    "title": f"🚨 Erreur Bot - {record.levelname}",
-                    "description": f"```\n{message}\n```",
-                    "color": 0xff0000,  # Rouge
-                    "timestamp": datetime.now().isoformat(),
-                    "fields": [
-                        {"name": "Module", "value": record.module, "inline": True},
-                        {"name": "Fonction", "value": record.funcName, "inline": True},
-                        {"name": "Ligne", "value": str(record.lineno), "inline": True}
-                    ]
-                }]
+            try:
+                for payload in self._build_payloads(pending):
+                    self._post(session, payload)
+            except Exception:
+                pass  # Ne pas faire planter le bot pour les logs
+        
+        session.close()
+    
+    def _coalesce(self, pending: Dict[tuple, Dict[str, Any]], entry: tuple):
+        levelname, module, func_name, lineno, message, created = entry
+        key = (levelname, module, lineno, message.split("\n", 1)[0])
+        
+        group = pending.get(key)
+        if group is not None:
+            group['count'] += 1
+            group['last'] = created
+            return
+        
+        if len(pending) >= self.MAX_DISTINCT_PER_FLUSH:
+            overflow = pending.setdefault(('overflow',), {'count': 0})
+            overflow['count'] += 1
+            return
+        
+        pending[key] = {
+            'level': levelname, 'module': module, 'function': func_name, 'line': lineno,
+            'message': message, 'count': 1, 'first': created, 'last': created
+        }
+    
+    def _build_embed(self, group: Dict[str, Any]) -> Dict[str, Any]:
+        if 'message' not in group:
+            return {
+                "title": "🚨 Erreurs supplémentaires",
+                "description": f"{group['count']} autre(s) erreur(s) distincte(s) non détaillée(s)",
+                "color": 0xff0000
             }
+        
+        message = group['message']
+        if len(message) > self.MAX_DESCRIPTION_CHARS:
+            message = message[:self.MAX_DESCRIPTION_CHARS] + "…"
+        
+        title = f"🚨 Erreur Bot - {group['level']}"
+        fields = [
+            {"name": "Module", "value": str(group['module']), "inline": True},
+            {"name": "Fonction", "value": str(group['function']), "inline": True},
+            {"name": "Ligne", "value": str(group['line']), "inline": True}
+        ]
+        if group['count'] > 1:
+            title += f" (×{group['count']})"
+            fields.append({
+                "name": "Occurrences",
+                "value": f"{group['count']} entre {datetime.fromtimestamp(group['first']):%H:%M:%S} "
+                         f"et {datetime.fromtimestamp(group['last']):%H:%M:%S}",
+                "inline": False
+            })
+        
+        return {
+            "title": title,
+            "description": f"```\n{message}\n```",
+            "color": 0xff0000,  # Rouge
+            "timestamp": datetime.fromtimestamp(group['first']).astimezone().isoformat(),
+            "fields": fields
+        }
+    
+    @staticmethod
+    def _embed_size(embed: Dict[str, Any]) -> int:
+        return (len(embed.get("title", "")) + len(embed.get("description", "")) +
+                sum(len(f["name"]) + len(f["value"]) for f in embed.get("fields", [])))
+    
+    def _build_payloads(self, pending: Dict[tuple, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Répartit les embeds en messages de 10 embeds / 6000 caractères au plus"""
+        payloads = []
+        embeds, size = [], 0
+        for group in pending.values():
+            embed = self._build_embed(group)
+            embed_size = self._embed_size(embed)
+            if embeds and (len(embeds) >= self.MAX_EMBEDS_PER_MESSAGE or
+                           size + embed_size > self.MAX_MESSAGE_CHARS):
+                payloads.append({"embeds": embeds})
+                embeds, size = [], 0
+            embeds.append(embed)
+            size += embed_size
+        if embeds:
+            payloads.append({"embeds": embeds})
+        return payloads
+    
+    def _post(self, session, payload: Dict[str, Any], max_attempts: int = 3):
+        """Envoie un message au webhook en respectant ses limites de débit"""
+        for _ in range(max_attempts):
+            wait = self._blocked_until - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
             
-            requests.post(self.webhook_url, json=payload, timeout=5)
-        except Exception:
-            pass  # Ne pas faire planter le bot pour les logs
+            response = session.post(self.webhook_url, json=payload, timeout=10)
+            
+            if response.status_code == 429:
+                try:
+                    retry_after = float(response.json().get("retry_after", 1))
+                except Exception:
+                    retry_after = float(response.headers.get("Retry-After", 1))
+                self._blocked_until = time.monotonic() + retry_after
+                continue
+            
+            # Seau épuisé: attendre sa réinitialisation avant le prochain envoi
+            if response.headers.get("X-RateLimit-Remaining") == "0":
+                reset_after = float(response.headers.get("X-RateLimit-Reset-After", 0))
+                self._blocked_until = time.monotonic() + reset_after
+            
+            if response.ok:
+                self.sent_messages += 1
+            return
 
-def setup_logging():
-    """Configure le système de logging"""
+class LoopQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler minimal: le thread appelant ne fait que figer le message
+    
+    Contrairement à QueueHandler.prepare(), aucun formatage (ni trace d'exception)
+    n'est fait ici: tout est laissé au thread du QueueListener.
+    """
     
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+# Listener actif en mode file d'attente (None en mode direct)
+_log_listener: Optional[logging.handlers.QueueListener] = None
+_logging_configured = False
+_discord_handler: Optional[DiscordLogHandler] = None
+
+def _build_handlers() -> List[logging.Handler]:
+    """Crée les handlers de sortie (console, fichiers, webhook)"""
     # Créer le dossier logs
     Config.LOGS_DIR.mkdir(exist_ok=True)
     
-    # Logger principal
-    root_logger = logging.getLogger()
-    root_logger.setLevel(logging.DEBUG)
-    
     # Console handler avec couleurs
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
@@ -109,7 +327,6 @@ def setup_logging():
         datefmt='%H:%M:%S'
     )
     console_handler.setFormatter(console_formatter)
-    root_logger.addHandler(console_handler)
     
     # Fichier de logs rotatif
     file_handler = logging.handlers.RotatingFileHandler(
@@ -123,7 +340,6 @@ def setup_logging():
         '%(asctime)s | %(levelname)8s | %(name)s:%(lineno)d | %(message)s'
     )
     file_handler.setFormatter(file_formatter)
-    root_logger.addHandler(file_handler)
     
     # Logs JSON structurés pour analyse
     json_handler = logging.handlers.RotatingFileHandler(
@@ -134,11 +350,59 @@ def setup_logging():
     )
     json_handler.setLevel(logging.INFO)
     json_handler.setFormatter(JSONFormatter())
-    root_logger.addHandler(json_handler)
     
     # Discord webhook pour erreurs critiques
-    discord_handler = DiscordLogHandler()
-    root_logger.addHandler(discord_handler)
+    global _discord_handler
+    discord_handler = _discord_handler = DiscordLogHandler()
+    
+    return [console_handler, file_handler, json_handler, discord_handler]
+
+def stop_logging():
+    """Arrête le listener (vide la file) en mode file d'attente"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+def setup_logging(queued: Optional[bool] = None, force: bool = False):
+    """Configure le système de logging
+    
+    En mode file d'attente (`LOG_QUEUE=true`, par défaut), le root logger n'a qu'un
+    LoopQueueHandler: la boucle asyncio ne fait qu'empiler les enregistrements et
+    un thread QueueListener se charge du formatage et des écritures. Les appels
+    suivants retournent la configuration existante sauf si `force` est vrai.
+    """
+    global _log_listener, _logging_configured
+    
+    # Logger principal
+    root_logger = logging.getLogger()
+    if _logging_configured and not force:
+        return root_logger
+    
+    if queued is None:
+        queued = Config.LOG_QUEUE
+    
+    # Reconfiguration: retirer les handlers installés précédemment
+    stop_logging()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+        handler.close()
+    
+    root_logger.setLevel(logging.DEBUG)
+    handlers = _build_handlers()
+    
+    if queued:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        root_logger.addHandler(LoopQueueHandler(log_queue))
+        _log_listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        _log_listener.start()
+    else:
+        for handler in handlers:
+            root_logger.addHandler(handler)
+    
+    _logging_configured = True
     
     # Réduire le niveau de logging pour les librairies externes
     logging.getLogger('discord').setLevel(logging.WARNING)
@@ -147,6 +411,15 @@ def setup_logging():
     
     return root_logger
 
+def discord_log_stats() -> Dict[str, int]:
+    """Messages envoyés au webhook et erreurs perdues (file pleine) depuis setup_logging()"""
+    if _discord_handler is None:
+        return {'sent_messages': 0, 'dropped': 0}
+    return {'sent_messages': _discord_handler.sent_messages, 'dropped': _discord_handler.dropped}
+
+# Vider la file de logs à la sortie du processus (avant logging.shutdown)
+atexit.register(stop_logging)
+
 class BotLogger:
     """Logger spécialisé pour les événements du bot"""
     
@@ -241,16 +514,19 @@ class PerformanceLogger:
         self.logger = logging.getLogger('performance')
         
     async def time_async_function(self, func_name: str, coro):
-        """Mesure le temps d'exécution d'une coroutine"""
-        start_time = datetime.now()
+        """Mesure le temps d'exécution d'une coroutine (enregistré dans les métriques 'task')"""
+        from utils.metrics import metrics
+        start = time.perf_counter_ns()
         try:
             result = await coro
-            execution_time = (datetime.now() - start_time).total_seconds()
-            self.logger.debug(f"{func_name} exécuté en {execution_time:.3f}s")
+            elapsed = time.perf_counter_ns() - start
+            metrics.observe('task', func_name, '-', elapsed)
+            self.logger.debug(f"{func_name} exécuté en {elapsed / 1e9:.3f}s")
             return result
         except Exception as e:
-            execution_time = (datetime.now() - start_time).total_seconds()
-            self.logger.warning(f"{func_name} échoué après {execution_time:.3f}s: {e}")
+            elapsed = time.perf_counter_ns() - start
+            metrics.observe('task', func_name, '-', elapsed, error=True)
+            self.logger.warning(f"{func_name} échoué après {elapsed / 1e9:.3f}s: {e}")
             raise
 
 # Instance globale
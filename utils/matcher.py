@@ -0,0 +1,162 @@
+"""
+Recherche multi-motifs (Aho-Corasick) pour l'automod et les auto-réactions
+"""
+from collections import deque
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+class AhoCorasick:
+    """Automate d'Aho-Corasick: trouve tous les motifs d'un texte en un seul passage"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Sorties du nœud: ((longueur du motif, charge utile), ...), suffixes inclus après build()
+        self._out: List[Tuple[Tuple[int, Any], ...]] = [()]
+        self._built = True
+
+    def __len__(self) -> int:
+        """Nombre d'états de l'automate"""
+        return len(self._goto)
+
+    def add(self, pattern: str, payload: Any):
+        """Ajoute un motif (la casse doit déjà être normalisée)"""
+        if not pattern:
+            return
+        node = 0
+        for char in pattern:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[node][char] = child
+            node = child
+        self._out[node] += ((len(pattern), payload),)
+        self._built = False
+
+    def build(self):
+        """Calcule les liens d'échec en largeur"""
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = deque(goto[0].values())
+        for node in queue:
+            fail[node] = 0
+
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                if out[fail[child]]:
+                    out[child] += out[fail[child]]
+
+        self._built = True
+
+    def search(self, text: str) -> List[Tuple[int, Any]]:
+        """Retourne [(position de début, charge utile), ...] pour chaque occurrence"""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+
+        hits = []
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                for length, payload in out[node]:
+                    hits.append((index - length + 1, payload))
+        return hits
+
+class MatchHit(NamedTuple):
+    """Occurrence d'un motif dans un message"""
+    category: str
+    pattern: str
+    value: Any
+    start: int
+
+PatternSource = Union[Dict[str, Any], Iterable[str]]
+
+class ContentMatcher:
+    """Automates compilés par serveur (motifs globaux + motifs du serveur)
+
+    Les automates sont reconstruits paresseusement au premier message qui suit
+    un changement de configuration; un serveur sans motif propre partage
+    l'automate global.
+    """
+
+    BANNED = "banned"
+    LINK = "link"
+    AUTOREACT = "autoreact"
+
+    def __init__(self):
+        self._global: Dict[str, Dict[str, Any]] = {}
+        self._guild: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        self._compiled: Dict[Optional[int], AhoCorasick] = {}
+        self.builds = 0
+
+    @staticmethod
+    def _normalize(patterns: PatternSource) -> Dict[str, Any]:
+        if not isinstance(patterns, dict):
+            patterns = {pattern: pattern for pattern in patterns}
+        return {str(pattern).lower(): value for pattern, value in patterns.items() if pattern}
+
+    def set_global(self, category: str, patterns: PatternSource):
+        """Définit les motifs d'une catégorie pour tous les serveurs"""
+        self._global[category] = self._normalize(patterns)
+        self._compiled.clear()
+
+    def set_patterns(self, guild_id: int, category: str, patterns: PatternSource):
+        """Définit les motifs d'une catégorie propres à un serveur (motif -> valeur)"""
+        normalized = self._normalize(patterns)
+        categories = self._guild.setdefault(guild_id, {})
+        if normalized:
+            categories[category] = normalized
+        else:
+            categories.pop(category, None)
+            if not categories:
+                del self._guild[guild_id]
+        self._compiled.pop(guild_id, None)
+
+    def get_patterns(self, guild_id: int, category: str) -> Dict[str, Any]:
+        return dict(self._guild.get(guild_id, {}).get(category, {}))
+
+    def invalidate(self, guild_id: Optional[int] = None):
+        """Force la reconstruction d'un automate (ou de tous)"""
+        if guild_id is None:
+            self._compiled.clear()
+        else:
+            self._compiled.pop(guild_id, None)
+
+    def _automaton(self, guild_id: Optional[int]) -> AhoCorasick:
+        key = guild_id if guild_id in self._guild else None
+        automaton = self._compiled.get(key)
+        if automaton is None:
+            automaton = AhoCorasick()
+            sources = [self._global]
+            if key is not None:
+                sources.append(self._guild[key])
+            for source in sources:
+                for category, patterns in source.items():
+                    for pattern, value in patterns.items():
+                        automaton.add(pattern, (category, pattern, value))
+            automaton.build()
+            self._compiled[key] = automaton
+            self.builds += 1
+        return automaton
+
+    def scan(self, guild_id: Optional[int], content_lower: str) -> List[MatchHit]:
+        """Toutes les occurrences (toutes catégories) dans un texte en minuscules"""
+        if not content_lower:
+            return []
+        return [
+            MatchHit(category, pattern, value, start)
+            for start, (category, pattern, value) in self._automaton(guild_id).search(content_lower)
+        ]
+
+# Instance globale
+content_matcher = ContentMatcher()
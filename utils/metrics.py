@@ -0,0 +1,219 @@
+"""
+Métriques de latence en mémoire (histogrammes) et export au format Prometheus
+"""
+import os
+import time
+import bisect
+import functools
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# Bornes des seaux en secondes (convention Prometheus)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+MetricKey = Tuple[str, str, str]  # (kind, name, cog)
+
+class LatencyHistogram:
+    """Histogramme à seaux fixes: compteurs, somme, erreurs et quantiles estimés"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum_ns', 'max_ns', 'errors')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # dernier seau: +Inf
+        self.count = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+        self.errors = 0
+
+    def observe(self, duration_ns: int, error: bool = False):
+        self.counts[bisect.bisect_left(self.buckets, duration_ns / 1e9)] += 1
+        self.count += 1
+        self.sum_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        if error:
+            self.errors += 1
+
+    def quantile(self, q: float) -> float:
+        """Quantile estimé (secondes) par interpolation linéaire dans le seau"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index >= len(self.buckets):
+                    return self.max_ns / 1e9
+                upper = min(self.buckets[index], self.max_ns / 1e9)
+                return lower + max(0.0, upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.max_ns / 1e9
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'avg_ms': self.sum_ns / self.count / 1e6 if self.count else 0.0,
+            'p50_ms': self.quantile(0.50) * 1000,
+            'p95_ms': self.quantile(0.95) * 1000,
+            'p99_ms': self.quantile(0.99) * 1000,
+            'max_ms': self.max_ns / 1e6
+        }
+
+GaugeValue = Union[float, List[Tuple[Dict[str, str], float]]]
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+class MetricsRegistry:
+    """Histogrammes par (type, nom, cog) et jauges calculées à l'export
+
+    Types utilisés: 'slash', 'prefix', 'listener', 'db', 'task', 'http'.
+    """
+
+    def __init__(self, prefix: str = "bot"):
+        self.prefix = prefix
+        self._histograms: Dict[MetricKey, LatencyHistogram] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], GaugeValue]]] = {}
+        # observe() peut être appelé depuis des threads (Flask, workers)
+        self._lock = threading.Lock()
+
+    def observe(self, kind: str, name: str, cog: str, duration_ns: int, error: bool = False):
+        key = (kind, name, cog or "-")
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+        histogram.observe(duration_ns, error)
+
+    @contextmanager
+    def timer(self, kind: str, name: str, cog: str = "-") -> Iterator[None]:
+        """`with metrics.timer('db', 'connection'):` mesure le bloc (erreurs comprises)"""
+        start = time.perf_counter_ns()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(kind, name, cog, time.perf_counter_ns() - start, error)
+
+    def timed(self, kind: str, name: str, cog: str = "-"):
+        """Décorateur de coroutine équivalent à timer()"""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.timer(kind, name, cog):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def register_gauge(self, name: str, help_text: str, func: Callable[[], GaugeValue]):
+        """Jauge évaluée à chaque export: valeur seule ou [(labels, valeur), ...]"""
+        self._gauges[name] = (help_text, func)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def summaries(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Résumé par métrique: type, nom, cog, count, errors, avg/p50/p95/p99/max (ms)"""
+        return [
+            {'kind': key[0], 'name': key[1], 'cog': key[2], **histogram.summary()}
+            for key, histogram in list(self._histograms.items())
+            if kind is None or key[0] == kind
+        ]
+
+    def render_prometheus(self) -> str:
+        """Export texte au format d'exposition Prometheus"""
+        duration = f"{self.prefix}_duration_seconds"
+        errors = f"{self.prefix}_errors_total"
+        lines = [
+            f"# HELP {duration} Durée des commandes, listeners et accès base",
+            f"# TYPE {duration} histogram"
+        ]
+        error_lines = [
+            f"# HELP {errors} Exécutions terminées par une exception",
+            f"# TYPE {errors} counter"
+        ]
+
+        for (kind, name, cog), histogram in sorted(list(self._histograms.items())):
+            labels = {'kind': kind, 'name': name, 'cog': cog}
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                cumulative += bucket_count
+                lines.append(f"{duration}_bucket{_labels({**labels, 'le': repr(bound)})} {cumulative}")
+            lines.append(f"{duration}_bucket{_labels({**labels, 'le': '+Inf'})} {histogram.count}")
+            lines.append(f"{duration}_sum{_labels(labels)} {histogram.sum_ns / 1e9:.6f}")
+            lines.append(f"{duration}_count{_labels(labels)} {histogram.count}")
+            error_lines.append(f"{errors}{_labels(labels)} {histogram.errors}")
+
+        lines.extend(error_lines)
+
+        for name, (help_text, func) in sorted(self._gauges.items()):
+            metric = f"{self.prefix}_{name}"
+            try:
+                value = func()
+            except Exception:
+                continue
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            if isinstance(value, list):
+                lines.extend(f"{metric}{_labels(labels)} {sample}" for labels, sample in value)
+            else:
+                lines.append(f"{metric} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: Path):
+        """Écrit l'export dans un fichier (remplacement atomique), lu par /metrics"""
+        content = self.render_prometheus()
+        tmp_path = Path(f"{path}.tmp")
+        tmp_path.write_text(content, encoding="utf-8")
+        os.replace(tmp_path, path)
+
+def instrument_app_commands(tree, registry: 'MetricsRegistry') -> int:
+    """Enveloppe le callback de chaque commande slash pour la chronométrer"""
+    from discord import app_commands
+
+    count = 0
+    for command in tree.walk_commands():
+        if not isinstance(command, app_commands.Command):
+            continue
+        original = command._callback
+        if getattr(original, '__metrics_wrapped__', False):
+            continue
+
+        cog = type(command.binding).__name__ if command.binding is not None else "-"
+
+        def wrap(original=original, name=command.qualified_name, cog=cog):
+            @functools.wraps(original)
+            async def timed(*args, **kwargs):
+                start = time.perf_counter_ns()
+                error = False
+                try:
+                    return await original(*args, **kwargs)
+                except Exception:
+                    error = True
+                    raise
+                finally:
+                    registry.observe('slash', name, cog, time.perf_counter_ns() - start, error)
+            timed.__metrics_wrapped__ = True
+            return timed
+
+        command._callback = wrap()
+        count += 1
+    return count
+
+# Instance globale
+metrics = MetricsRegistry()
@@ -0,0 +1,159 @@
+"""
+Pipeline unique de traitement des messages pour le bot Discord
+
+Chaque message de serveur est classé une seule fois (auteur, serveur, contenu en
+minuscules, mentions) puis passe par les étapes enregistrées par le bot et les
+cogs, dans l'ordre de priorité. Une étape peut abandonner le message (ex: automod
+qui supprime un spam) pour que les étapes suivantes (XP...) ne le voient pas.
+"""
+import time
+import logging
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional
+
+import discord
+
+from utils.security import permission_manager, content_filter
+from utils.matcher import MatchHit
+
+logger = logging.getLogger(__name__)
+
+class MessageContext:
+    """Pré-classification d'un message partagée par toutes les étapes"""
+
+    __slots__ = ('message', 'author', 'guild', 'channel', 'author_id', 'guild_id',
+                 'content', 'content_lower', 'mentions', 'mention_ids',
+                 'dropped', 'drop_reason', 'data', '_is_moderator', '_matches')
+
+    def __init__(self, message: discord.Message):
+        self.message = message
+        self.author = message.author
+        self.guild = message.guild
+        self.channel = message.channel
+        self.author_id: int = message.author.id
+        self.guild_id: int = message.guild.id
+        self.content: str = message.content or ""
+        self.content_lower: str = self.content.lower()
+        self.mentions = message.mentions
+        self.mention_ids: FrozenSet[int] = frozenset(user.id for user in message.mentions)
+        self.dropped = False
+        self.drop_reason: Optional[str] = None
+        # Données libres échangées entre étapes
+        self.data: Dict[str, Any] = {}
+        self._is_moderator: Optional[bool] = None
+        self._matches: Optional[List[MatchHit]] = None
+
+    @property
+    def is_moderator(self) -> bool:
+        """L'auteur a-t-il des permissions de modération (calculé une fois)"""
+        if self._is_moderator is None:
+            self._is_moderator = permission_manager.has_moderator_permissions(self.author)
+        return self._is_moderator
+
+    @property
+    def matches(self) -> List[MatchHit]:
+        """Mots interdits, liens suspects et déclencheurs trouvés (un seul scan, partagé)"""
+        if self._matches is None:
+            self._matches = content_filter.scan(self.content_lower, self.guild_id)
+        return self._matches
+
+    def matches_of(self, category: str) -> List[MatchHit]:
+        return [hit for hit in self.matches if hit.category == category]
+
+    def drop(self, reason: str):
+        """Arrête le traitement: les étapes suivantes ne verront pas ce message"""
+        self.dropped = True
+        self.drop_reason = reason
+
+StageHandler = Callable[[MessageContext], Awaitable[None]]
+
+class _Stage:
+    __slots__ = ('name', 'handler', 'priority', 'calls', 'total_ns', 'max_ns', 'errors', 'drops')
+
+    def __init__(self, name: str, handler: StageHandler, priority: int):
+        self.name = name
+        self.handler = handler
+        self.priority = priority
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.errors = 0
+        self.drops = 0
+
+class MessagePipeline:
+    """Étapes ordonnées appliquées à chaque message de serveur"""
+
+    # Priorités conventionnelles (plus petit = plus tôt)
+    PRIORITY_AUTOMOD = 10
+    PRIORITY_DEFAULT = 50
+    PRIORITY_XP = 100
+
+    def __init__(self, slow_stage_ms: float = 250.0):
+        self._stages: List[_Stage] = []
+        self.slow_stage_ns = int(slow_stage_ms * 1_000_000)
+        self.messages = 0
+        self.total_ns = 0
+
+    def register(self, name: str, handler: StageHandler, priority: int = PRIORITY_DEFAULT):
+        """Ajoute (ou remplace) une étape `name`"""
+        self.unregister(name)
+        self._stages.append(_Stage(name, handler, priority))
+        self._stages.sort(key=lambda stage: stage.priority)
+
+    def unregister(self, name: str):
+        self._stages = [stage for stage in self._stages if stage.name != name]
+
+    @property
+    def stage_names(self) -> List[str]:
+        return [stage.name for stage in self._stages]
+
+    async def process(self, message: discord.Message) -> Optional[MessageContext]:
+        """Fait passer un message de serveur par toutes les étapes"""
+        if message.guild is None or not self._stages:
+            return None
+
+        ctx = MessageContext(message)
+        started = time.perf_counter_ns()
+
+        # Copie: une étape peut (dé)enregistrer des étapes pendant le traitement
+        for stage in tuple(self._stages):
+            stage_start = time.perf_counter_ns()
+            try:
+                await stage.handler(ctx)
+            except Exception as e:
+                stage.errors += 1
+                logger.error(f"Erreur étape de message '{stage.name}': {e}", exc_info=True)
+
+            elapsed = time.perf_counter_ns() - stage_start
+            stage.calls += 1
+            stage.total_ns += elapsed
+            if elapsed > stage.max_ns:
+                stage.max_ns = elapsed
+            if elapsed > self.slow_stage_ns:
+                logger.warning(f"🐢 Étape de message lente '{stage.name}': {elapsed / 1e6:.1f} ms")
+
+            if ctx.dropped:
+                stage.drops += 1
+                break
+
+        self.messages += 1
+        self.total_ns += time.perf_counter_ns() - started
+        return ctx
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs et temps par étape (en millisecondes)"""
+        return {
+            'messages': self.messages,
+            'avg_ms': self.total_ns / self.messages / 1e6 if self.messages else 0.0,
+            'stages': [
+                {
+                    'name': stage.name,
+                    'priority': stage.priority,
+                    'calls': stage.calls,
+                    'avg_ms': stage.total_ns / stage.calls / 1e6 if stage.calls else 0.0,
+                    'max_ms': stage.max_ns / 1e6,
+                    'errors': stage.errors,
+                    'drops': stage.drops
+                }
+                for stage in self._stages
+            ]
+        }
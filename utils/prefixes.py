@@ -0,0 +1,99 @@
+"""
+Préfixes de commandes par serveur, résolus en mémoire
+
+Les préfixes sont stockés dans `guilds.prefix`: une chaîne simple (ancien format)
+ou un tableau JSON quand un serveur en a plusieurs. Pour chaque serveur, le cache
+garde un tuple prêt à l'emploi (mentions du bot comprises, du plus long au plus
+court) que `commands.Bot` compare au message avec un seul `str.startswith`.
+"""
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class PrefixCache:
+    """Préfixes par serveur avec préfixe par défaut et préfixe mention"""
+
+    MAX_PREFIXES = 5
+    MAX_LENGTH = 10
+
+    def __init__(self, default: str = "!", mention: bool = True):
+        self.default = default
+        self.mention = mention
+        self._custom: Dict[int, Tuple[str, ...]] = {}
+        self._resolved: Dict[int, Tuple[str, ...]] = {}
+        self._mentions: Tuple[str, ...] = ()
+        self._default_resolved = self._resolve((default,))
+
+    @staticmethod
+    def parse(raw: Optional[str]) -> Tuple[str, ...]:
+        """Décode la colonne `guilds.prefix`"""
+        if not raw:
+            return ()
+        if raw.startswith('['):
+            try:
+                return tuple(str(p) for p in json.loads(raw) if p)
+            except (ValueError, TypeError):
+                pass
+        return (raw,)
+
+    @staticmethod
+    def serialize(prefixes: Tuple[str, ...]) -> str:
+        """Encode pour `guilds.prefix` (chaîne simple si un seul préfixe)"""
+        if len(prefixes) == 1 and not prefixes[0].startswith('['):
+            return prefixes[0]
+        return json.dumps(list(prefixes), ensure_ascii=False)
+
+    def validate(self, prefixes: Iterable[str]) -> Tuple[str, ...]:
+        """Nettoie une liste de préfixes (doublons retirés); ValueError si invalide"""
+        cleaned: List[str] = []
+        for prefix in prefixes:
+            if not prefix or prefix in cleaned:
+                continue
+            if len(prefix) > self.MAX_LENGTH:
+                raise ValueError(f"Préfixe trop long (max {self.MAX_LENGTH} caractères): {prefix}")
+            if prefix.startswith(('/', '@', '#', '<')):
+                raise ValueError(f"Préfixe réservé par Discord: {prefix}")
+            cleaned.append(prefix)
+        if not cleaned:
+            raise ValueError("Au moins un préfixe est requis")
+        if len(cleaned) > self.MAX_PREFIXES:
+            raise ValueError(f"Maximum {self.MAX_PREFIXES} préfixes")
+        return tuple(cleaned)
+
+    def _resolve(self, prefixes: Tuple[str, ...]) -> Tuple[str, ...]:
+        # Plus long d'abord: "!!" doit être essayé avant "!"
+        return tuple(sorted(set(prefixes) | set(self._mentions), key=len, reverse=True))
+
+    def set_bot_user(self, user_id: int):
+        """Active le préfixe mention (`@Bot commande`) une fois l'identité du bot connue"""
+        self._mentions = (f"<@{user_id}> ", f"<@!{user_id}> ") if self.mention else ()
+        self._default_resolved = self._resolve((self.default,))
+        self._resolved = {guild_id: self._resolve(p) for guild_id, p in self._custom.items()}
+
+    def load(self, rows: Iterable[Tuple[int, Optional[str]]]) -> int:
+        """Remplit le cache depuis des lignes (guild_id, prefix)"""
+        self._custom.clear()
+        self._resolved.clear()
+        for guild_id, raw in rows:
+            prefixes = self.parse(raw)
+            if prefixes and prefixes != (self.default,):
+                self.put(guild_id, prefixes)
+        return len(self._custom)
+
+    def put(self, guild_id: int, prefixes: Optional[Tuple[str, ...]]):
+        """Met à jour un serveur en mémoire (None ou défaut = préfixe par défaut)"""
+        if not prefixes or prefixes == (self.default,):
+            self._custom.pop(guild_id, None)
+            self._resolved.pop(guild_id, None)
+            return
+        self._custom[guild_id] = prefixes
+        self._resolved[guild_id] = self._resolve(prefixes)
+
+    def get(self, guild_id: Optional[int]) -> Tuple[str, ...]:
+        """Préfixes reconnus (mentions comprises) pour un serveur, sans E/S"""
+        if guild_id is None:
+            return self._default_resolved
+        return self._resolved.get(guild_id, self._default_resolved)
+
+    def configured(self, guild_id: int) -> Tuple[str, ...]:
+        """Préfixes choisis par le serveur (sans les mentions)"""
+        return self._custom.get(guild_id, (self.default,))
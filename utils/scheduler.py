@@ -0,0 +1,210 @@
+"""
+Planificateur d'échéances (rappels, giveaways, sondages, timeouts) pour le bot Discord
+
+Un seul tas binaire en mémoire contient toutes les échéances; la tâche du
+planificateur dort jusqu'à la prochaine et la confie au gestionnaire enregistré
+pour son type. Chaque type fournit un chargeur qui relit ses échéances en
+attente depuis sa table au démarrage: aucune requête périodique n'est nécessaire.
+"""
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+class ScheduledJob:
+    """Échéance planifiée"""
+
+    __slots__ = ('job_type', 'key', 'due', 'payload', 'cancelled')
+
+    def __init__(self, job_type: str, key: Hashable, due: float, payload: Any = None):
+        self.job_type = job_type
+        self.key = key
+        self.due = due
+        self.payload = payload
+        self.cancelled = False
+
+    @property
+    def lateness(self) -> float:
+        """Retard (secondes) entre l'échéance et maintenant"""
+        return time.time() - self.due
+
+JobHandler = Callable[[ScheduledJob], Awaitable[None]]
+# Un chargeur retourne [(clé, échéance, charge utile), ...]
+JobLoader = Callable[[], Awaitable[Iterable[Tuple[Hashable, Union[datetime, float], Any]]]]
+
+def _timestamp(when: Union[datetime, float, str]) -> float:
+    if isinstance(when, str):
+        when = datetime.fromisoformat(when)
+    if isinstance(when, datetime):
+        # Les dates naïves sont en heure locale (datetime.now()), comme en base
+        return when.timestamp()
+    return float(when)
+
+class Scheduler:
+    """Tas d'échéances avec un gestionnaire par type de tâche"""
+
+    # Plafond de sommeil: protège contre les sauts d'horloge système
+    MAX_SLEEP = 300.0
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, ScheduledJob]] = []
+        self._jobs: Dict[Tuple[str, Hashable], ScheduledJob] = {}
+        self._handlers: Dict[str, JobHandler] = {}
+        self._loaders: Dict[str, JobLoader] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        self._wait_ready: Optional[Callable[[], Awaitable[Any]]] = None
+
+        # Statistiques
+        self.dispatched = 0
+        self.failed = 0
+        self.max_lateness = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    async def register(self, job_type: str, handler: JobHandler, loader: Optional[JobLoader] = None):
+        """Enregistre le gestionnaire (et le chargeur) d'un type de tâche
+
+        Si le planificateur tourne déjà (cog rechargé), le chargeur est exécuté tout de suite.
+        """
+        self._handlers[job_type] = handler
+        if loader is not None:
+            self._loaders[job_type] = loader
+            if self.is_running:
+                await self._load(job_type)
+
+    def unregister(self, job_type: str):
+        """Retire un type de tâche et oublie ses échéances en mémoire"""
+        self._handlers.pop(job_type, None)
+        self._loaders.pop(job_type, None)
+        for (kind, key) in [k for k in self._jobs if k[0] == job_type]:
+            self.cancel(kind, key)
+
+    def schedule(self, job_type: str, key: Hashable, when: Union[datetime, float, str],
+                 payload: Any = None) -> ScheduledJob:
+        """Planifie (ou replanifie) l'échéance `key` du type `job_type`"""
+        self.cancel(job_type, key)
+        job = ScheduledJob(job_type, key, _timestamp(when), payload)
+        self._jobs[(job_type, key)] = job
+        heapq.heappush(self._heap, (job.due, next(self._counter), job))
+        # Réveiller la boucle si cette échéance devient la plus proche
+        if self._heap[0][2] is job:
+            self._wakeup.set()
+        return job
+
+    def cancel(self, job_type: str, key: Hashable) -> bool:
+        """Annule une échéance (suppression paresseuse du tas)"""
+        job = self._jobs.pop((job_type, key), None)
+        if job is None:
+            return False
+        job.cancelled = True
+        return True
+
+    def next_due(self) -> Optional[float]:
+        self._discard_cancelled()
+        return self._heap[0][0] if self._heap else None
+
+    async def start(self, wait_ready: Optional[Callable[[], Awaitable[Any]]] = None):
+        """Charge les échéances en attente et démarre la boucle
+
+        `wait_ready` (ex: bot.wait_until_ready) est attendu avant la première exécution.
+        """
+        if self.is_running:
+            return
+        self._wait_ready = wait_ready
+        for job_type in list(self._loaders):
+            await self._load(job_type)
+        self._task = asyncio.create_task(self._run(), name="scheduler")
+        logger.info(f"⏱️ Planificateur démarré ({len(self._jobs)} échéances)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._running):
+            task.cancel()
+
+    async def _load(self, job_type: str):
+        try:
+            entries = await self._loaders[job_type]()
+            count = 0
+            for key, when, payload in entries:
+                self.schedule(job_type, key, when, payload)
+                count += 1
+            logger.info(f"⏱️ {count} échéance(s) '{job_type}' chargée(s)")
+        except Exception as e:
+            logger.error(f"Erreur chargement échéances '{job_type}': {e}")
+
+    def _discard_cancelled(self):
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+
+    async def _run(self):
+        if self._wait_ready is not None:
+            await self._wait_ready()
+
+        while True:
+            self._discard_cancelled()
+            self._wakeup.clear()
+
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            due, _, job = self._heap[0]
+            delay = due - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min(delay, self.MAX_SLEEP))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            self._jobs.pop((job.job_type, job.key), None)
+            task = asyncio.create_task(self._dispatch(job), name=f"scheduler-{job.job_type}")
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _dispatch(self, job: ScheduledJob):
+        handler = self._handlers.get(job.job_type)
+        if handler is None:
+            logger.warning(f"Aucun gestionnaire pour l'échéance '{job.job_type}' ({job.key})")
+            return
+
+        self.max_lateness = max(self.max_lateness, job.lateness)
+        try:
+            await handler(job)
+            self.dispatched += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Erreur échéance '{job.job_type}' ({job.key}): {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        next_due = self.next_due()
+        return {
+            'pending': len(self._jobs),
+            'dispatched': self.dispatched,
+            'failed': self.failed,
+            'max_lateness': self.max_lateness,
+            'next_in': max(0.0, next_due - time.time()) if next_due is not None else None
+        }
+
+# Instance globale
+scheduler = Scheduler()
@@ -3,6 +3,8 @@ Module de sécurité et validation pour le bot Discord
 """
 import re
 import ast
+import math
+import time
 import operator
 import asyncio
 from typing import Any, Dict, List, Optional, Union, Callable
@@ -14,6 +16,7 @@ import discord
 from functools import wraps
 
 from config import Config
+from utils.matcher import content_matcher, MatchHit
 # Assurez-vous que utils/logger.py contient la définition de bot_logger, par exemple :
 # bot_logger = logging.getLogger("bot_logger")
 # Sinon, utilisez le logger local défini dans ce fichier :
@@ -193,47 +196,127 @@ class SafeCalculator:
             raise SecurityError(f"Élément non autorisé dans l'expression: {type(node).__name__}")
 
 class RateLimiter:
-    """Système de limitation de taux pour éviter le spam"""
+    """Limitation de taux GCRA (seau à jetons) par clé (portée, commande, sujet)
     
-    def __init__(self):
-        self.user_buckets: Dict[int, List[datetime]] = {}
-        self.guild_buckets: Dict[int, List[datetime]] = {}
-        
-    def is_rate_limited(self, user_id: int, guild_id: Optional[int] = None, 
-                       max_requests: int = 5, window_seconds: int = 60) -> bool:
-        """Vérifie si un utilisateur est limité par le taux"""
-        now = datetime.now()
-        cutoff = now - timedelta(seconds=window_seconds)
+    L'état d'une clé tient en un seul float: le « temps d'arrivée théorique » (TAT).
+    Une limite de `max_requests` par `window_seconds` autorise une rafale de
+    `max_requests` puis une requête toutes les `window_seconds / max_requests`.
+    Une clé dont le TAT est passé a un seau plein: elle ne porte plus d'information
+    et est retirée par l'éviction périodique.
+    """
+    
+    SCOPES = ('user', 'guild', 'member', 'channel')
+    
+    def __init__(self, sweep_interval: float = 60.0):
+        self.sweep_interval = sweep_interval
+        self._tat: Dict[tuple, float] = {}
+        self._task: Optional[asyncio.Task] = None
         
-        # Nettoyer les anciennes entrées
-        if user_id in self.user_buckets:
-            self.user_buckets[user_id] = [
-                req_time for req_time in self.user_buckets[user_id] 
-                if req_time > cutoff
-            ]
-        else:
-            self.user_buckets[user_id] = []
-            
-        # Vérifier la limite
-        if len(self.user_buckets[user_id]) >= max_requests:
+        # Statistiques
+        self.allowed = 0
+        self.limited = 0
+        self.evicted = 0
+    
+    @staticmethod
+    def make_key(scope: str, command: str, user_id: Optional[int] = None,
+                 guild_id: Optional[int] = None, channel_id: Optional[int] = None) -> tuple:
+        """Clé de limitation; hors serveur, les portées serveur retombent sur l'utilisateur"""
+        if scope == 'guild' and guild_id is not None:
+            return ('guild', command, guild_id)
+        if scope == 'member' and guild_id is not None:
+            return ('member', command, guild_id, user_id)
+        if scope == 'channel' and channel_id is not None:
+            return ('channel', command, channel_id)
+        return ('user', command, user_id)
+    
+    def hit(self, key: tuple, max_requests: int = 5, window_seconds: float = 60,
+            now: Optional[float] = None) -> float:
+        """Consomme une requête: retourne 0 si autorisée, sinon le délai d'attente (s)"""
+        if now is None:
+            now = time.monotonic()
+        interval = window_seconds / max(1, max_requests)
+        tat = self._tat.get(key, now)
+        new_tat = (tat if tat > now else now) + interval
+        allow_at = new_tat - window_seconds
+        if now < allow_at:
+            self.limited += 1
+            return allow_at - now
+        self._tat[key] = new_tat
+        self.allowed += 1
+        return 0.0
+    
+    def retry_after(self, key: tuple, max_requests: int = 5, window_seconds: float = 60,
+                    now: Optional[float] = None) -> float:
+        """Délai avant la prochaine requête autorisée, sans rien consommer"""
+        if now is None:
+            now = time.monotonic()
+        tat = self._tat.get(key)
+        if tat is None:
+            return 0.0
+        interval = window_seconds / max(1, max_requests)
+        return max(0.0, tat + interval - window_seconds - now)
+    
+    def reset(self, key: tuple):
+        self._tat.pop(key, None)
+    
+    def evict(self, now: Optional[float] = None) -> int:
+        """Retire les clés inactives (seau de nouveau plein)"""
+        if now is None:
+            now = time.monotonic()
+        idle = [key for key, tat in self._tat.items() if tat <= now]
+        for key in idle:
+            del self._tat[key]
+        self.evicted += len(idle)
+        return len(idle)
+    
+    def start(self):
+        """Démarre l'éviction périodique des clés inactives"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._evict_loop(), name="rate-limiter-eviction")
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _evict_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            evicted = self.evict()
+            if evicted:
+                logger.debug(f"RATE_LIMIT: {evicted} clé(s) inactive(s) retirée(s), {len(self._tat)} active(s)")
+    
+    def is_rate_limited(self, user_id: int, guild_id: Optional[int] = None,
+                        max_requests: int = 5, window_seconds: int = 60,
+                        command: str = "global", scope: str = "user") -> bool:
+        """Vérifie (et consomme) la limite d'un utilisateur pour une commande"""
+        key = self.make_key(scope, command, user_id, guild_id)
+        if self.hit(key, max_requests, window_seconds):
             bot_logger.warning(
                 f"RATE_LIMIT: Dépassement du taux de {max_requests}/{window_seconds}s "
-                f"pour l'utilisateur {user_id} dans le serveur {guild_id or 0}"
+                f"sur '{command}' pour l'utilisateur {user_id} dans le serveur {guild_id or 0}"
             )
             return True
-            
-        # Ajouter la requête actuelle
-        self.user_buckets[user_id].append(now)
         return False
     
-    def get_remaining_cooldown(self, user_id: int, window_seconds: int = 60) -> int:
-        """Retourne le temps restant avant de pouvoir refaire une requête"""
-        if user_id not in self.user_buckets:
-            return 0
-            
-        oldest_request = min(self.user_buckets[user_id])
-        elapsed = (datetime.now() - oldest_request).total_seconds()
-        return max(0, int(window_seconds - elapsed))
+    def get_remaining_cooldown(self, user_id: int, window_seconds: int = 60,
+                               command: str = "global", max_requests: int = 1,
+                               guild_id: Optional[int] = None, scope: str = "user") -> int:
+        """Retourne le temps restant (secondes, arrondi au supérieur) avant de pouvoir refaire une requête"""
+        key = self.make_key(scope, command, user_id, guild_id)
+        return math.ceil(self.retry_after(key, max_requests, window_seconds))
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            'keys': len(self._tat),
+            'allowed': self.allowed,
+            'limited': self.limited,
+            'evicted': self.evicted
+        }
 
 class ContentFilter:
     """Filtre de contenu pour détecter le spam et contenu inapproprié"""
@@ -244,6 +327,12 @@ class ContentFilter:
         'bit.ly', 'tinyurl', 'free', 'nitro', 'gift'
     }
     
+    # Domaines de liens suspects (raccourcisseurs, IP loggers...)
+    SUSPICIOUS_DOMAINS = {
+        'bit.ly', 'tinyurl.com', 'goo.gl', 'ow.ly', 't.co',
+        'grabify.link', 'iplogger.org', 'discord-nitro'
+    }
+    
     # Patterns suspects
     SUSPICIOUS_PATTERNS = [
         re.compile(r'(.)\1{10,}'),  # Répétition excessive de caractères
@@ -252,22 +341,38 @@ class ContentFilter:
         re.compile(r'[A-Z]{10,}'),  # Texte en CAPS excessif
     ]
     
+    # Les mêmes patterns en une seule alternation (un seul parcours du texte)
+    SUSPICIOUS_RE = re.compile(
+        r'(.)\1{10,}'
+        r'|(?i:https?://(?!discord\.com|github\.com))'
+        r'|(?i:@everyone|@here)'
+        r'|[A-Z]{10,}'
+    )
+    
+    @classmethod
+    def scan(cls, content_lower: str, guild_id: Optional[int] = None) -> List[MatchHit]:
+        """Mots interdits, liens suspects et déclencheurs du serveur en un seul passage"""
+        return content_matcher.scan(guild_id, content_lower)
+    
     @classmethod
-    def is_spam(cls, content: str) -> bool:
-        """Détecte si le contenu est du spam"""
-        content_lower = content.lower()
+    def is_spam(cls, content: str, content_lower: Optional[str] = None,
+                hits: Optional[List[MatchHit]] = None) -> bool:
+        """Détecte si le contenu est du spam
+        
+        content_lower et hits peuvent être fournis s'ils ont déjà été calculés
+        (pipeline de messages) pour éviter de reparcourir le texte.
+        """
+        if hits is None:
+            if content_lower is None:
+                content_lower = content.lower()
+            hits = cls.scan(content_lower)
         
         # Vérifier les mots interdits
-        for word in cls.BANNED_WORDS:
-            if word in content_lower:
-                return True
-                
+        if any(hit.category == content_matcher.BANNED for hit in hits):
+            return True
+        
         # Vérifier les patterns suspects
-        for pattern in cls.SUSPICIOUS_PATTERNS:
-            if pattern.search(content):
-                return True
-                
-        return False
+        return cls.SUSPICIOUS_RE.search(content) is not None
     
     @classmethod
     def filter_content(cls, content: str, user_id: int, guild_id: int) -> str:
@@ -386,8 +491,10 @@ class SessionManager:
 # Instances globales
 input_validator = InputValidator()
 safe_calculator = SafeCalculator()
-rate_limiter = RateLimiter()
+rate_limiter = RateLimiter(Config.RATE_LIMIT_SWEEP_INTERVAL)
 content_filter = ContentFilter()
+content_matcher.set_global(content_matcher.BANNED, ContentFilter.BANNED_WORDS)
+content_matcher.set_global(content_matcher.LINK, ContentFilter.SUSPICIOUS_DOMAINS)
 permission_manager = PermissionManager()
 session_manager = SessionManager()
 
@@ -431,14 +538,35 @@ def require_permissions(permission_level: str = "member"):
         return wrapper
     return decorator
 
-def rate_limit(max_requests: int = 5, window_seconds: int = 60):
-    """Décorateur pour limiter le taux d'utilisation (compatible slash commands)"""
+def _format_delay(seconds: float) -> str:
+    """Délai lisible: 45s, 12min 5s, 23h 59min"""
+    seconds = math.ceil(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}min {seconds}s" if seconds else f"{minutes}min"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes}min" if minutes else f"{hours}h"
+
+def rate_limit(max_requests: int = 5, window_seconds: int = 60, scope: str = "user"):
+    """Décorateur pour limiter le taux d'utilisation (compatible slash commands)
+    
+    La limite est propre à chaque commande; `scope` choisit le sujet compté:
+    'user' (défaut), 'member' (utilisateur dans un serveur), 'guild' ou 'channel'.
+    """
+    if scope not in RateLimiter.SCOPES:
+        raise ValueError(f"Portée de limitation inconnue: {scope}")
+    
     def decorator(func: Callable) -> Callable:
+        command = func.__qualname__
+        
         @wraps(func)
         async def wrapper(self, interaction: discord.Interaction, *args, **kwargs):
             # Pour slash commands, utiliser .user
             user = interaction.user if hasattr(interaction, 'user') else getattr(interaction, 'author', None)
             guild = getattr(interaction, 'guild', None)
+            channel = getattr(interaction, 'channel', None)
             
             if user is None:
                 if hasattr(interaction, 'response') and not interaction.response.is_done():
@@ -446,18 +574,23 @@ def rate_limit(max_requests: int = 5, window_seconds: int = 60):
                 else:
                     await interaction.followup.send("❌ Erreur: utilisateur introuvable.", ephemeral=True)
                 return
-
-            if rate_limiter.is_rate_limited(
-                user.id,
+            
+            key = rate_limiter.make_key(
+                scope, command, user.id,
                 guild.id if guild else None,
-                max_requests,
-                window_seconds
-            ):
-                cooldown = rate_limiter.get_remaining_cooldown(user.id, window_seconds)
+                channel.id if channel else None
+            )
+            retry_after = rate_limiter.hit(key, max_requests, window_seconds)
+            if retry_after:
+                bot_logger.warning(
+                    f"RATE_LIMIT: Dépassement du taux de {max_requests}/{window_seconds}s "
+                    f"sur '{command}' pour {key[2:]}"
+                )
+                message = f"⏱️ Trop de requêtes. Réessayez dans {_format_delay(retry_after)}."
                 if hasattr(interaction, 'response') and not interaction.response.is_done():
-                    await interaction.response.send_message(f"⏱️ Trop de requêtes. Réessayez dans {cooldown}s.", ephemeral=True)
+                    await interaction.response.send_message(message, ephemeral=True)
                 else:
-                    await interaction.followup.send(f"⏱️ Trop de requêtes. Réessayez dans {cooldown}s.", ephemeral=True)
+                    await interaction.followup.send(message, ephemeral=True)
                 return
                 
             return await func(self, interaction, *args, **kwargs)
@@ -0,0 +1,125 @@
+"""
+Détection du spam de messages par (serveur, utilisateur)
+
+Chaque membre actif a un tampon circulaire de taille fixe contenant les instants
+(monotoniques) de ses derniers messages: ajouter un message et vérifier le seuil
+se fait en O(1). Les entrées sont rangées de la moins récemment active à la plus
+récente, ce qui permet de retirer les membres inactifs au fil de l'eau.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+class SpamThresholds(NamedTuple):
+    """Seuils anti-spam d'un serveur: `max_messages` en `window` secondes"""
+    enabled: bool = True
+    max_messages: int = 5
+    window: float = 10.0
+    timeout_minutes: int = 5
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SpamThresholds':
+        return cls(**{field: data[field] for field in cls._fields if field in data})
+
+class _Ring:
+    """Tampon circulaire des instants des `size` messages précédents"""
+
+    __slots__ = ('times', 'pos', 'last')
+
+    def __init__(self, size: int):
+        self.times = [float('-inf')] * size
+        self.pos = 0
+        self.last = float('-inf')
+
+class SpamTracker:
+    """Compteurs de messages par (serveur, utilisateur) et seuils par serveur"""
+
+    def __init__(self, default: SpamThresholds = SpamThresholds()):
+        self.default = default
+        self._thresholds: Dict[int, SpamThresholds] = {}
+        self._rings: "OrderedDict[Tuple[int, int], _Ring]" = OrderedDict()
+        # Une entrée plus ancienne que la plus grande fenêtre ne peut plus déclencher
+        self._idle_after = default.window
+
+        # Statistiques
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def thresholds(self, guild_id: int) -> SpamThresholds:
+        return self._thresholds.get(guild_id, self.default)
+
+    def enforced(self, guild_id: int) -> bool:
+        """True si /antispam a été activé sur ce serveur (indépendamment de l'automod)"""
+        thresholds = self._thresholds.get(guild_id)
+        return thresholds is not None and thresholds.enabled
+
+    def set_thresholds(self, guild_id: int, thresholds: Optional[SpamThresholds]):
+        """Définit (ou réinitialise avec None) les seuils d'un serveur"""
+        if thresholds is None:
+            self._thresholds.pop(guild_id, None)
+        else:
+            self._thresholds[guild_id] = thresholds
+        self._idle_after = max([self.default.window] + [t.window for t in self._thresholds.values()])
+        # Les tampons de ce serveur n'ont peut-être plus la bonne taille
+        for key in [key for key in self._rings if key[0] == guild_id]:
+            del self._rings[key]
+
+    def hit(self, guild_id: int, user_id: int, now: Optional[float] = None) -> bool:
+        """Enregistre un message; retourne True si le seuil du serveur est atteint"""
+        if now is None:
+            now = time.monotonic()
+        thresholds = self._thresholds.get(guild_id, self.default)
+        if not thresholds.enabled:
+            return False
+
+        self._evict(now)
+
+        key = (guild_id, user_id)
+        ring = self._rings.get(key)
+        if ring is None:
+            # Les `max_messages - 1` messages précédents suffisent pour juger le suivant
+            ring = self._rings[key] = _Ring(max(1, thresholds.max_messages - 1))
+        else:
+            self._rings.move_to_end(key)
+
+        # La case écrasée contient le message arrivé `max_messages - 1` messages plus tôt
+        oldest = ring.times[ring.pos]
+        ring.times[ring.pos] = now
+        ring.pos = (ring.pos + 1) % len(ring.times)
+        ring.last = now
+
+        if now - oldest <= thresholds.window:
+            # Repartir de zéro: un seul déclenchement par rafale
+            del self._rings[key]
+            return True
+        return False
+
+    def _evict(self, now: float):
+        """Retire les membres sans message depuis plus que la plus grande fenêtre"""
+        rings = self._rings
+        cutoff = now - self._idle_after
+        while rings:
+            key, ring = next(iter(rings.items()))
+            if ring.last >= cutoff:
+                break
+            del rings[key]
+            self.evicted += 1
+
+    def reset(self, guild_id: int, user_id: int):
+        self._rings.pop((guild_id, user_id), None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs exportés en jauges (spam_tracked_members, spam_evicted_total)"""
+        return {
+            'tracked': len(self._rings),
+            'evicted': self.evicted,
+            'configured_guilds': len(self._thresholds)
+        }
+
+# Instance globale
+spam_tracker = SpamTracker()
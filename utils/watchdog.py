@@ -0,0 +1,184 @@
+"""
+Surveillance de la boucle asyncio: retard d'ordonnancement et appels bloquants
+
+Une tâche « battement » se réveille à intervalle fixe et mesure son retard (lag),
+enregistré dans les métriques ('loop', 'lag'). Un thread de surveillance vérifie que
+les battements arrivent: si la boucle est bloquée au-delà du seuil, il capture la
+pile du thread de la boucle et la tâche en cours, ce qui désigne le code fautif.
+"""
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from config import Config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Cadres internes d'asyncio (boucle, runners) retirés des piles capturées
+_ASYNCIO_DIR = asyncio.__file__.rsplit("__init__", 1)[0]
+
+class StallSample:
+    """Échantillon de pile capturé pendant un blocage de la boucle"""
+
+    __slots__ = ('when', 'blocked_ms', 'lag_ms', 'task', 'stack')
+
+    def __init__(self, blocked_ms: float, task: str, stack: List[str]):
+        self.when = datetime.now()
+        self.blocked_ms = blocked_ms  # durée de blocage au moment de la capture
+        self.lag_ms: Optional[float] = None  # retard total, connu quand la boucle repart
+        self.task = task
+        self.stack = stack
+
+    @property
+    def location(self) -> str:
+        """Dernière ligne de code exécutée (« fichier:ligne dans fonction »)"""
+        if not self.stack:
+            return "?"
+        return self.stack[-1].strip().splitlines()[0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'when': self.when.isoformat(),
+            'blocked_ms': self.blocked_ms,
+            'lag_ms': self.lag_ms,
+            'task': self.task,
+            'location': self.location,
+            'stack': self.stack
+        }
+
+class LoopWatchdog:
+    """Mesure continue du retard de la boucle et capture des piles en cas de blocage"""
+
+    # Nombre de cadres conservés par échantillon
+    STACK_DEPTH = 15
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, max_samples: int = 20):
+        self.interval = interval
+        self.threshold = threshold
+        self.samples: Deque[StallSample] = deque(maxlen=max_samples)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._beat = time.perf_counter()
+        self._sampled_beat: Optional[float] = None
+
+        # Statistiques
+        self.late_ticks = 0
+        self.max_lag = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Démarre le battement (dans la boucle) et, si un seuil est fixé, le thread de surveillance"""
+        if self.is_running or self.interval <= 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._tick(), name="loop-watchdog")
+        if self.threshold <= 0:
+            # Seuil nul: mesure du retard seulement, sans capture de pile
+            logger.info("🩺 Mesure du retard de la boucle démarrée (capture de pile désactivée)")
+            return
+        self._thread = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"🩺 Surveillance de la boucle démarrée (seuil {self.threshold * 1000:.0f} ms)")
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    async def _tick(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self._beat = now
+
+            lag = max(0.0, now - expected)
+            metrics.observe('loop', 'lag', '-', int(lag * 1e9))
+            if lag > self.max_lag:
+                self.max_lag = lag
+            if 0 < self.threshold <= lag:
+                self.late_ticks += 1
+                # Compléter l'échantillon capturé pendant ce blocage
+                if self._sampled_beat is not None and self.samples:
+                    self.samples[-1].lag_ms = lag * 1000
+                    self._sampled_beat = None
+
+    def _monitor(self):
+        """Thread: capture la pile de la boucle quand les battements s'arrêtent"""
+        poll = max(0.01, self.threshold / 2)
+        while not self._stop.wait(poll):
+            beat = self._beat
+            blocked = time.perf_counter() - beat - self.interval
+            # Une seule capture par blocage (même battement de référence)
+            if blocked < self.threshold or self._sampled_beat == beat:
+                continue
+            self._sampled_beat = beat
+            try:
+                self._capture(blocked)
+            except Exception as e:
+                logger.debug(f"Capture de pile impossible: {e}")
+
+    def _capture(self, blocked: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        frames = [entry for entry in traceback.extract_stack(frame)
+                  if not entry.filename.startswith(_ASYNCIO_DIR)]
+        stack = traceback.format_list(frames[-self.STACK_DEPTH:])
+
+        task_name = "-"
+        try:
+            task = asyncio.current_task(self._loop)
+            if task is not None:
+                coro = task.get_coro()
+                task_name = f"{task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+        except RuntimeError:
+            pass
+
+        sample = StallSample(blocked * 1000, task_name, stack)
+        self.samples.append(sample)
+        logger.warning(
+            f"🐌 Boucle asyncio bloquée depuis {sample.blocked_ms:.0f} ms "
+            f"(tâche {task_name}) à {sample.location}\n{''.join(stack)}"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        lag = next(iter(metrics.summaries('loop')), {})
+        return {
+            'running': self.is_running,
+            'threshold_ms': self.threshold * 1000,
+            'ticks': lag.get('count', 0),
+            'late_ticks': self.late_ticks,
+            'max_lag_ms': self.max_lag * 1000,
+            'p50_ms': lag.get('p50_ms', 0.0),
+            'p95_ms': lag.get('p95_ms', 0.0),
+            'p99_ms': lag.get('p99_ms', 0.0),
+            'samples': [sample.to_dict() for sample in self.samples]
+        }
+
+# Instance globale
+loop_watchdog = LoopWatchdog(Config.LOOP_WATCHDOG_INTERVAL, Config.LOOP_LAG_THRESHOLD)
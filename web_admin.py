@@ -0,0 +1,460 @@
+"""
+Interface d'administration servie dans le processus du bot (aiohttp)
+
+Activée par INTERFACE_EMBEDDED=true, elle remplace `web_interface.py` lancé à part:
+mêmes templates et mêmes routes, mais les pages lisent l'état vivant du bot
+(latence, timeouts en cours), lisent la base sur les connexions en lecture seule
+du bot (threads de rapport, hors du pool des écritures) et le flux en direct
+s'abonne directement au bus où le bot publie. Il n'y a plus de second
+processus en concurrence pour les verrous de la base.
+"""
+import hmac
+import json
+import math
+import time
+import base64
+import asyncio
+import hashlib
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from urllib.parse import urlencode
+
+import discord
+import jinja2
+from aiohttp import web
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from config import Config
+from database import db_manager
+from utils import admin_views
+from utils.dashboard_stats import DashboardStats
+from utils.events import event_bus
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
+
+SESSION_COOKIE = "admin_session"
+SESSION_LIFETIME = 3600  # 1 heure, comme l'interface Flask
+
+# Commentaire SSE envoyé sans événement pendant cette durée (détection des clients partis)
+STREAM_KEEPALIVE = 15
+
+# Nom de route -> chemin (équivalent de `url_for` pour les templates)
+ROUTES = {
+    'index': '/',
+    'login': '/login',
+    'logout': '/logout',
+    'dashboard': '/dashboard',
+    'economy': '/economy',
+    'moderation': '/moderation',
+    'settings': '/settings',
+    'api_stats': '/api/stats',
+    'api_stream': '/api/stream',
+    'prometheus_metrics': '/metrics',
+}
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+def url_for(endpoint: str, **params: Any) -> str:
+    query = {key: value for key, value in params.items() if value not in (None, '')}
+    path = ROUTES[endpoint]
+    return f"{path}?{urlencode(query)}" if query else path
+
+def _redirect(location: str) -> web.Response:
+    return web.Response(status=302, headers={'Location': location})
+
+def _int_arg(request: web.Request, name: str, default: Optional[int] = None) -> Optional[int]:
+    try:
+        return int(request.query[name])
+    except (KeyError, ValueError):
+        return default
+
+class _TemplateRequest:
+    """Sous-ensemble de `flask.request` utilisé par les templates"""
+
+    __slots__ = ('endpoint', 'args')
+
+    def __init__(self, request: web.Request):
+        self.endpoint = request.match_info.route.name
+        self.args = request.query
+
+class _Session(dict):
+    """Session stockée dans un cookie signé (HMAC-SHA256), comme la session Flask"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.modified = False
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.modified = True
+
+    def pop(self, *args):
+        self.modified = True
+        return super().pop(*args)
+
+    def clear(self):
+        super().clear()
+        self.modified = True
+
+    def flash(self, message: str, category: str = 'message'):
+        self['_flashes'] = self.get('_flashes', []) + [[category, message]]
+
+class AdminInterface:
+    """Application aiohttp de l'interface d'administration, sur la boucle du bot"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.start_time = datetime.now()
+        self.stats = DashboardStats(db_manager.reader, Config.DASHBOARD_STATS_TTL)
+        self.env = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(str(TEMPLATES_DIR)),
+            autoescape=jinja2.select_autoescape(['html'])
+        )
+        self._secret = hashlib.sha256(Config.INTERFACE_SECRET.encode('utf-8')).digest()
+        self._password_hash: Optional[str] = None
+        self._runner: Optional[web.AppRunner] = None
+        # Tâches des flux SSE ouverts (annulées à l'arrêt, sinon attendues jusqu'au délai)
+        self._streams: Set[asyncio.Task] = set()
+        # Publication périodique des compteurs (utilisateurs...) tant qu'un flux est ouvert
+        self._stats_task: Optional[asyncio.Task] = None
+
+    # === Cycle de vie ===
+
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._error_middleware, self._session_middleware])
+        router = app.router
+        router.add_get(ROUTES['index'], self.index, name='index')
+        router.add_route('*', ROUTES['login'], self.login, name='login')
+        router.add_get(ROUTES['logout'], self.logout, name='logout')
+        router.add_get(ROUTES['dashboard'], self._auth(self.dashboard), name='dashboard')
+        router.add_get(ROUTES['economy'], self._auth(self.economy), name='economy')
+        router.add_get(ROUTES['moderation'], self._auth(self.moderation), name='moderation')
+        router.add_route('*', ROUTES['settings'], self._auth(self.settings), name='settings')
+        router.add_get(ROUTES['api_stats'], self._auth(self.api_stats), name='api_stats')
+        router.add_get(ROUTES['api_stream'], self._auth(self.api_stream), name='api_stream')
+        router.add_get(ROUTES['prometheus_metrics'], self.prometheus_metrics, name='prometheus_metrics')
+        app.on_shutdown.append(self._close_streams)
+        return app
+
+    async def _close_streams(self, app: web.Application):
+        for task in list(self._streams):
+            task.cancel()
+        if self._stats_task is not None:
+            self._stats_task.cancel()
+
+    async def _publish_stats(self):
+        """Publie STATS quand les compteurs changent: seuls commandes et serveurs ont des deltas"""
+        last: Optional[Dict[str, int]] = None
+        try:
+            while self._streams:
+                try:
+                    stats = await self.stats.get_async()
+                    if stats != last:
+                        last = stats
+                        event_bus.publish(event_bus.STATS, stats)
+                except Exception as e:
+                    logger.error(f"Erreur publication des statistiques: {e}")
+                await asyncio.sleep(Config.LIVE_FEED_INTERVAL)
+        finally:
+            self._stats_task = None
+
+    async def start(self):
+        # PBKDF2 volontairement lent: calculé hors de la boucle
+        self._password_hash = await asyncio.to_thread(generate_password_hash, Config.INTERFACE_PASSWORD)
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, Config.INTERFACE_HOST, Config.INTERFACE_PORT)
+        await site.start()
+        logger.info(f"🌐 Interface web intégrée démarrée sur http://{Config.INTERFACE_HOST}:{Config.INTERFACE_PORT}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # === Intergiciels ===
+
+    @web.middleware
+    async def _error_middleware(self, request: web.Request, handler: Handler) -> web.StreamResponse:
+        start = time.perf_counter_ns()
+        status = 500
+        try:
+            response = await handler(request)
+            status = response.status
+            return response
+        except web.HTTPNotFound:
+            status = 404
+            return self.render(request, 'error.html', status=404, code=404, message="Page non trouvée",
+                               description="La page que vous cherchez n'existe pas.")
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        except asyncio.CancelledError:
+            # Client déconnecté ou arrêt: pas une erreur serveur
+            status = 499
+            raise
+        except Exception as e:
+            logger.error(f"Erreur interface web ({request.method} {request.path}): {e}")
+            return self.render(request, 'error.html', status=500, code=500, message="Erreur interne",
+                               description="Une erreur s'est produite sur le serveur.")
+        finally:
+            route = request.match_info.route.resource
+            name = route.canonical if route is not None else 'non_trouvee'
+            metrics.observe('http', f"{request.method} {name}", 'web',
+                            time.perf_counter_ns() - start, error=status >= 500)
+
+    @web.middleware
+    async def _session_middleware(self, request: web.Request, handler: Handler) -> web.StreamResponse:
+        session = self._load_session(request.cookies.get(SESSION_COOKIE))
+        request['session'] = session
+        response = await handler(request)
+        if session.modified and not response.prepared:
+            if session:
+                response.set_cookie(SESSION_COOKIE, self._dump_session(session),
+                                    max_age=SESSION_LIFETIME, httponly=True, samesite='Lax')
+            else:
+                response.del_cookie(SESSION_COOKIE)
+        return response
+
+    def _sign(self, payload: bytes) -> str:
+        return hmac.new(self._secret, payload, hashlib.sha256).hexdigest()
+
+    def _dump_session(self, session: _Session) -> str:
+        data = dict(session, _exp=int(time.time()) + SESSION_LIFETIME)
+        payload = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+        return f"{payload.decode('ascii')}.{self._sign(payload)}"
+
+    def _load_session(self, cookie: Optional[str]) -> _Session:
+        if not cookie or '.' not in cookie:
+            return _Session()
+        payload, signature = cookie.rsplit('.', 1)
+        if not hmac.compare_digest(signature, self._sign(payload.encode('ascii', 'replace'))):
+            return _Session()
+        try:
+            data = json.loads(base64.urlsafe_b64decode(payload))
+        except (ValueError, TypeError):
+            return _Session()
+        if not isinstance(data, dict) or data.pop('_exp', 0) < time.time():
+            return _Session()
+        return _Session(data)
+
+    def _auth(self, handler: Handler) -> Handler:
+        async def wrapper(request: web.Request) -> web.StreamResponse:
+            if not request['session'].get('logged_in'):
+                return _redirect(url_for('login'))
+            return await handler(request)
+        return wrapper
+
+    def render(self, request: web.Request, template: str, status: int = 200, **context: Any) -> web.Response:
+        session: _Session = request.get('session', _Session())
+
+        def get_flashed_messages(with_categories: bool = False):
+            flashes = session.pop('_flashes', []) if '_flashes' in session else []
+            return [tuple(flash) for flash in flashes] if with_categories else [m for _, m in flashes]
+
+        html = self.env.get_template(template).render(
+            url_for=url_for,
+            get_flashed_messages=get_flashed_messages,
+            session=session,
+            request=_TemplateRequest(request),
+            **context
+        )
+        return web.Response(text=html, status=status, content_type='text/html')
+
+    # === Données (mémoire du bot, pool SQLite) ===
+
+    def _uptime(self) -> str:
+        started = self.bot.startup_time or self.start_time.astimezone()
+        total_seconds = int((discord.utils.utcnow() - started).total_seconds())
+        hours, remainder = divmod(total_seconds, 3600)
+        return f"{hours}h {remainder // 60}m"
+
+    async def _compute_stats(self) -> Dict[str, Any]:
+        # Mêmes compteurs que l'interface Flask et que les deltas du flux en direct
+        stats: Dict[str, Any] = {'guilds': 0, 'users': 0, 'commands_today': 0}
+        try:
+            stats.update(await self.stats.get_async())
+        except Exception as e:
+            logger.error(f"Erreur calcul statistiques: {e}")
+        latency = self.bot.latency
+        stats['latency_ms'] = round(latency * 1000) if math.isfinite(latency) else None
+        stats['uptime'] = self._uptime()
+        return stats
+
+    async def _recent_activities(self, limit: int = 10) -> List[Dict[str, Any]]:
+        events = event_bus.recent(event_bus.ACTIVITY, limit)
+        if len(events) >= limit:
+            return [event.data for event in events]
+
+        def recent_activities(conn):
+            rows = conn.execute("""
+                SELECT action_type, action_data, timestamp FROM activity_logs ORDER BY id DESC LIMIT ?
+            """, (limit,)).fetchall()
+            return [{'action_type': action_type, 'description': action_data or '', 'timestamp': timestamp}
+                    for action_type, action_data, timestamp in rows]
+
+        try:
+            return await db_manager.run_report(recent_activities)
+        except Exception as e:
+            logger.error(f"Erreur récupération activités récentes: {e}")
+            return []
+
+    async def _member_listing(self, request: web.Request, page_sorts: List[str]) -> Dict[str, Any]:
+        """Contexte commun des pages économie/modération (voir web_interface._member_listing)"""
+        sort = request.query.get('sort', page_sorts[0])
+        context: Dict[str, Any] = {
+            'guilds': [], 'guild_id': None, 'page': None, 'totals': {}, 'global_totals': {},
+            'sorts': page_sorts, 'sort': sort if sort in page_sorts else page_sorts[0],
+            'search': request.query.get('q', '')[:100]
+        }
+        guild_id = _int_arg(request, 'guild')
+        after = request.query.get('after')
+        limit = _int_arg(request, 'limit', admin_views.PAGE_SIZE)
+
+        def listing(conn):
+            # Un seul instantané en lecture seule, dans un thread de rapport: ni connexion
+            # du pool (file d'écriture) ni boucle du bot occupées
+            guilds = admin_views.list_guilds(conn)
+            selected = guild_id if guild_id is not None or not guilds else guilds[0]['id']
+            result = {'guilds': guilds, 'global_totals': admin_views.guild_totals(conn)}
+            if selected is not None:
+                result['guild_id'] = selected
+                result['totals'] = admin_views.guild_totals(conn, selected)
+                result['page'] = admin_views.list_members(
+                    conn, selected, context['sort'], context['search'], after, limit
+                )
+            return result
+
+        context.update(await db_manager.run_report(listing))
+        # Noms à jour depuis le cache de discord.py
+        for guild in context['guilds']:
+            live = self.bot.get_guild(guild['id'])
+            if live is not None:
+                guild['name'] = live.name
+        return context
+
+    # === Pages ===
+
+    async def index(self, request: web.Request) -> web.Response:
+        return _redirect(url_for('dashboard' if request['session'].get('logged_in') else 'login'))
+
+    async def login(self, request: web.Request) -> web.Response:
+        session: _Session = request['session']
+        if request.method == 'POST':
+            form = await request.post()
+            password = str(form.get('password', ''))
+            if await asyncio.to_thread(check_password_hash, self._password_hash, password):
+                session['logged_in'] = True
+                session['login_time'] = datetime.now().isoformat()
+                session.flash('Connexion réussie !', 'success')
+                return _redirect(url_for('dashboard'))
+            session.flash('Mot de passe incorrect.', 'error')
+            logger.warning(f"Tentative de connexion échouée depuis {request.remote}")
+        return self.render(request, 'login.html')
+
+    async def logout(self, request: web.Request) -> web.Response:
+        session: _Session = request['session']
+        session.clear()
+        session.flash('Déconnexion réussie.', 'info')
+        return _redirect(url_for('login'))
+
+    async def dashboard(self, request: web.Request) -> web.Response:
+        stats = await self._compute_stats()
+        alerts = []
+        if not self.bot.guilds:
+            alerts.append({'type': 'warning', 'message': "Le bot n'est connecté à aucun serveur"})
+        if stats['latency_ms'] is not None and stats['latency_ms'] > 1000:
+            alerts.append({'type': 'warning', 'message': f"Latence Discord élevée ({stats['latency_ms']} ms)"})
+        return self.render(request, 'dashboard.html', stats=stats,
+                           recent_activities=await self._recent_activities(10), alerts=alerts)
+
+    async def economy(self, request: web.Request) -> web.Response:
+        context: Dict[str, Any] = {}
+        stats = {'total_coins': 0, 'user_count': 0, 'guild_coins': 0, 'guild_members': 0}
+        try:
+            context = await self._member_listing(request, ['coins', 'xp'])
+            stats['total_coins'] = context['global_totals'].get('coins', 0)
+            stats['user_count'] = (await self.stats.get_async())['users']
+            stats['guild_coins'] = context['totals'].get('coins', 0)
+            stats['guild_members'] = context['totals'].get('members', 0)
+        except Exception as e:
+            logger.error(f"Erreur économie: {e}")
+        return self.render(request, 'economy.html', stats=stats, **context)
+
+    async def moderation(self, request: web.Request) -> web.Response:
+        context: Dict[str, Any] = {}
+        stats: Dict[str, Any] = {'member_count': 0, 'banned_count': 0, 'warned_count': 0}
+        try:
+            context = await self._member_listing(request, ['warnings', 'xp'])
+            stats['member_count'] = context['totals'].get('members', 0)
+            stats['banned_count'] = context['totals'].get('banned', 0)
+            stats['warned_count'] = context['totals'].get('warned', 0)
+            # Timeouts en cours: état vivant du serveur, sans requête
+            guild = self.bot.get_guild(context['guild_id']) if context.get('guild_id') else None
+            if guild is not None:
+                stats['timed_out_count'] = sum(1 for member in guild.members if member.is_timed_out())
+        except Exception as e:
+            logger.error(f"Erreur modération: {e}")
+        return self.render(request, 'moderation.html', stats=stats, **context)
+
+    async def settings(self, request: web.Request) -> web.Response:
+        settings = {'prefix': Config.COMMAND_PREFIX, 'language': 'fr'}
+        if request.method == 'POST':
+            form = await request.post()
+            settings['prefix'] = str(form.get('prefix', Config.COMMAND_PREFIX))
+            settings['language'] = str(form.get('language', 'fr'))
+            request['session'].flash('Paramètres enregistrés.', 'success')
+        return self.render(request, 'settings.html', settings=settings, stats=await self._compute_stats())
+
+    async def api_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(await self._compute_stats())
+
+    async def api_stream(self, request: web.Request) -> web.StreamResponse:
+        """Flux SSE: abonnement direct au bus où le bot publie"""
+        try:
+            last_event_id = int(request.headers.get('Last-Event-ID', ''))
+        except ValueError:
+            last_event_id = None
+        subscription = event_bus.subscribe(
+            (event_bus.ACTIVITY, event_bus.STATS, event_bus.STATS_DELTA), last_event_id, asynchronous=True
+        )
+        task = asyncio.current_task()
+        self._streams.add(task)
+        if self._stats_task is None:
+            self._stats_task = asyncio.create_task(self._publish_stats(), name="admin-stats")
+        try:
+            response = web.StreamResponse(headers={
+                'Content-Type': 'text/event-stream',
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            })
+            await response.prepare(request)
+            snapshot = await self._compute_stats()
+            await response.write(f"retry: 5000\nevent: {event_bus.STATS}\ndata: {json.dumps(snapshot)}\n\n".encode('utf-8'))
+            while True:
+                events = await subscription.get_async(STREAM_KEEPALIVE)
+                if not events:
+                    await response.write(b": keepalive\n\n")
+                for event in events:
+                    await response.write(event.to_sse().encode('utf-8'))
+        except ConnectionResetError:
+            pass
+        finally:
+            # Aussi à l'annulation (client parti, arrêt du serveur), qui se propage ensuite
+            self._streams.discard(task)
+            event_bus.unsubscribe(subscription)
+        return response
+
+    async def prometheus_metrics(self, request: web.Request) -> web.Response:
+        """Export Prometheus directement depuis le registre du bot (routes de l'interface comprises)"""
+        if Config.METRICS_TOKEN:
+            supplied = request.headers.get('Authorization', '')
+            if not hmac.compare_digest(supplied, f"Bearer {Config.METRICS_TOKEN}"):
+                return web.Response(text="Non autorisé\n", status=401, content_type='text/plain')
+        return web.Response(body=metrics.render_prometheus().encode('utf-8'),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
@@ -2,16 +2,17 @@
 Interface web moderne et sécurisée pour le bot Discord
 """
 import os
+import hmac
+import time
 from flask import render_template
 import json
 import asyncio
-import sqlite3
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from functools import wraps
 
-from flask import Flask, request, render_template_string, jsonify, session, redirect, url_for, flash
+from flask import Flask, Response, g, request, render_template_string, jsonify, session, redirect, url_for, flash
 from werkzeug.security import generate_password_hash, check_password_hash
 import aiosqlite
 
@@ -19,6 +20,11 @@ from config import Config
 from database import db_manager
 from utils.security import session_manager, input_validator
 from utils.logger import setup_logging
+from utils.metrics import MetricsRegistry
+from utils.dashboard_stats import DashboardStats
+from utils import admin_views
+from utils.events import event_bus
+from utils.live_feed import ActivityTail
 
 logger = setup_logging()
 
@@ -29,6 +35,18 @@ app.config['PERMANENT_SESSION_LIFETIME'] = 3600  # 1 heure
 # Heure de démarrage de l'interface (pour l'uptime)
 START_TIME = datetime.now()
 
+# Latences des routes de l'interface (le bot exporte les siennes dans Config.METRICS_FILE)
+web_metrics = MetricsRegistry(prefix="web")
+
+# Compteurs du tableau de bord (tables de synthèse + cache mémoire)
+dashboard_stats = DashboardStats(db_manager.reader, Config.DASHBOARD_STATS_TTL)
+
+# Flux en direct: les onglets s'abonnent au bus local, qu'un seul thread alimente
+activity_tail = ActivityTail(event_bus, db_manager.reader, dashboard_stats, Config.LIVE_FEED_INTERVAL)
+
+# Commentaire SSE envoyé sans événement pendant cette durée (détection des clients partis)
+STREAM_KEEPALIVE = 15
+
 # Hash du mot de passe admin (à faire une seule fois)
 ADMIN_PASSWORD_HASH = generate_password_hash(Config.INTERFACE_PASSWORD)
 
@@ -395,6 +413,19 @@ def require_auth(f):
         return f(*args, **kwargs)
     return wrapper
 
+@app.before_request
+def _start_timer():
+    g.request_start = time.perf_counter_ns()
+
+@app.after_request
+def _record_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'non_trouvee'
+        web_metrics.observe('http', f"{request.method} {route}", 'web',
+                            time.perf_counter_ns() - start, error=response.status_code >= 500)
+    return response
+
 @app.route('/')
 def index():
     return redirect(url_for('dashboard' if session.get('logged_in') else 'login'))
@@ -428,36 +459,27 @@ def _format_uptime(delta):
     return f"{hours}h {minutes}m"
 
 def _compute_stats() -> Dict[str, Any]:
-    guilds = users = commands_today = 0
+    stats: Dict[str, Any] = {'guilds': 0, 'users': 0, 'commands_today': 0}
     try:
-        with sqlite3.connect(db_manager.db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT COUNT(1) FROM guilds")
-            row = cur.fetchone()
-            guilds = row[0] if row and row[0] is not None else 0
-
-            cur.execute("SELECT COUNT(1) FROM users")
-            row = cur.fetchone()
-            users = row[0] if row and row[0] is not None else 0
-
-            cur.execute(
-                "SELECT COUNT(1) FROM activity_logs WHERE action_type = ? AND date(timestamp) = date('now','localtime')",
-                ("COMMAND_USED",)
-            )
-            row = cur.fetchone()
-            commands_today = row[0] if row and row[0] is not None else 0
+        stats.update(dashboard_stats.get())
     except Exception as e:
         logger.error(f"Erreur calcul statistiques: {e}")
-    uptime = _format_uptime(datetime.now() - START_TIME)
-    return {'guilds': guilds, 'users': users, 'commands_today': commands_today, 'uptime': uptime}
+    stats['uptime'] = _format_uptime(datetime.now() - START_TIME)
+    return stats
 
 def _get_recent_activities(limit: int = 10) -> List[Dict[str, str]]:
+    # Le flux en direct garde les dernières activités: pas de requête s'il en a assez
+    events = event_bus.recent(event_bus.ACTIVITY, limit)
+    if len(events) >= limit:
+        return [event.data for event in events]
+    
     items: List[Dict[str, str]] = []
     try:
-        with sqlite3.connect(db_manager.db_path) as conn:
+        with db_manager.snapshot() as conn:
             cur = conn.cursor()
+            # Ordre d'insertion = ordre de la clé primaire: lecture de `limit` lignes, sans tri
             cur.execute(
-                "SELECT action_type, action_data, timestamp FROM activity_logs ORDER BY timestamp DESC LIMIT ?",
+                "SELECT action_type, action_data, timestamp FROM activity_logs ORDER BY id DESC LIMIT ?",
                 (limit,)
             )
             for action_type, action_data, ts in cur.fetchall():
@@ -500,53 +522,62 @@ def dashboard():
         alerts=alerts
     )
 
+def _member_listing(page_sorts: List[str]) -> Dict[str, Any]:
+    """Contexte commun des pages économie/modération: serveur, tri, recherche, page"""
+    context: Dict[str, Any] = {
+        'guilds': [], 'guild_id': None, 'page': None, 'totals': {}, 'global_totals': {},
+        'sorts': page_sorts, 'sort': page_sorts[0], 'search': ''
+    }
+    sort = request.args.get('sort', page_sorts[0])
+    context['sort'] = sort if sort in page_sorts else page_sorts[0]
+    context['search'] = request.args.get('q', '')[:100]
+    
+    # Un seul instantané: liste, totaux et page sont cohérents entre eux
+    with db_manager.snapshot() as conn:
+        context['guilds'] = admin_views.list_guilds(conn)
+        guild_id = request.args.get('guild', type=int)
+        if guild_id is None and context['guilds']:
+            guild_id = context['guilds'][0]['id']
+        context['global_totals'] = admin_views.guild_totals(conn)
+        if guild_id is not None:
+            context['guild_id'] = guild_id
+            context['totals'] = admin_views.guild_totals(conn, guild_id)
+            context['page'] = admin_views.list_members(
+                conn, guild_id, context['sort'], context['search'],
+                request.args.get('after'), request.args.get('limit', admin_views.PAGE_SIZE, type=int)
+            )
+    return context
+
 @app.route('/economy')
 @require_auth
 def economy():
-    # Page de gestion de l'économie
-    # Exemple de récupération des utilisateurs et stats
-    users = []
-    stats = {'total_coins': 0, 'user_count': 0}
+    # Page de gestion de l'économie: membres d'un serveur paginés, totaux entretenus
+    context: Dict[str, Any] = {}
+    stats = {'total_coins': 0, 'user_count': 0, 'guild_coins': 0, 'guild_members': 0}
     try:
-        with sqlite3.connect(db_manager.db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT username, coins, level FROM members LEFT JOIN users ON members.user_id = users.id")
-            for username, coins, level in cur.fetchall():
-                users.append({'username': username, 'coins': coins, 'level': level})
-            cur.execute("SELECT SUM(coins) FROM members")
-            row = cur.fetchone()
-            stats['total_coins'] = row[0] if row and row[0] is not None else 0
-            cur.execute("SELECT COUNT(DISTINCT user_id) FROM members")
-            row = cur.fetchone()
-            stats['user_count'] = row[0] if row and row[0] is not None else 0
+        context = _member_listing(['coins', 'xp'])
+        stats['total_coins'] = context['global_totals'].get('coins', 0)
+        stats['user_count'] = dashboard_stats.get()['users']
+        stats['guild_coins'] = context['totals'].get('coins', 0)
+        stats['guild_members'] = context['totals'].get('members', 0)
     except Exception as e:
         logger.error(f"Erreur économie: {e}")
-    return render_template('economy.html', users=users, stats=stats)
+    return render_template('economy.html', stats=stats, **context)
 
 @app.route('/moderation')
 @require_auth
 def moderation():
-    # Page de modération
-    members = []
-    stats = {'member_count': 0, 'banned_count': 0, 'muted_count': 0}
+    # Page de modération: membres d'un serveur paginés, totaux entretenus
+    context: Dict[str, Any] = {}
+    stats = {'member_count': 0, 'banned_count': 0, 'warned_count': 0}
     try:
-        with sqlite3.connect(db_manager.db_path) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT username, 'Membre' as role FROM users")
-            for username, role in cur.fetchall():
-                members.append({'username': username, 'role': role})
-            cur.execute("SELECT COUNT(*) FROM users")
-            row = cur.fetchone()
-            stats['member_count'] = row[0] if row and row[0] is not None else 0
-            cur.execute("SELECT COUNT(*) FROM members WHERE ban_reason IS NOT NULL")
-            row = cur.fetchone()
-            stats['banned_count'] = row[0] if row and row[0] is not None else 0
-            cur.execute("SELECT COUNT(*) FROM members WHERE muted = 1")
-            row = cur.fetchone()
-            stats['muted_count'] = row[0] if row and row[0] is not None else 0
+        context = _member_listing(['warnings', 'xp'])
+        stats['member_count'] = context['totals'].get('members', 0)
+        stats['banned_count'] = context['totals'].get('banned', 0)
+        stats['warned_count'] = context['totals'].get('warned', 0)
     except Exception as e:
         logger.error(f"Erreur modération: {e}")
-    return render_template('moderation.html', members=members, stats=stats)
+    return render_template('moderation.html', stats=stats, **context)
 
 @app.route('/settings')
 @require_auth
@@ -577,6 +608,52 @@ def api_stats():
         logger.error(f"Erreur API stats: {e}")
         return jsonify({'error': 'Erreur serveur'}), 500
 
+@app.route('/api/stream')
+@require_auth
+def api_stream():
+    """Flux SSE: nouvelles activités et variations des compteurs, poussées par le bus"""
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    subscription = event_bus.subscribe(
+        (event_bus.ACTIVITY, event_bus.STATS, event_bus.STATS_DELTA), last_event_id
+    )
+    activity_tail.ensure_running()
+    snapshot = _compute_stats()
+    
+    def stream():
+        try:
+            yield "retry: 5000\n"
+            yield f"event: {event_bus.STATS}\ndata: {json.dumps(snapshot)}\n\n"
+            while True:
+                events = subscription.get(timeout=STREAM_KEEPALIVE)
+                if not events:
+                    yield ": keepalive\n\n"
+                for event in events:
+                    yield event.to_sse()
+        finally:
+            event_bus.unsubscribe(subscription)
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Export Prometheus: métriques du bot (fichier exporté) + routes de l'interface"""
+    if Config.METRICS_TOKEN:
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied, f"Bearer {Config.METRICS_TOKEN}"):
+            return Response("Non autorisé\n", status=401, mimetype='text/plain')
+    
+    parts = []
+    try:
+        parts.append(Config.METRICS_FILE.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        pass  # Bot arrêté ou export désactivé
+    except Exception as e:
+        logger.error(f"Erreur lecture métriques du bot: {e}")
+    parts.append(web_metrics.render_prometheus())
+    
+    return Response("".join(parts), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 @app.errorhandler(404)
 def not_found(error):
     return render_template('error.html', code=404, message="Page non trouvée", description="La page que vous cherchez n'existe pas."), 404